@@ -40,7 +40,16 @@ from flask import Flask
 
 from physiolog.config import get_config_class
 
+from .admission import admission_control
+from .background import recompute_queue
+from .cache import init_caches, object_cache
+from .columnar_store import columnar_store
 from .extensions import db, login_manager
+from .passwords import password_hasher
+from .principals import Principal, principal_cache
+from .scope import assignment_cache
+from .search import register_session_events as register_search_events
+from .summaries import register_session_events as register_summary_events
 
 # physiolog/ is a subfolder, target templates and static folders in the parent directory
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -68,13 +77,15 @@ def create_app(config_class=None) -> Flask:
 
     db.init_app(app)
     login_manager.init_app(app)
+    register_summary_events()
+    register_search_events()
 
     # models to create databases
     from . import models
     from .models import User
 
     @login_manager.user_loader
-    def load_user(user_id: str) -> User | None:
+    def load_user(user_id: str) -> User | Principal | None:
         """Flask-Login user loader callback
 
         Args:
@@ -82,11 +93,12 @@ def create_app(config_class=None) -> Flask:
             user_id (str): The user ID stored in the session (as a string)
 
         Returns:
-            User | None: The User object corresponding to the given user_id, or None if not found
+            User | Principal | None: A cached detached Principal for the given
+            user_id (see principals.py), or None if not found
         """
         if not user_id.isdigit():
             return None  # Invalid user_id format()
-        return User.query.get(int(user_id))
+        return principal_cache.load(int(user_id))
 
     # provide shell context for development
     @app.shell_context_processor
@@ -132,4 +144,13 @@ def create_app(config_class=None) -> Flask:
                         "Bootstrap user email or password not set. Skipping bootstrap user creation."
                     )
 
+    init_caches(app)
+    principal_cache.init_app(app, object_cache.backend)
+    assignment_cache.init_app(app, object_cache.backend)
+    columnar_store.init_app(app)
+    password_hasher.init_app(app)
+    admission_control.init_app(app)
+    # Start the write-behind queue once tables and recompute handlers exist
+    recompute_queue.init_app(app)
+
     return app
@@ -0,0 +1,192 @@
+"""
+admission.py
+
+In-process admission control for expensive endpoints.
+
+Views decorated with ``admission_control.admit("<class>")`` pass two checks
+before they run:
+
+- A token bucket per (user, endpoint class). It refills at
+  ADMISSION_<CLASS>_RATE_PER_S and holds at most ADMISSION_<CLASS>_BURST
+  tokens. Anonymous requests are keyed by remote address.
+- A process-wide cap of ADMISSION_MAX_CONCURRENT admitted requests running
+  at once, shared by all classes.
+
+A request that fails either check gets 429 Too Many Requests with a
+Retry-After header, so one tenant cannot tie up every worker. Classes in use:
+``heavy`` (all-time reads, stats, analytics, exports) and ``llm`` (calls to
+the OpenAI API). Counters are reported under ``admission_control`` in
+/api/metrics.
+
+Place ``admit`` inside ``response_cache.cached_view`` (closer to the view)
+so that cache hits, and requests that share an in-flight computation, take
+no token or slot; only requests that do the work are admitted. A streamed
+response keeps its slot until the body has been sent.
+
+The buckets and the concurrency cap live in process memory and are not
+shared between workers. Each gunicorn worker enforces them separately, so
+with ``-w 2`` a user gets up to twice the configured rate and burst, and
+twice ADMISSION_MAX_CONCURRENT requests run at once. Divide the settings by
+the worker count to get deployment-wide limits.
+
+Settings: ADMISSION_CONTROL_ENABLED, ADMISSION_MAX_CONCURRENT,
+ADMISSION_MAX_BUCKETS, ADMISSION_<CLASS>_RATE_PER_S, ADMISSION_<CLASS>_BURST.
+"""
+
+from __future__ import annotations
+
+import functools
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Sequence
+
+from flask import Flask, jsonify, make_response, request
+from flask_login import current_user
+
+DEFAULT_LIMITS: dict[str, tuple[float, float]] = {  # class -> (rate/s, burst)
+    "heavy": (10.0, 60.0),
+    "llm": (0.1, 5.0),
+}
+
+
+class TokenBucket:
+    """Classic token bucket; not thread-safe (guarded by AdmissionControl)."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take one token; 0.0 on success, else seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+
+class AdmissionControl:
+    """Token buckets plus a global concurrency cap (see module docstring)."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.max_concurrent = 16
+        self.max_buckets = 10000
+        self.limits: dict[str, tuple[float, float]] = dict(DEFAULT_LIMITS)
+        self._buckets: OrderedDict[tuple[str, str], TokenBucket] = OrderedDict()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counters: dict[str, int] = {}
+        self._reset_counters()
+
+    def init_app(self, app: Flask) -> None:
+        self.enabled = app.config.get("ADMISSION_CONTROL_ENABLED", True)
+        self.max_concurrent = int(app.config.get("ADMISSION_MAX_CONCURRENT", 16))
+        self.max_buckets = int(app.config.get("ADMISSION_MAX_BUCKETS", 10000))
+        self.limits = {
+            name: (
+                float(app.config.get(f"ADMISSION_{name.upper()}_RATE_PER_S", rate)),
+                float(app.config.get(f"ADMISSION_{name.upper()}_BURST", burst)),
+            )
+            for name, (rate, burst) in DEFAULT_LIMITS.items()
+        }
+        with self._lock:
+            self._buckets.clear()
+
+    def _reset_counters(self) -> None:
+        self._counters = {"admitted": 0, "rejected_rate": 0, "rejected_concurrency": 0}
+        for name in DEFAULT_LIMITS:
+            self._counters[f"rejected_{name}"] = 0
+
+    @staticmethod
+    def _client_key() -> str:
+        if current_user.is_authenticated:
+            return f"user:{current_user.id}"
+        return f"addr:{request.remote_addr}"
+
+    def _acquire(self, endpoint_class: str) -> float:
+        """0.0 when admitted (holding a concurrency slot), else Retry-After seconds."""
+        rate, burst = self.limits[endpoint_class]
+        key = (self._client_key(), endpoint_class)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+                while len(self._buckets) > self.max_buckets:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            if self._in_flight >= self.max_concurrent:
+                self._counters["rejected_concurrency"] += 1
+                self._counters[f"rejected_{endpoint_class}"] += 1
+                return 1.0
+            wait_s = bucket.take(now)
+            if wait_s:
+                self._counters["rejected_rate"] += 1
+                self._counters[f"rejected_{endpoint_class}"] += 1
+                return wait_s
+            self._in_flight += 1
+            self._counters["admitted"] += 1
+            return 0.0
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def admit(self, endpoint_class: str, *, methods: Sequence[str] = ("GET",)):
+        """Decorate a view so its ``methods`` requests go through admission."""
+        if endpoint_class not in DEFAULT_LIMITS:
+            raise ValueError(f"unknown endpoint class {endpoint_class!r}")
+
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or request.method not in methods:
+                    return view(*args, **kwargs)
+                wait_s = self._acquire(endpoint_class)
+                if wait_s:
+                    retry_after = (
+                        "3600" if math.isinf(wait_s) else str(math.ceil(wait_s))
+                    )
+                    return (
+                        jsonify({"success": False, "error": "Too many requests"}),
+                        429,
+                        {"Retry-After": retry_after},
+                    )
+                try:
+                    response = make_response(view(*args, **kwargs))
+                except BaseException:
+                    self._release()
+                    raise
+                if response.is_streamed:
+                    # the body is produced after the view returns; hold the
+                    # slot until the server has sent it and closes the response
+                    response.call_on_close(self._release)
+                else:
+                    self._release()
+                return response
+
+            return wrapper
+
+        return decorator
+
+    def metrics(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "in_flight": self._in_flight,
+                "max_concurrent": self.max_concurrent,
+                "buckets": len(self._buckets),
+                **self._counters,
+            }
+
+
+admission_control = AdmissionControl()
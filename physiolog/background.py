@@ -0,0 +1,302 @@
+"""
+background.py
+
+In-process write-behind queue for post-write recomputation.
+
+Derived data (rollups, caches, columnar copies, ...) registers a handler with
+``recompute_queue.register(name, fn)``. Whenever a transaction that touched a
+user's ``HealthEntry`` rows commits, the user id is queued and every handler
+runs as ``fn(user_id)`` on a worker thread inside an app context, off the
+request path.
+
+- Coalescing: a user already waiting in the queue is not queued twice, and
+  at most one job per user runs at a time (a write during a run schedules
+  exactly one follow-up run).
+- Durability (optional): with ``BACKGROUND_QUEUE_DURABLE_PATH`` set, pending
+  user ids are also kept in a small SQLite file and re-queued at start-up, so
+  work survives a worker restart.
+- Monitoring: ``recompute_queue.metrics()`` reports depth and lag, exposed
+  through GET /api/metrics.
+
+ORM writes are picked up by session events. Core statements (see
+entry_writes.py) call ``mark_user_dirty`` themselves. Other consumers of the
+same commit notifications (e.g. the response cache in cache.py) subscribe
+with ``on_users_committed``. Changes to the ``User`` row itself (account
+fields, password, flags) are also reported to ``on_accounts_committed``
+subscribers (e.g. the principal cache in principals.py).
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+DIRTY_USERS_KEY = "physiolog_dirty_user_ids"
+DIRTY_ACCOUNTS_KEY = "physiolog_dirty_account_ids"
+
+
+_commit_callbacks: list[Callable[[set[int]], None]] = []
+_account_callbacks: list[Callable[[set[int]], None]] = []
+
+
+def mark_user_dirty(session: Session, user_id: int) -> None:
+    """Queue ``user_id`` for recomputation once ``session`` commits."""
+    session.info.setdefault(DIRTY_USERS_KEY, set()).add(user_id)
+
+
+def mark_account_dirty(session: Session, user_id: int) -> None:
+    """Report a change to the ``User`` row (implies ``mark_user_dirty``)."""
+    session.info.setdefault(DIRTY_ACCOUNTS_KEY, set()).add(user_id)
+    mark_user_dirty(session, user_id)
+
+
+def on_users_committed(callback: Callable[[set[int]], None]) -> None:
+    """Call ``callback(user_ids)`` after every commit that touched user data."""
+    if callback not in _commit_callbacks:
+        _commit_callbacks.append(callback)
+
+
+def on_accounts_committed(callback: Callable[[set[int]], None]) -> None:
+    """Call ``callback(user_ids)`` after every commit that changed ``User`` rows."""
+    if callback not in _account_callbacks:
+        _account_callbacks.append(callback)
+
+
+class _DurableStore:
+    """SQLite-file copy of the pending user ids (one row per user)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS recompute_queue ("
+                " user_id INTEGER PRIMARY KEY,"
+                " version INTEGER NOT NULL,"
+                " enqueued_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def add(self, user_id: int, enqueued_at: float) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO recompute_queue (user_id, version, enqueued_at)"
+                " VALUES (?, 1, ?)"
+                " ON CONFLICT (user_id) DO UPDATE SET version = version + 1",
+                (user_id, enqueued_at),
+            )
+
+    def version(self, user_id: int) -> int | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version FROM recompute_queue WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def done(self, user_id: int, version: int | None) -> None:
+        """Remove the row unless it was re-queued after ``version`` was read."""
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM recompute_queue WHERE user_id = ? AND version = ?",
+                (user_id, version),
+            )
+
+    def pending(self) -> list[tuple[int, float]]:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT user_id, enqueued_at FROM recompute_queue ORDER BY enqueued_at"
+            ).fetchall()
+
+
+class RecomputeQueue:
+    """Thread-pool work queue of per-user recompute jobs (see module docstring)."""
+
+    def __init__(self) -> None:
+        self.app: Flask | None = None
+        self.enabled = False
+        self._handlers: dict[str, Callable[[int], None]] = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending: dict[int, float] = {}  # user_id -> enqueued at
+        self._running: set[int] = set()
+        self._executor: ThreadPoolExecutor | None = None
+        self._durable: _DurableStore | None = None
+        self._counters = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "processed": 0,
+            "failed": 0,
+        }
+        self._last_lag_s: float | None = None
+        self._max_lag_s = 0.0
+
+    def init_app(self, app: Flask) -> None:
+        """Bind to ``app`` and start the workers (BACKGROUND_QUEUE_* settings)."""
+        self.app = app
+        self.enabled = app.config.get("BACKGROUND_QUEUE_ENABLED", True)
+        _register_session_events()
+        if not self.enabled:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=app.config.get("BACKGROUND_QUEUE_WORKERS", 2),
+                thread_name_prefix="physiolog-recompute",
+            )
+        durable_path = app.config.get("BACKGROUND_QUEUE_DURABLE_PATH", "")
+        if durable_path:
+            self._durable = _DurableStore(durable_path)
+            for user_id, enqueued_at in self._durable.pending():
+                self._enqueue(user_id, enqueued_at, persist=False)
+
+    def register(self, name: str, handler: Callable[[int], None]) -> None:
+        """Run ``handler(user_id)`` for every committed write to that user's data."""
+        self._handlers[name] = handler
+
+    def unregister(self, name: str) -> None:
+        self._handlers.pop(name, None)
+
+    def enqueue(self, user_id: int) -> None:
+        """Schedule recomputation for ``user_id`` (coalesced with pending work)."""
+        if not self.enabled or not self._handlers:
+            return
+        self._enqueue(user_id, time.time(), persist=True)
+
+    def _enqueue(self, user_id: int, enqueued_at: float, *, persist: bool) -> None:
+        if persist and self._durable is not None:
+            self._durable.add(user_id, enqueued_at)
+        with self._lock:
+            self._counters["enqueued"] += 1
+            if user_id in self._pending:
+                self._counters["coalesced"] += 1
+                return
+            self._pending[user_id] = enqueued_at
+            if user_id not in self._running:
+                self._submit(user_id)
+
+    def _submit(self, user_id: int) -> None:
+        assert self._executor is not None
+        self._executor.submit(self._run, user_id)
+
+    def _run(self, user_id: int) -> None:
+        with self._lock:
+            enqueued_at = self._pending.pop(user_id)
+            self._running.add(user_id)
+        version = self._durable.version(user_id) if self._durable else None
+
+        failed = False
+        assert self.app is not None
+        with self.app.app_context():
+            from .extensions import db
+
+            for name, handler in list(self._handlers.items()):
+                try:
+                    handler(user_id)
+                except Exception:
+                    failed = True
+                    logger.exception(
+                        "Recompute handler %r failed for user %s", name, user_id
+                    )
+                    db.session.rollback()
+            db.session.remove()
+
+        if self._durable is not None and not failed:
+            self._durable.done(user_id, version)
+        with self._lock:
+            lag = time.time() - enqueued_at
+            self._last_lag_s = lag
+            self._max_lag_s = max(self._max_lag_s, lag)
+            self._counters["failed" if failed else "processed"] += 1
+            self._running.discard(user_id)
+            if user_id in self._pending:
+                self._submit(user_id)  # written again while running
+            elif not self._pending and not self._running:
+                self._idle.notify_all()
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Block until no job is pending or running. Returns False on timeout."""
+        with self._lock:
+            return self._idle.wait_for(
+                lambda: not self._pending and not self._running, timeout=timeout
+            )
+
+    def metrics(self) -> dict[str, object]:
+        """Queue depth, lag and counters for monitoring."""
+        with self._lock:
+            now = time.time()
+            oldest = min(self._pending.values(), default=None)
+            return {
+                "enabled": self.enabled,
+                "durable": self._durable is not None,
+                "handlers": sorted(self._handlers),
+                "depth": len(self._pending),
+                "running": len(self._running),
+                "oldest_pending_age_s": (
+                    round(now - oldest, 3) if oldest is not None else None
+                ),
+                "last_lag_s": (
+                    round(self._last_lag_s, 3) if self._last_lag_s is not None else None
+                ),
+                "max_lag_s": round(self._max_lag_s, 3),
+                **self._counters,
+            }
+
+
+recompute_queue = RecomputeQueue()
+
+_session_events_registered = False
+
+
+def _register_session_events() -> None:
+    """Attach the flush/commit listeners once per process."""
+    global _session_events_registered
+    if _session_events_registered:
+        return
+    _session_events_registered = True
+    event.listen(Session, "after_flush", _collect_dirty_users)
+    event.listen(Session, "after_commit", _enqueue_dirty_users)
+    event.listen(Session, "after_soft_rollback", _discard_dirty_users)
+
+
+def _collect_dirty_users(session: Session, flush_context) -> None:
+    from .models import HealthEntry, User
+
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, HealthEntry) and obj.user_id is not None:
+            mark_user_dirty(session, obj.user_id)
+        elif isinstance(obj, User) and obj.id is not None:
+            mark_account_dirty(session, obj.id)
+
+
+def _enqueue_dirty_users(session: Session) -> None:
+    account_ids = session.info.pop(DIRTY_ACCOUNTS_KEY, None)
+    user_ids = session.info.pop(DIRTY_USERS_KEY, None)
+    for callbacks, ids in (
+        (_account_callbacks, account_ids),
+        (_commit_callbacks, user_ids),
+    ):
+        if not ids:
+            continue
+        for callback in callbacks:
+            try:
+                callback(ids)
+            except Exception:
+                logger.exception("Commit callback %r failed", callback)
+    for user_id in user_ids or ():
+        recompute_queue.enqueue(user_id)
+
+
+def _discard_dirty_users(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:  # outermost transaction only
+        session.info.pop(DIRTY_ACCOUNTS_KEY, None)
+        session.info.pop(DIRTY_USERS_KEY, None)
@@ -0,0 +1,482 @@
+"""
+cache.py
+
+Per-user response cache for read-heavy GET endpoints.
+
+Entries are keyed by (endpoint, effective user, cache version of that user,
+normalized query args). A committed write to a user's data bumps the user's
+version, so every response cached for that user becomes unreachable at once
+and ages out of the LRU. The version is read before the view runs, so a
+response computed while a write commits is filed under the old version and
+never served afterwards.
+
+Misses are coalesced (``SingleFlight``): while one request computes a key,
+concurrent identical requests (same endpoint, user, version and args) wait
+for it and share its response instead of running the same queries again.
+This also holds with RESPONSE_CACHE_ENABLED off, so a burst of identical
+requests after a deploy or cache flush costs one computation.
+
+Writes are detected with the same machinery as the recompute queue
+(background.py): ORM flushes of ``HealthEntry`` and ``User`` rows, plus
+``mark_user_dirty`` calls from Core statements, reported after commit.
+
+The storage is pluggable (``CacheBackend``), chosen by CACHE_BACKEND:
+
+- ``memory`` (default): bounded in-memory LRU with TTL (``MemoryBackend``),
+  local to each worker process. A version bump in one worker is invisible to
+  the others, so the caches whose staleness matters (responses here,
+  principals and admin scopes) only use it when CACHE_SINGLE_PROCESS declares
+  that a single process serves requests (``flask run``, tests). Otherwise
+  they stay off; see ``coherent_across_workers``.
+- ``sqlite``: the option for several workers. A SQLite file shared by all
+  workers on the host (``SQLiteBackend``, CACHE_SQLITE_PATH); a result
+  computed by one gunicorn worker is served by all of them, and
+  invalidations reach every worker. Point the path at /dev/shm to keep it in
+  shared memory. The file, with its per-user versions, outlives the
+  database: delete it when the database is reset or recreated, or cached
+  bodies may be served for reused user ids until they expire.
+
+The same backend also serves ``object_cache``, a get-or-compute cache for
+non-response values (e.g. the docs tree and rendered markdown in
+routes_web.py).
+
+Settings: CACHE_BACKEND, CACHE_SQLITE_PATH, CACHE_MAX_ENTRIES,
+CACHE_SINGLE_PROCESS, RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_TTL_S. Counters
+are exposed through GET /api/metrics.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Protocol
+
+from flask import Flask, Response, make_response, request
+
+from .background import on_users_committed
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class CacheBackend(Protocol):
+    """Storage used by ``ResponseCache``; see ``MemoryBackend``."""
+
+    instance_id: str  # differs between backends whose versions are unrelated
+    shared: bool  # whether all worker processes see the same items and versions
+
+    def get(self, key: str) -> Any: ...  # value or MISSING
+
+    def set(self, key: str, value: Any, ttl_s: float) -> None: ...
+
+    def version(self, namespace: str) -> int: ...
+
+    def bump_version(self, namespace: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+    def __len__(self) -> int: ...
+
+
+class MemoryBackend:
+    """Thread-safe LRU of at most ``max_entries`` items, each with a TTL."""
+
+    shared = False
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self.evictions = 0
+        self.instance_id = uuid.uuid4().hex
+        self._items: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return MISSING
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return MISSING
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_s: float) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl_s, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def version(self, namespace: str) -> int:
+        with self._lock:
+            return self._versions.get(namespace, 0)
+
+    def bump_version(self, namespace: str) -> None:
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class SQLiteBackend:
+    """
+    Cross-process cache in one SQLite file (WAL mode).
+
+    Every operation is a single statement, so gets and sets are atomic across
+    workers. Values are pickled. Once the file holds more than
+    ``max_entries`` items, expired rows are purged and then the least
+    recently read rows are evicted. Versions live in the same file.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, max_entries: int = 1024) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_items ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_cache_items_accessed_at"
+            " ON cache_items (accessed_at)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_versions ("
+            " namespace TEXT PRIMARY KEY,"
+            " version INTEGER NOT NULL)"
+        )
+        # Versions restart at 0 if the file is recreated; the id tells apart
+        # a version 0 written before that from one written after.
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_meta (instance_id TEXT NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO cache_meta (instance_id) SELECT ?"
+            " WHERE NOT EXISTS (SELECT 1 FROM cache_meta)",
+            (uuid.uuid4().hex,),
+        )
+        self.instance_id = conn.execute(
+            "SELECT instance_id FROM cache_meta"
+        ).fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        """Per-thread connection, reopened after a fork."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key: str) -> Any:
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "UPDATE cache_items SET accessed_at = ?"
+            " WHERE key = ? AND expires_at > ? RETURNING value",
+            (now, key, now),
+        ).fetchone()
+        if row is None:
+            return MISSING
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl_s: float) -> None:
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "INSERT INTO cache_items (key, value, expires_at, accessed_at)"
+            " VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (key) DO UPDATE SET value = excluded.value,"
+            " expires_at = excluded.expires_at, accessed_at = excluded.accessed_at",
+            (
+                key,
+                pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+                now + ttl_s,
+                now,
+            ),
+        )
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            conn.execute("DELETE FROM cache_items WHERE expires_at <= ?", (now,))
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                cur = conn.execute(
+                    "DELETE FROM cache_items WHERE key IN ("
+                    " SELECT key FROM cache_items ORDER BY accessed_at LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += cur.rowcount
+
+    def version(self, namespace: str) -> int:
+        row = (
+            self._connect()
+            .execute(
+                "SELECT version FROM cache_versions WHERE namespace = ?", (namespace,)
+            )
+            .fetchone()
+        )
+        return row[0] if row else 0
+
+    def bump_version(self, namespace: str) -> None:
+        self._connect().execute(
+            "INSERT INTO cache_versions (namespace, version) VALUES (?, 1)"
+            " ON CONFLICT (namespace) DO UPDATE SET version = version + 1",
+            (namespace,),
+        )
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM cache_items")
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM cache_items").fetchone()[0]
+
+
+def make_backend(config) -> CacheBackend:
+    """Build the backend selected by CACHE_BACKEND."""
+    max_entries = int(config.get("CACHE_MAX_ENTRIES", 1024))
+    kind = str(config.get("CACHE_BACKEND", "memory")).strip().lower()
+    if kind == "sqlite":
+        return SQLiteBackend(config["CACHE_SQLITE_PATH"], max_entries)
+    if kind == "memory":
+        return MemoryBackend(max_entries)
+    raise ValueError(f"Unknown CACHE_BACKEND {kind!r}, expected 'memory' or 'sqlite'")
+
+
+def coherent_across_workers(config, backend: CacheBackend, cache_name: str) -> bool:
+    """
+    Whether an invalidation through ``backend`` reaches every process that
+    serves requests: the backend is shared, or CACHE_SINGLE_PROCESS is set.
+    Logs a warning naming ``cache_name`` when it does not.
+    """
+    if backend.shared or config.get("CACHE_SINGLE_PROCESS", False):
+        return True
+    logger.warning(
+        "%s disabled: CACHE_BACKEND %r is local to each worker process; "
+        "use 'sqlite' or set CACHE_SINGLE_PROCESS",
+        cache_name,
+        type(backend).__name__,
+    )
+    return False
+
+
+class ObjectCache:
+    """Get-or-compute cache for arbitrary picklable values."""
+
+    def __init__(self) -> None:
+        self.backend: CacheBackend = MemoryBackend()
+
+    def init_app(self, app: Flask, backend: CacheBackend) -> None:
+        self.backend = backend
+
+    def get_or_set(self, key: str, compute: Callable[[], Any], ttl_s: float) -> Any:
+        value = self.backend.get(f"obj|{key}")
+        if value is MISSING:
+            value = compute()
+            self.backend.set(f"obj|{key}", value, ttl_s)
+        return value
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """At most one in-flight call per key; concurrent callers share its outcome."""
+
+    def __init__(self) -> None:
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._flights: dict[str, _Flight] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """
+        Run ``fn`` unless a call for ``key`` is already running, in which case
+        wait for that call. Exceptions are re-raised in every waiter.
+
+        Returns:
+            tuple: (result, shared), where ``shared`` is True for waiters.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+
+def normalize_args(args) -> str:
+    """Stable string for a request's query args (sorted, values trimmed)."""
+    return "&".join(
+        f"{key}={value.strip()}"
+        for key in sorted(args)
+        for value in sorted(args.getlist(key))
+    )
+
+
+class ResponseCache:
+    """Version-invalidated, single-flight cache of GET responses (see module doc)."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.ttl_s = 300.0
+        self.backend: CacheBackend = MemoryBackend()
+        self.flights = SingleFlight()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+
+    def init_app(self, app: Flask, backend: CacheBackend) -> None:
+        self.enabled = app.config.get(
+            "RESPONSE_CACHE_ENABLED", True
+        ) and coherent_across_workers(app.config, backend, "Response cache")
+        self.ttl_s = float(app.config.get("RESPONSE_CACHE_TTL_S", 300))
+        self.backend = backend
+        on_users_committed(self.invalidate_users)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def user_namespace(self, user_id: int) -> str:
+        return f"user:{user_id}"
+
+    def key(self, endpoint: str, user_id: int, args: str) -> str:
+        version = self.backend.version(self.user_namespace(user_id))
+        return f"{endpoint}|{user_id}|v{version}|{args}"
+
+    def data_version(self, user_id: int) -> str:
+        """
+        Token that changes after every committed write to the user's data.
+        Other derived copies (e.g. columnar_store.py) stamp themselves with it.
+        """
+        version = self.backend.version(self.user_namespace(user_id))
+        return f"{self.backend.instance_id}:{version}"
+
+    def invalidate_users(self, user_ids) -> None:
+        """Drop everything cached for these users (bumps their versions)."""
+        for user_id in user_ids:
+            self.backend.bump_version(self.user_namespace(user_id))
+            self._count("invalidations")
+
+    def cached_view(self, endpoint: str, *, user_id: Callable[[], int]):
+        """
+        Decorate a view so successful GET responses are cached per
+        ``user_id()`` and query args, and concurrent identical misses are
+        computed once. Other methods pass straight through.
+        """
+
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != "GET":
+                    return view(*args, **kwargs)
+
+                key = self.key(endpoint, user_id(), normalize_args(request.args))
+                if self.enabled:
+                    cached = self.backend.get(key)
+                    if cached is not MISSING:
+                        self._count("hits")
+                        body, status, mimetype = cached
+                        return Response(body, status=status, mimetype=mimetype)
+                    self._count("misses")
+
+                def compute():
+                    response = make_response(view(*args, **kwargs))
+                    if response.direct_passthrough:
+                        return None, response
+                    payload = (
+                        response.get_data(),
+                        response.status_code,
+                        response.mimetype,
+                    )
+                    if self.enabled and response.status_code == 200:
+                        self.backend.set(key, payload, self.ttl_s)
+                        self._count("stores")
+                    return payload, response
+
+                (payload, response), shared = self.flights.do(key, compute)
+                if not shared:
+                    return response
+                if payload is None:  # streamed body; cannot be shared
+                    return view(*args, **kwargs)
+                body, status, mimetype = payload
+                return Response(body, status=status, mimetype=mimetype)
+
+            return wrapper
+
+        return decorator
+
+    def metrics(self) -> dict[str, object]:
+        """Hit/miss counters and size for monitoring."""
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "size": len(self.backend),
+            "evictions": getattr(self.backend, "evictions", None),
+            "hit_ratio": round(counters["hits"] / lookups, 3) if lookups else None,
+            "coalesced": self.flights.coalesced,
+            **counters,
+        }
+
+
+response_cache = ResponseCache()
+object_cache = ObjectCache()
+
+
+def init_caches(app: Flask) -> None:
+    """Create the configured backend and bind both caches to it."""
+    backend = make_backend(app.config)
+    response_cache.init_app(app, backend)
+    object_cache.init_app(app, backend)
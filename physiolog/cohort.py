@@ -0,0 +1,270 @@
+"""
+cohort.py
+
+Statistics for all clients assigned to an admin (``/api/admin/cohort-stats``).
+
+The cohort is read with a fixed number of statements, however many clients
+it has:
+
+- ``cohort_averages``: one ``GROUP BY user_id`` over health_entries giving
+  each client's ``compute_stats`` averages. The ``?days=`` window ends at the
+  client's own latest entry (``UserSummary.last_entry_date``), as in
+  ``/api/stats``.
+- ``cohort_trends``: latest weight and fat mass per client and their change
+  over 7 days, picked with window functions (``max(date) OVER`` and
+  ``row_number() OVER``). The baseline is the latest value at least 7 days
+  older than the latest one.
+- ``cohort_detailed_stats``: dispersion and quantiles need each client's
+  values, not SQL aggregates. The rows of all clients are loaded with one
+  query, then ``compute_stats_columnar`` runs per client on a thread pool
+  (NumPy releases the GIL in its reductions).
+
+Settings: COHORT_STATS_WORKERS (0 computes detailed stats inline).
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, Iterable, Sequence
+
+from flask import current_app
+from sqlalchemy import ColumnElement, case, func, literal, select, union_all
+
+from .extensions import db
+from .models import HealthEntry, UserSummary
+from .services import METRICS, columns_from_rows, compute_stats_columnar, mask_outliers
+from .services.outliers import OUTLIER_BITS, OUTLIER_METRICS
+
+TREND_DAYS = 7
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _days_before(column: Any, days: int) -> ColumnElement:
+    """``column - days`` as a SQL date expression."""
+    if db.session.get_bind().dialect.name == "sqlite":
+        return func.date(column, f"-{days} days")
+    return column - days
+
+
+def _window_filter(days: int | None) -> ColumnElement[bool]:
+    """Entries in the last ``days`` days up to each client's latest entry."""
+    if days is None:
+        return literal(True)
+    return HealthEntry.date >= _days_before(UserSummary.last_entry_date, days - 1)
+
+
+def _flagged(bits: int) -> ColumnElement[bool]:
+    """Entry has any of the ``OUTLIER_BITS`` in ``bits`` set."""
+    return HealthEntry.outlier_metrics.bitwise_and(bits) != 0
+
+
+def _metric_column(attr_name: str, exclude_outliers: bool) -> ColumnElement:
+    column = getattr(HealthEntry, attr_name)
+    if exclude_outliers and attr_name in OUTLIER_METRICS:
+        return case((_flagged(OUTLIER_BITS[attr_name]), None), else_=column)
+    return column
+
+
+def _round_or_none(value: float | None) -> float | None:
+    return None if value is None else round(float(value), 2)
+
+
+def cohort_averages(
+    client_ids: Iterable[int], days: int | None, *, exclude_outliers: bool = False
+) -> dict[int, dict[str, Any]]:
+    """
+    Averages of every client with entries in the window, keyed by user id.
+
+    Returns:
+        dict[int, dict]: ``{"start_date", "end_date", "stats"}`` per client;
+        ``stats`` has the ``compute_stats`` keys.
+    """
+    client_ids = sorted(set(client_ids))
+    if not client_ids:
+        return {}
+    query = (
+        select(
+            HealthEntry.user_id,
+            func.min(HealthEntry.date),
+            func.max(HealthEntry.date),
+            func.count(),
+            *(
+                func.avg(_metric_column(attr_name, exclude_outliers))
+                for attr_name in METRICS.values()
+            ),
+        )
+        .join(UserSummary, UserSummary.user_id == HealthEntry.user_id)
+        .where(HealthEntry.user_id.in_(client_ids), _window_filter(days))
+        .group_by(HealthEntry.user_id)
+    )
+    result: dict[int, dict[str, Any]] = {}
+    for user_id, first_date, last_date, count, *averages in db.session.execute(query):
+        stats: dict[str, Any] = {
+            stat_key: _round_or_none(value)
+            for stat_key, value in zip(METRICS, averages)
+        }
+        stats["total_entries"] = count
+        result[user_id] = {
+            "start_date": first_date,
+            "end_date": last_date,
+            "stats": stats,
+        }
+    return result
+
+
+def _trend_series(
+    name: str,
+    value: ColumnElement,
+    client_ids: Sequence[int],
+    outlier_bits: int,
+):
+    """
+    Latest and baseline row of one series, per client (rn = 1 of each part).
+    Rows flagged with any of ``outlier_bits`` are skipped.
+    """
+    conditions = [HealthEntry.user_id.in_(client_ids), value.is_not(None)]
+    if outlier_bits:
+        conditions.append(~_flagged(outlier_bits))
+    rows = (
+        select(
+            HealthEntry.user_id,
+            HealthEntry.date,
+            value.label("value"),
+            func.max(HealthEntry.date)
+            .over(partition_by=HealthEntry.user_id)
+            .label("last_date"),
+        )
+        .where(*conditions)
+        .subquery()
+    )
+    is_baseline = rows.c.date <= _days_before(rows.c.last_date, TREND_DAYS)
+    ranked = select(
+        literal(name).label("series"),
+        rows.c.user_id,
+        rows.c.date,
+        rows.c.value,
+        case((is_baseline, 1), else_=0).label("is_baseline"),
+        func.row_number()
+        .over(partition_by=(rows.c.user_id, is_baseline), order_by=rows.c.date.desc())
+        .label("rn"),
+    ).subquery()
+    return select(
+        ranked.c.series,
+        ranked.c.user_id,
+        ranked.c.date,
+        ranked.c.value,
+        ranked.c.is_baseline,
+    ).where(ranked.c.rn == 1)
+
+
+def cohort_trends(
+    client_ids: Iterable[int], *, exclude_outliers: bool = False
+) -> dict[int, dict[str, Any]]:
+    """
+    Latest weight and fat mass of each client and their 7-day change.
+
+    Returns:
+        dict[int, dict]: per client ``{"latest": {...}, "change_7d": {...}}``
+        with ``weight_kg`` and ``fat_mass_kg`` entries (None when unknown).
+    """
+    client_ids = sorted(set(client_ids))
+    if not client_ids:
+        return {}
+    fat_mass = HealthEntry.weight_kg * HealthEntry.body_fat_percent / 100.0
+    # fat mass depends on both readings
+    weight_bits = OUTLIER_BITS["weight_kg"] if exclude_outliers else 0
+    fat_mass_bits = sum(OUTLIER_BITS.values()) if exclude_outliers else 0
+    query = union_all(
+        _trend_series("weight_kg", HealthEntry.weight_kg, client_ids, weight_bits),
+        _trend_series("fat_mass_kg", fat_mass, client_ids, fat_mass_bits),
+    )
+    points: dict[int, dict[tuple[str, bool], tuple[date, float]]] = defaultdict(dict)
+    for series, user_id, entry_date, value, is_baseline in db.session.execute(query):
+        if isinstance(entry_date, str):  # union columns come back untyped on SQLite
+            entry_date = date.fromisoformat(entry_date)
+        points[user_id][(series, bool(is_baseline))] = (entry_date, float(value))
+
+    result: dict[int, dict[str, Any]] = {}
+    for user_id, by_series in points.items():
+        latest: dict[str, Any] = {}
+        change: dict[str, Any] = {}
+        for series in ("weight_kg", "fat_mass_kg"):
+            current = by_series.get((series, False))
+            baseline = by_series.get((series, True))
+            latest[series] = _round_or_none(current[1]) if current else None
+            latest[f"{series}_date"] = current[0].isoformat() if current else None
+            change[series] = (
+                _round_or_none(current[1] - baseline[1])
+                if current and baseline
+                else None
+            )
+            change[f"{series}_since"] = baseline[0].isoformat() if baseline else None
+        result[user_id] = {"latest": latest, "change_7d": change}
+    return result
+
+
+def _stats_executor() -> ThreadPoolExecutor | None:
+    global _executor
+    workers = int(current_app.config.get("COHORT_STATS_WORKERS", 4))
+    if workers <= 1:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="physiolog-cohort"
+            )
+        return _executor
+
+
+def cohort_detailed_stats(
+    client_ids: Iterable[int],
+    days: int | None,
+    *,
+    dispersion: bool = False,
+    quantiles: Sequence[float] = (),
+    exclude_outliers: bool = False,
+) -> dict[int, dict[str, Any]]:
+    """``cohort_averages`` plus ``compute_stats_columnar`` extras (see module doc)."""
+    client_ids = sorted(set(client_ids))
+    if not client_ids:
+        return {}
+    metric_names = list(METRICS.values())
+    query = (
+        select(
+            HealthEntry.user_id,
+            HealthEntry.date,
+            HealthEntry.outlier_metrics,
+            *(getattr(HealthEntry, name) for name in metric_names),
+        )
+        .join(UserSummary, UserSummary.user_id == HealthEntry.user_id)
+        .where(HealthEntry.user_id.in_(client_ids), _window_filter(days))
+        .order_by(HealthEntry.user_id, HealthEntry.date)
+    )
+    rows_by_user: dict[int, list] = defaultdict(list)
+    for row in db.session.execute(query):
+        rows_by_user[row[0]].append(row)
+
+    def client_stats(rows: list) -> dict[str, Any]:
+        columns = columns_from_rows((row[3:] for row in rows), metric_names)
+        if exclude_outliers:
+            columns = mask_outliers(columns, [row[2] for row in rows])
+        return {
+            "start_date": rows[0][1],
+            "end_date": rows[-1][1],
+            "stats": compute_stats_columnar(
+                columns, dispersion=dispersion, quantiles=quantiles
+            ),
+        }
+
+    executor = _stats_executor() if len(rows_by_user) > 1 else None
+    user_ids = list(rows_by_user)
+    groups = (rows_by_user[user_id] for user_id in user_ids)
+    results = (
+        executor.map(client_stats, groups) if executor else map(client_stats, groups)
+    )
+    return dict(zip(user_ids, results))
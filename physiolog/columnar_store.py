@@ -0,0 +1,222 @@
+"""
+columnar_store.py
+
+Optional memory-mapped columnar copy of each user's HealthEntry metrics, read
+by the analytics endpoints instead of the database.
+
+Layout under COLUMNAR_STORE_PATH:
+
+    <user_id>/CURRENT           name of the live generation directory
+    <user_id>/<generation>/
+        manifest.json           columns, row count and data version
+        date.npy                int32 date ordinals, ascending (the date index)
+        outlier_metrics.npy     uint8 OUTLIER_BITS per row
+        <column>.npy            float64 per metric, NaN = missing
+
+A recompute_queue handler (background.py) rewrites a user's files after each
+committed write. It builds a new generation next to the live one and switches
+CURRENT with an atomic rename, so readers never see a half-written set.
+``load`` opens the files with ``np.load(mmap_mode="r")`` and keeps them open
+per process, and ``UserColumns.last_days`` slices them with
+``searchsorted``. A stats read therefore creates no ORM objects and sends no
+SQL.
+
+The refresh runs after the commit, so the files briefly lag writes. Each
+generation records the user's data version (``ResponseCache.data_version``)
+read before its query, and ``load`` returns None while that no longer
+matches. Callers then fall back to SQL. With the per-process "memory" cache
+backend, only the worker that ran the refresh sees a match. Use
+CACHE_BACKEND=sqlite so that every worker can read the files.
+
+Settings: COLUMNAR_STORE_ENABLED, COLUMNAR_STORE_PATH.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date as Date
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+from flask import Flask
+
+from .background import recompute_queue
+from .cache import response_cache
+from .extensions import db
+from .models import HealthEntry
+from .services import METRICS
+
+logger = logging.getLogger(__name__)
+
+COLUMNS: tuple[str, ...] = tuple(dict.fromkeys(METRICS.values()))
+
+
+@dataclass(frozen=True)
+class UserColumns:
+    """One user's metrics as read-only arrays sharing the same row order."""
+
+    dates: np.ndarray  # int32 ordinals, ascending
+    outlier_metrics: np.ndarray
+    columns: dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def first_date(self) -> Date:
+        return Date.fromordinal(int(self.dates[0]))
+
+    @property
+    def last_date(self) -> Date:
+        return Date.fromordinal(int(self.dates[-1]))
+
+    def last_days(self, days: int) -> UserColumns:
+        """Rows of the ``days`` days ending at the latest entry (views, no copies)."""
+        if not len(self):
+            return self
+        start = np.searchsorted(self.dates, int(self.dates[-1]) - days + 1)
+        return UserColumns(
+            self.dates[start:],
+            self.outlier_metrics[start:],
+            {name: values[start:] for name, values in self.columns.items()},
+        )
+
+
+class ColumnarStore:
+    """Per-user .npy files refreshed off the request path (see module docstring)."""
+
+    def __init__(self, max_open_users: int = 256) -> None:
+        self.enabled = False
+        self.root: Path | None = None
+        self.max_open_users = max_open_users
+        self._lock = threading.Lock()
+        self._open: OrderedDict[int, tuple[str, UserColumns]] = OrderedDict()
+        self._counters = {"reads": 0, "stale": 0, "refreshes": 0}
+
+    def init_app(self, app: Flask) -> None:
+        self.enabled = app.config.get("COLUMNAR_STORE_ENABLED", False)
+        if not self.enabled:
+            recompute_queue.unregister("columnar_store")
+            return
+        self.root = Path(app.config["COLUMNAR_STORE_PATH"])
+        self.root.mkdir(parents=True, exist_ok=True)
+        recompute_queue.register("columnar_store", self.refresh)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def refresh(self, user_id: int) -> None:
+        """Rewrite the user's files from HealthEntry (recompute_queue handler)."""
+        assert self.root is not None
+        version = response_cache.data_version(user_id)
+        rows = db.session.execute(
+            db.select(
+                HealthEntry.date,
+                HealthEntry.outlier_metrics,
+                *(getattr(HealthEntry, name) for name in COLUMNS),
+            )
+            .where(HealthEntry.user_id == user_id)
+            .order_by(HealthEntry.date)
+        ).all()
+
+        user_dir = self.root / str(user_id)
+        generation = f"{time.time_ns()}-{os.getpid()}"
+        gen_dir = user_dir / generation
+        gen_dir.mkdir(parents=True)
+        # transpose once instead of walking every row per column
+        dates, flags, *values = zip(*rows) if rows else [()] * (len(COLUMNS) + 2)
+        ordinals = np.fromiter((d.toordinal() for d in dates), np.int32, len(dates))
+        np.save(gen_dir / "date.npy", ordinals)
+        np.save(gen_dir / "outlier_metrics.npy", np.array(flags, dtype=np.uint8))
+        for name, column in zip(COLUMNS, values):
+            # None (missing metric) becomes NaN
+            np.save(gen_dir / f"{name}.npy", np.array(column, dtype=float))
+        (gen_dir / "manifest.json").write_text(
+            json.dumps(
+                {"columns": list(COLUMNS), "rows": len(rows), "version": version}
+            )
+        )
+
+        tmp = user_dir / f"CURRENT.{generation}"
+        tmp.write_text(generation)
+        os.replace(tmp, user_dir / "CURRENT")
+        self._count("refreshes")
+        self._remove_old_generations(user_dir)
+
+    def _remove_old_generations(self, user_dir: Path) -> None:
+        try:
+            live = (user_dir / "CURRENT").read_text()
+        except FileNotFoundError:
+            return
+        for path in user_dir.iterdir():
+            if path.is_dir() and path.name != live:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def load(self, user_id: int, columns: Sequence[str]) -> UserColumns | None:
+        """
+        Memory-mapped columns of ``user_id``, or None when the store is off,
+        lacks ``columns`` or is behind the user's latest write.
+        """
+        if not self.enabled or self.root is None:
+            return None
+        user_dir = self.root / str(user_id)
+        try:
+            generation = (user_dir / "CURRENT").read_text()
+            with self._lock:
+                cached = self._open.get(user_id)
+                if cached is not None and cached[0] == generation:
+                    self._open.move_to_end(user_id)
+            if cached is None or cached[0] != generation:
+                cached = (generation, self._map(user_dir / generation))
+                with self._lock:
+                    self._open[user_id] = cached
+                    while len(self._open) > self.max_open_users:
+                        self._open.popitem(last=False)
+        except FileNotFoundError:  # never refreshed, or replaced while opening
+            return None
+
+        snapshot, version = cached[1]
+        if version != response_cache.data_version(user_id) or not set(columns) <= set(
+            snapshot.columns
+        ):
+            self._count("stale")
+            return None
+        self._count("reads")
+        return snapshot
+
+    @staticmethod
+    def _map(gen_dir: Path) -> tuple[UserColumns, str]:
+        manifest = json.loads((gen_dir / "manifest.json").read_text())
+
+        def open_column(name: str) -> np.ndarray:
+            # np.load cannot memory-map an empty array
+            if manifest["rows"] == 0:
+                return np.load(gen_dir / f"{name}.npy")
+            return np.load(gen_dir / f"{name}.npy", mmap_mode="r")
+
+        snapshot = UserColumns(
+            open_column("date"),
+            open_column("outlier_metrics"),
+            {name: open_column(name) for name in manifest["columns"]},
+        )
+        return snapshot, manifest["version"]
+
+    def metrics(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "open_users": len(self._open),
+                **self._counters,
+            }
+
+
+columnar_store = ColumnarStore()
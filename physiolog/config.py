@@ -47,6 +47,116 @@ class BaseConfig:
         "SQLALCHEMY_DATABASE_URI", f"sqlite:///{default_db_path}"
     )
 
+    # Body-composition outlier detection (see services/outliers.py)
+    OUTLIER_WINDOW = int(environ.get("OUTLIER_WINDOW", "15"))
+    OUTLIER_THRESHOLD = float(environ.get("OUTLIER_THRESHOLD", "3.5"))
+    OUTLIER_MIN_HISTORY = int(environ.get("OUTLIER_MIN_HISTORY", "5"))
+
+    # Upper bound on items accepted by POST /api/entries/bulk
+    BULK_ENTRIES_MAX_ROWS = int(environ.get("BULK_ENTRIES_MAX_ROWS", "1000"))
+    # ... by POST /api/workouts/sets
+    BULK_SETS_MAX_ROWS = int(environ.get("BULK_SETS_MAX_ROWS", "2000"))
+    # ... and by POST /api/meals/items
+    BULK_MEAL_ITEMS_MAX_ROWS = int(environ.get("BULK_MEAL_ITEMS_MAX_ROWS", "1000"))
+
+    # Intraday samples (see services/intraday.py): per-request ingest limit and
+    # the most buckets a range read returns
+    INTRADAY_MAX_SAMPLES = int(environ.get("INTRADAY_MAX_SAMPLES", "100000"))
+    INTRADAY_MAX_POINTS = int(environ.get("INTRADAY_MAX_POINTS", "500"))
+
+    # Write-behind recompute queue (see background.py). Set a file path to keep
+    # pending work in SQLite across restarts.
+    BACKGROUND_QUEUE_ENABLED = (
+        environ.get("BACKGROUND_QUEUE_ENABLED", "True").lower() == "true"
+    )
+    BACKGROUND_QUEUE_WORKERS = int(environ.get("BACKGROUND_QUEUE_WORKERS", "2"))
+    BACKGROUND_QUEUE_DURABLE_PATH = environ.get("BACKGROUND_QUEUE_DURABLE_PATH", "")
+
+    # Caches (see cache.py). "memory" (default) is a bounded LRU per process:
+    # the response, principal and admin scope caches stay off with it unless
+    # CACHE_SINGLE_PROCESS says only one process serves requests. With several
+    # workers (gunicorn -w 2) use "sqlite", which shares one cache file between
+    # all workers on the host; put it under /dev/shm to keep it in memory, and
+    # delete it whenever the database is reset.
+    CACHE_BACKEND = environ.get("CACHE_BACKEND", "memory")
+    CACHE_SINGLE_PROCESS = (
+        environ.get("CACHE_SINGLE_PROCESS", "False").lower() == "true"
+    )
+    CACHE_SQLITE_PATH = environ.get(
+        "CACHE_SQLITE_PATH", str(PROJECT_ROOT / "instance" / "cache.sqlite")
+    )
+    CACHE_MAX_ENTRIES = int(environ.get("CACHE_MAX_ENTRIES", "1024"))
+    # Per-user GET response cache
+    RESPONSE_CACHE_ENABLED = (
+        environ.get("RESPONSE_CACHE_ENABLED", "True").lower() == "true"
+    )
+    RESPONSE_CACHE_TTL_S = float(environ.get("RESPONSE_CACHE_TTL_S", "300"))
+    # Authenticated principal returned by the user loader (see principals.py)
+    PRINCIPAL_CACHE_ENABLED = (
+        environ.get("PRINCIPAL_CACHE_ENABLED", "True").lower() == "true"
+    )
+    PRINCIPAL_CACHE_TTL_S = float(environ.get("PRINCIPAL_CACHE_TTL_S", "300"))
+    # Cached client ids per admin, used to resolve the observed client (scope.py)
+    ADMIN_SCOPE_CACHE_TTL_S = float(environ.get("ADMIN_SCOPE_CACHE_TTL_S", "300"))
+
+    # Memory-mapped per-user metric columns read by /api/stats (see
+    # columnar_store.py); refreshed by the recompute queue
+    COLUMNAR_STORE_ENABLED = (
+        environ.get("COLUMNAR_STORE_ENABLED", "False").lower() == "true"
+    )
+    COLUMNAR_STORE_PATH = environ.get(
+        "COLUMNAR_STORE_PATH", str(PROJECT_ROOT / "instance" / "columnar")
+    )
+
+    # Threads computing per-client dispersion/quantiles for
+    # /api/admin/cohort-stats (see cohort.py); 0 or 1 computes them inline
+    COHORT_STATS_WORKERS = int(environ.get("COHORT_STATS_WORKERS", "4"))
+
+    # Bulk client provisioning (POST /api/admin/clients/bulk, provisioning.py).
+    # Every row costs one password hash (~140 ms of scrypt, see
+    # PASSWORD_HASH_METHOD), so 200 rows finish in about 30 s even on a
+    # single hashing thread, inside gunicorn's 60 s timeout. Larger rosters go
+    # through scripts/provision_clients.py, which has no cap.
+    PROVISION_MAX_ROWS = int(environ.get("PROVISION_MAX_ROWS", "200"))
+
+    # Password hashing (see passwords.py). The method uses werkzeug's
+    # generate_password_hash format, e.g. "scrypt:16384:8:1" or
+    # "pbkdf2:sha256:600000"; older hashes are upgraded on the next login.
+    # WORKERS caps concurrent hashes per process, MAX_PENDING the requests
+    # waiting for one; a request waiting longer than WAIT_S gets a 503.
+    # Waiting requests still hold their server worker, so keep MAX_PENDING
+    # well below the worker/thread count to leave room for API requests.
+    PASSWORD_HASH_METHOD = environ.get("PASSWORD_HASH_METHOD", "scrypt")
+    PASSWORD_HASH_WORKERS = int(environ.get("PASSWORD_HASH_WORKERS", "4"))
+    PASSWORD_HASH_MAX_PENDING = int(environ.get("PASSWORD_HASH_MAX_PENDING", "64"))
+    PASSWORD_HASH_WAIT_S = float(environ.get("PASSWORD_HASH_WAIT_S", "5"))
+
+    # Rows fetched per round trip by the streaming client export (export.py)
+    EXPORT_YIELD_PER = int(environ.get("EXPORT_YIELD_PER", "1000"))
+
+    # Admission control for expensive endpoints (see admission.py): token
+    # buckets per user and endpoint class, plus a cap on concurrent admitted
+    # requests; rejected requests get 429 with Retry-After. All of these are
+    # per worker process: under gunicorn -w N the effective limits are N times
+    # the values below.
+    ADMISSION_CONTROL_ENABLED = (
+        environ.get("ADMISSION_CONTROL_ENABLED", "True").lower() == "true"
+    )
+    ADMISSION_MAX_CONCURRENT = int(environ.get("ADMISSION_MAX_CONCURRENT", "16"))
+    ADMISSION_MAX_BUCKETS = int(environ.get("ADMISSION_MAX_BUCKETS", "10000"))
+    # "heavy": /api/entries and /api/stats reads, analytics, admin exports
+    ADMISSION_HEAVY_RATE_PER_S = float(environ.get("ADMISSION_HEAVY_RATE_PER_S", "10"))
+    ADMISSION_HEAVY_BURST = float(environ.get("ADMISSION_HEAVY_BURST", "60"))
+    # "llm": /api/llm-smoke (paid OpenAI calls)
+    ADMISSION_LLM_RATE_PER_S = float(environ.get("ADMISSION_LLM_RATE_PER_S", "0.1"))
+    ADMISSION_LLM_BURST = float(environ.get("ADMISSION_LLM_BURST", "5"))
+
+    # Delta sync (GET /api/entries/changes): tokens are backdated by the overlap
+    # so rows committed while a sync runs are not missed; tokens older than the
+    # tombstone TTL get a full snapshot instead of a delta.
+    SYNC_TOKEN_OVERLAP_S = float(environ.get("SYNC_TOKEN_OVERLAP_S", "5"))
+    SYNC_TOMBSTONE_TTL_DAYS = int(environ.get("SYNC_TOMBSTONE_TTL_DAYS", "90"))
+
     # Automatic creation of initial user at app start
     AUTH_BOOTSTRAP_USER = environ.get("AUTH_BOOTSTRAP_USER", "").strip().lower()
     AUTH_BOOTSTRAP_PASSWORD = environ.get("AUTH_BOOTSTRAP_PASSWORD", "")
@@ -64,6 +174,8 @@ class DevConfig(BaseConfig):
     SECRET_KEY = environ.get("SECRET_KEY", "dev-fallback-key")
     # AUTO_CREATE_DB=False
     AUTO_CREATE_DB = environ.get("AUTO_CREATE_DB", "True").lower() == "true"
+    # flask run serves every request from one process
+    CACHE_SINGLE_PROCESS = environ.get("CACHE_SINGLE_PROCESS", "True").lower() == "true"
 
 
 class StagingConfig(BaseConfig):
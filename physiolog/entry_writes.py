@@ -0,0 +1,367 @@
+"""
+entry_writes.py
+
+Set-based write paths for HealthEntry rows.
+
+The helpers here issue dialect-native Core statements instead of the ORM
+select-then-insert/update pattern: ``INSERT ... ON CONFLICT (user_id, date)
+... RETURNING`` on SQLite (3.35+) and PostgreSQL, and ``UPDATE ... RETURNING``.
+A single entry is written in one round trip, and many entries with one
+executemany. Nothing here commits; the caller owns the transaction. Core
+statements bypass ORM flush events, so every write marks its user for the
+background recompute queue (background.py) explicitly.
+"""
+
+from __future__ import annotations
+
+from datetime import date as Date
+from datetime import timedelta
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+from sqlalchemy import delete, literal_column, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .background import mark_user_dirty
+from .extensions import db
+from .models import EntryTombstone, HealthEntry, utcnow
+from .services.outliers import OUTLIER_METRICS, outlier_metrics_batch
+
+# Columns written from client payloads (see services.entries.build_entry_fields)
+ENTRY_VALUE_COLUMNS: tuple[str, ...] = (
+    "weight_kg",
+    "body_fat_percent",
+    "calories_kcal",
+    "protein_g",
+    "carbs_g",
+    "fat_g",
+    "training_volume_kg",
+    "steps_count",
+    "sleep_hours",
+    "sleep_quality",
+    "observations",
+)
+
+
+def dialect_insert(table):
+    """``insert()`` construct supporting ``on_conflict_*`` for the bound engine."""
+    dialect_name = db.session.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        return postgresql.insert(table)
+    if dialect_name == "sqlite":
+        return sqlite.insert(table)
+    raise RuntimeError(f"Upserts are not supported on the {dialect_name} dialect")
+
+
+def upsert_entries_statement(columns: Sequence[str] = ENTRY_VALUE_COLUMNS):
+    """
+    ``INSERT ... ON CONFLICT (user_id, date) DO UPDATE`` for health entries.
+    Parameters must include ``updated_at`` (column onupdate hooks do not run
+    for the ON CONFLICT branch).
+    """
+    stmt = dialect_insert(HealthEntry.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "date"],
+        set_={name: stmt.excluded[name] for name in (*columns, "updated_at")},
+    )
+
+
+def insert_entry(
+    user_id: int, entry_date: Date, fields: Mapping[str, Any]
+) -> int | None:
+    """
+    Create an entry with one ``INSERT ... ON CONFLICT DO NOTHING RETURNING id``.
+
+    Returns:
+        int | None: The entry id, or None if there is an entry for the date.
+    """
+    table = HealthEntry.__table__
+    values = {"user_id": user_id, "date": entry_date, "updated_at": utcnow(), **fields}
+    stmt = (
+        dialect_insert(table)
+        .values(values)
+        .on_conflict_do_nothing(index_elements=["user_id", "date"])
+    )
+    row = db.session.execute(stmt.returning(table.c.id)).first()
+    if row is None:
+        return None
+    mark_user_dirty(db.session, user_id)
+    return row[0]
+
+
+def update_entry(
+    user_id: int, entry_date: Date, fields: Mapping[str, Any]
+) -> int | None:
+    """
+    Update an existing entry with one ``UPDATE ... RETURNING id``.
+
+    Returns:
+        int | None: The entry id, or None if there is no entry for the date.
+    """
+    table = HealthEntry.__table__
+    stmt = (
+        update(table)
+        .where(table.c.user_id == user_id, table.c.date == entry_date)
+        .values(**fields)
+        .returning(table.c.id)
+    )
+    row = db.session.execute(stmt).first()
+    if row is None:
+        return None
+    mark_user_dirty(db.session, user_id)
+    return row[0]
+
+
+def _inserted_flag(table):
+    """RETURNING expression that is true when an upsert inserted the row."""
+    if db.session.get_bind().dialect.name == "postgresql":
+        # an updated row has the updating transaction's id in xmax
+        return literal_column("xmax = 0")
+    # only an insert sets both from the same statement parameter
+    return table.c.created_at == table.c.updated_at
+
+
+def merge_entry(
+    user_id: int, entry_date: Date, fields: Mapping[str, Any]
+) -> tuple[int, bool]:
+    """
+    Create the entry for the date, or update the existing one, with one
+    ``INSERT ... ON CONFLICT DO UPDATE ... RETURNING id, <inserted>``.
+
+    Returns:
+        tuple[int, bool]: (entry id, True if the entry was created)
+    """
+    table = HealthEntry.__table__
+    now = utcnow()
+    values = {
+        "user_id": user_id,
+        "date": entry_date,
+        "created_at": now,
+        "updated_at": now,
+        **fields,
+    }
+    stmt = upsert_entries_statement(list(fields)).values(values)
+    entry_id, inserted = db.session.execute(
+        stmt.returning(table.c.id, _inserted_flag(table))
+    ).one()
+    mark_user_dirty(db.session, user_id)
+    return entry_id, bool(inserted)
+
+
+def bulk_upsert_entries(
+    user_id: int, rows: Mapping[Date, Mapping[str, Any]]
+) -> dict[Date, str]:
+    """
+    Insert or update one user's entries with a single executemany upsert.
+
+    Args:
+        user_id: Owner of the entries.
+        rows: Entry fields keyed by date (one row per date).
+
+    Returns:
+        dict[date, str]: ``"created"`` or ``"updated"`` per date.
+    """
+    if not rows:
+        return {}
+
+    existing_dates = {
+        row[0]
+        for row in db.session.query(HealthEntry.date).filter(
+            HealthEntry.user_id == user_id,
+            HealthEntry.date.in_(list(rows)),
+        )
+    }
+    now = utcnow()
+    params = [
+        {
+            "user_id": user_id,
+            "date": entry_date,
+            "updated_at": now,
+            **{name: fields.get(name) for name in ENTRY_VALUE_COLUMNS},
+        }
+        for entry_date, fields in rows.items()
+    ]
+    db.session.execute(upsert_entries_statement(), params)
+    mark_user_dirty(db.session, user_id)
+    return {
+        entry_date: "updated" if entry_date in existing_dates else "created"
+        for entry_date in rows
+    }
+
+
+def upsert_entry_columns(user_id: int, rows: Mapping[Date, Mapping[str, Any]]) -> None:
+    """
+    Set derived columns (e.g. rollups) on the user's entries for the given
+    dates, creating entries where missing and leaving other columns untouched.
+    Every row must carry the same column names.
+    """
+    if not rows:
+        return
+    columns = list(next(iter(rows.values())))
+    now = utcnow()
+    params = [
+        {"user_id": user_id, "date": entry_date, "updated_at": now, **values}
+        for entry_date, values in rows.items()
+    ]
+    db.session.execute(upsert_entries_statement(columns), params)
+    mark_user_dirty(db.session, user_id)
+
+
+def _outlier_rows_query(user_id: int):
+    return (
+        db.session.query(
+            HealthEntry.id,
+            HealthEntry.date,
+            HealthEntry.outlier_metrics,
+            *(getattr(HealthEntry, metric) for metric in OUTLIER_METRICS),
+        )
+        .filter(HealthEntry.user_id == user_id)
+        .order_by(HealthEntry.date.asc())
+    )
+
+
+def _write_outlier_flags(
+    user_id: int, rows: Sequence[Any], first_date: Date | None, **detector_kwargs: Any
+) -> int:
+    """
+    Flag ``rows`` (date order, from ``_outlier_rows_query``) in one vectorized
+    pass and write back the changed flags of rows on or after ``first_date``
+    (all rows if None). Returns the number of rows changed.
+    """
+    columns = {
+        metric: np.array([row[3 + i] for row in rows], dtype=float)
+        for i, metric in enumerate(OUTLIER_METRICS)
+    }
+    masks = outlier_metrics_batch(columns, **detector_kwargs)
+    changes = [
+        {"id": row[0], "outlier_metrics": int(mask), "is_outlier": bool(mask)}
+        for row, mask in zip(rows, masks)
+        if (first_date is None or row[1] >= first_date) and row[2] != mask
+    ]
+    if changes:
+        # ORM bulk UPDATE by primary key (executemany)
+        db.session.execute(update(HealthEntry), changes)
+        mark_user_dirty(db.session, user_id)
+    return len(changes)
+
+
+def refresh_user_outlier_flags(
+    user_id: int,
+    *,
+    window: int,
+    threshold: float,
+    min_history: int,
+) -> tuple[int, int]:
+    """
+    Recompute the outlier flags of all of a user's entries in one vectorized
+    pass and write back only the flags that changed.
+
+    Returns:
+        tuple[int, int]: (entries checked, flags changed)
+    """
+    rows = _outlier_rows_query(user_id).all()
+    if not rows:
+        return 0, 0
+    changed = _write_outlier_flags(
+        user_id, rows, None, window=window, threshold=threshold, min_history=min_history
+    )
+    return len(rows), changed
+
+
+def refresh_outlier_flags_near(
+    user_id: int,
+    entry_date: Date,
+    *,
+    window: int,
+    threshold: float,
+    min_history: int,
+) -> int:
+    """
+    Recompute the flags a write (or delete) on ``entry_date`` can change: the
+    entry itself and the next ``window`` readings of each metric, whose
+    history includes it. Loads only the rows from the ``window``-th previous
+    reading of each metric onwards, so the flags written match
+    ``refresh_user_outlier_flags``.
+
+    Returns:
+        int: Number of entries whose flags changed.
+    """
+    start: Date | None = entry_date
+    end: Date | None = entry_date
+    for metric in OUTLIER_METRICS:
+        column = getattr(HealthEntry, metric)
+        readings = db.session.query(HealthEntry.date).filter(
+            HealthEntry.user_id == user_id, column.is_not(None)
+        )
+        previous = (
+            readings.filter(HealthEntry.date < entry_date)
+            .order_by(HealthEntry.date.desc())
+            .offset(window - 1)
+            .limit(1)
+            .scalar()
+        )
+        following = (
+            readings.filter(HealthEntry.date > entry_date)
+            .order_by(HealthEntry.date.asc())
+            .offset(window - 1)
+            .limit(1)
+            .scalar()
+        )
+        # None: fewer than `window` readings that way, take them all
+        start = None if start is None or previous is None else min(start, previous)
+        end = None if end is None or following is None else max(end, following)
+
+    query = _outlier_rows_query(user_id)
+    if start is not None:
+        query = query.filter(HealthEntry.date >= start)
+    if end is not None:
+        query = query.filter(HealthEntry.date <= end)
+    rows = query.all()
+    if not rows:
+        return 0
+    return _write_outlier_flags(
+        user_id,
+        rows,
+        entry_date,
+        window=window,
+        threshold=threshold,
+        min_history=min_history,
+    )
+
+
+def delete_entry(user_id: int, entry_date: Date, *, tombstone_ttl_days: int) -> bool:
+    """
+    Delete an entry and record a tombstone for delta-sync clients.
+    Tombstones older than ``tombstone_ttl_days`` are pruned for the user.
+
+    Returns:
+        bool: False if there was no entry for the date.
+    """
+    table = HealthEntry.__table__
+    row = db.session.execute(
+        delete(table)
+        .where(table.c.user_id == user_id, table.c.date == entry_date)
+        .returning(table.c.id)
+    ).first()
+    if row is None:
+        return False
+
+    now = utcnow()
+    stmt = dialect_insert(EntryTombstone.__table__).values(
+        user_id=user_id, date=entry_date, deleted_at=now
+    )
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "date"],
+            set_={"deleted_at": stmt.excluded.deleted_at},
+        )
+    )
+    db.session.execute(
+        delete(EntryTombstone.__table__).where(
+            EntryTombstone.__table__.c.user_id == user_id,
+            EntryTombstone.__table__.c.deleted_at
+            < now - timedelta(days=tombstone_ttl_days),
+        )
+    )
+    mark_user_dirty(db.session, user_id)
+    return True
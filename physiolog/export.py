@@ -0,0 +1,121 @@
+"""
+export.py
+
+Streaming zip export of every client assigned to an admin
+(``/api/admin/export``): one CSV of health entries per client.
+
+The archive is built while it is being sent. One query reads the entries of
+all clients ordered by (user_id, date) and fetches ``yield_per`` rows at a
+time. The rows go through ``zipfile`` into an unseekable sink, so zipfile
+writes data descriptors instead of seeking back. Whatever the sink holds is
+handed to the response every ``EXPORT_CHUNK_BYTES``. Memory use therefore
+does not grow with the number of entries, and the download starts with the
+first rows.
+
+Settings: EXPORT_YIELD_PER.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import re
+import zipfile
+from typing import Any, Iterator
+
+from sqlalchemy import select
+
+from .entry_writes import ENTRY_VALUE_COLUMNS
+from .extensions import db
+from .models import AdminClientAssignment, HealthEntry, User
+
+EXPORT_COLUMNS: tuple[str, ...] = ("date", *ENTRY_VALUE_COLUMNS, "is_outlier")
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, unseekable buffer drained by the response generator."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+def export_filename(user_id: int, email: str) -> str:
+    """Archive member name of a client's CSV, e.g. ``12-ana_example.com.csv``."""
+    return f"{user_id}-{re.sub(r'[^A-Za-z0-9.-]+', '_', email)}.csv"
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return int(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def iter_clients_export(
+    admin_user_id: int, *, yield_per: int = 1000
+) -> Iterator[bytes]:
+    """
+    Yield the zip archive of the admin's clients in chunks.
+
+    Every assigned client gets a member named by ``export_filename``, with a
+    header row of ``EXPORT_COLUMNS``, even when it has no entries.
+    """
+    clients = db.session.execute(
+        select(User.id, User.email)
+        .join(AdminClientAssignment, AdminClientAssignment.client_user_id == User.id)
+        .where(AdminClientAssignment.admin_user_id == admin_user_id)
+        .order_by(User.id)
+    ).all()
+    rows = iter(
+        db.session.execute(
+            select(
+                HealthEntry.user_id, *(getattr(HealthEntry, c) for c in EXPORT_COLUMNS)
+            )
+            .join(
+                AdminClientAssignment,
+                AdminClientAssignment.client_user_id == HealthEntry.user_id,
+            )
+            .where(AdminClientAssignment.admin_user_id == admin_user_id)
+            .order_by(HealthEntry.user_id, HealthEntry.date)
+            .execution_options(yield_per=yield_per)
+        )
+    )
+    pending = next(rows, None)
+
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for user_id, email in clients:
+            member = archive.open(
+                export_filename(user_id, email), "w", force_zip64=True
+            )
+            with io.TextIOWrapper(member, encoding="utf-8", newline="") as text:
+                writer = csv.writer(text)
+                writer.writerow(EXPORT_COLUMNS)
+                while pending is not None and pending[0] == user_id:
+                    writer.writerow([_csv_value(v) for v in pending[1:]])
+                    pending = next(rows, None)
+                    if sink.size >= EXPORT_CHUNK_BYTES:
+                        yield sink.drain()
+            if sink.size >= EXPORT_CHUNK_BYTES:
+                yield sink.drain()
+    yield sink.drain()
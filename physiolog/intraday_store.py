@@ -0,0 +1,177 @@
+"""
+intraday_store.py
+
+Write and read paths for IntradaySample rows.
+
+Samples are written with one executemany ``INSERT ... ON CONFLICT (user_id,
+metric, ts) DO UPDATE`` (re-sent samples overwrite, so uploads are
+idempotent). Each ingest downsamples the days it touched into the daily
+HealthEntry columns in ``DAILY_AGGREGATES`` (steps_count, sleep_hours), and
+range reads are aggregated into time buckets in SQL. As in entry_writes.py,
+nothing here commits.
+"""
+
+from __future__ import annotations
+
+from typing import Mapping
+
+import numpy as np
+from sqlalchemy import func
+
+from .background import mark_user_dirty
+from .entry_writes import dialect_insert, upsert_entry_columns
+from .extensions import db
+from .models import IntradaySample
+from .services.intraday import (
+    DAILY_AGGREGATES,
+    DAY_S,
+    SLEEP_SAMPLE_INTERVAL_S,
+    SLEEP_STAGES,
+    day_key_to_date,
+    day_keys,
+    day_offset_s,
+    day_ts_range,
+)
+
+
+def ingest_samples(
+    user_id: int, series: Mapping[int, tuple[np.ndarray, np.ndarray]]
+) -> dict[str, list[str]]:
+    """
+    Upsert samples and refresh the daily aggregates of the days they touch.
+
+    Args:
+        series: (ts, values) arrays per metric id, as returned by
+            ``services.intraday.parse_series_payload``.
+
+    Returns:
+        dict[str, list[str]]: ISO dates updated per HealthEntry column.
+    """
+    table = IntradaySample.__table__
+    params = [
+        {"user_id": user_id, "metric": mid, "ts": t, "value": v}
+        for mid, (ts, values) in series.items()
+        for t, v in zip(ts.tolist(), values.tolist())
+    ]
+    if not params:
+        return {}
+    stmt = dialect_insert(table)
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "metric", "ts"],
+            set_={"value": stmt.excluded.value},
+        ),
+        params,
+    )
+    mark_user_dirty(db.session, user_id)  # cached intraday reads are stale now
+
+    updated: dict[str, list[str]] = {}
+    for mid, (ts, _) in series.items():
+        if mid in DAILY_AGGREGATES and len(ts):
+            column = DAILY_AGGREGATES[mid][0]
+            dates = refresh_daily_aggregates(user_id, mid, day_keys(mid, ts))
+            updated[column] = [d.isoformat() for d in dates]
+    return updated
+
+
+def refresh_daily_aggregates(user_id: int, mid: int, keys: np.ndarray) -> list:
+    """
+    Recompute one metric's daily HealthEntry column for the given day keys
+    with a single grouped query, and upsert the results (creating entries for
+    days without one). Other entry columns are left untouched.
+
+    Returns:
+        list[date]: The dates written.
+    """
+    column, how = DAILY_AGGREGATES[mid]
+    day_expr = (IntradaySample.ts + day_offset_s(mid)) // DAY_S
+    if how == "sum":
+        agg = func.sum(IntradaySample.value)
+    else:  # asleep_hours: count of non-awake minutes
+        agg = func.count(IntradaySample.ts).filter(
+            IntradaySample.value != SLEEP_STAGES["awake"]
+        )
+    start, _ = day_ts_range(mid, int(keys.min()))
+    _, end = day_ts_range(mid, int(keys.max()))
+    rows = (
+        db.session.query(day_expr, agg)
+        .filter(
+            IntradaySample.user_id == user_id,
+            IntradaySample.metric == mid,
+            IntradaySample.ts >= start,
+            IntradaySample.ts < end,
+        )
+        .group_by(day_expr)
+        .all()
+    )
+
+    wanted = set(keys.tolist())
+    daily = {}
+    for key, value in rows:
+        if int(key) not in wanted:
+            continue
+        if how == "sum":
+            value = int(round(value))
+        else:
+            value = round(value * SLEEP_SAMPLE_INTERVAL_S / 3_600, 2)
+        daily[day_key_to_date(key)] = {column: value}
+    upsert_entry_columns(user_id, daily)
+    return list(daily)
+
+
+def read_buckets(
+    user_id: int, mid: int, start: int, end: int, bucket_s: int
+) -> dict[str, list]:
+    """
+    Aggregate samples in ``[start, end)`` into ``bucket_s``-wide buckets.
+
+    Returns:
+        dict[str, list]: Columnar points ``ts`` (bucket start), ``min``,
+        ``avg``, ``max``, ``sum`` and ``count``, in time order. Empty buckets
+        are omitted.
+    """
+    bucket_expr = (IntradaySample.ts // bucket_s) * bucket_s
+    rows = (
+        db.session.query(
+            bucket_expr,
+            func.min(IntradaySample.value),
+            func.avg(IntradaySample.value),
+            func.max(IntradaySample.value),
+            func.sum(IntradaySample.value),
+            func.count(IntradaySample.ts),
+        )
+        .filter(
+            IntradaySample.user_id == user_id,
+            IntradaySample.metric == mid,
+            IntradaySample.ts >= start,
+            IntradaySample.ts < end,
+        )
+        .group_by(bucket_expr)
+        .order_by(bucket_expr)
+        .all()
+    )
+    points: dict[str, list] = {
+        "ts": [],
+        "min": [],
+        "avg": [],
+        "max": [],
+        "sum": [],
+        "count": [],
+    }
+    for ts, lo, avg, hi, total, count in rows:
+        points["ts"].append(int(ts))
+        points["min"].append(lo)
+        points["avg"].append(round(float(avg), 2))
+        points["max"].append(hi)
+        points["sum"].append(total)
+        points["count"].append(count)
+    return points
+
+
+def latest_sample_ts(user_id: int, mid: int) -> int | None:
+    """Timestamp of the user's most recent sample of a metric."""
+    return (
+        db.session.query(func.max(IntradaySample.ts))
+        .filter(IntradaySample.user_id == user_id, IntradaySample.metric == mid)
+        .scalar()
+    )
@@ -0,0 +1,127 @@
+"""
+meal_writes.py
+
+Write paths for meal-item logging with incrementally maintained daily macro
+rollups.
+
+Adding items applies their totals to nutrition_day_rollups with one
+``INSERT ... ON CONFLICT DO UPDATE SET x = x + excluded.x`` executemany, and
+the day's rounded totals are mirrored into HealthEntry calories_kcal,
+protein_g, carbs_g and fat_g. The entries and stats endpoints therefore
+keep reading plain entry columns. Once a day has logged items, they
+override the hand-entered daily totals. Deleting an item subtracts it. As
+in entry_writes.py, nothing here commits.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date as Date
+from typing import Sequence
+
+from sqlalchemy import delete, insert, update
+
+from .background import mark_user_dirty
+from .entry_writes import dialect_insert, upsert_entry_columns
+from .extensions import db
+from .models import MealItem, NutritionDayRollup
+from .services.meals import MACRO_COLUMNS, MealItemInput
+
+
+def add_meal_items(user_id: int, items: Sequence[MealItemInput]) -> list[int]:
+    """
+    Insert meal items (one executemany) and add them to the day rollups.
+
+    Returns:
+        list[int]: New item ids, in input order.
+    """
+    if not items:
+        return []
+    item_ids = list(
+        db.session.scalars(
+            insert(MealItem).returning(MealItem.id, sort_by_parameter_order=True),
+            [
+                {
+                    "user_id": user_id,
+                    "date": item.date,
+                    "meal": item.meal,
+                    "name": item.name,
+                    **item.macros(),
+                }
+                for item in items
+            ],
+        )
+    )
+
+    deltas: dict[Date, dict[str, float]] = defaultdict(
+        lambda: dict.fromkeys((*MACRO_COLUMNS, "item_count"), 0)
+    )
+    for item in items:
+        day = deltas[item.date]
+        for column, value in item.macros().items():
+            day[column] += value
+        day["item_count"] += 1
+
+    table = NutritionDayRollup.__table__
+    stmt = dialect_insert(table)
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "date"],
+            set_={
+                column: table.c[column] + stmt.excluded[column]
+                for column in (*MACRO_COLUMNS, "item_count")
+            },
+        ),
+        [{"user_id": user_id, "date": d, **totals} for d, totals in deltas.items()],
+    )
+    _mirror_day_macros(user_id, list(deltas))
+    return item_ids
+
+
+def delete_meal_item(user_id: int, item_id: int) -> bool:
+    """
+    Delete one of the user's meal items and subtract it from its day rollup.
+
+    Returns:
+        bool: False if the item does not exist for this user.
+    """
+    row = db.session.execute(
+        delete(MealItem)
+        .where(MealItem.id == item_id, MealItem.user_id == user_id)
+        .returning(MealItem.date, *(MealItem.__table__.c[c] for c in MACRO_COLUMNS))
+    ).first()
+    if row is None:
+        return False
+
+    table = NutritionDayRollup.__table__
+    day_filter = (table.c.user_id == user_id, table.c.date == row.date)
+    db.session.execute(
+        update(table)
+        .where(*day_filter)
+        .values(
+            item_count=table.c.item_count - 1,
+            **{
+                column: table.c[column] - getattr(row, column)
+                for column in MACRO_COLUMNS
+            },
+        )
+    )
+    db.session.execute(delete(table).where(*day_filter, table.c.item_count <= 0))
+    _mirror_day_macros(user_id, [row.date])
+    mark_user_dirty(db.session, user_id)
+    return True
+
+
+def _mirror_day_macros(user_id: int, dates: Sequence[Date]) -> None:
+    """Copy the day rollups into the entries' macro columns (None once empty)."""
+    totals: dict[Date, dict[str, int | None]] = {
+        d: dict.fromkeys(MACRO_COLUMNS) for d in dates
+    }
+    table = NutritionDayRollup.__table__
+    for row in db.session.execute(
+        table.select().where(table.c.user_id == user_id, table.c.date.in_(dates))
+    ):
+        totals[row.date] = {
+            column: int(round(getattr(row, column))) for column in MACRO_COLUMNS
+        }
+    upsert_entry_columns(user_id, totals)
@@ -25,13 +25,20 @@ name: Jose
 from __future__ import annotations  # python 3.12 uses [type|type]
 
 from datetime import date as Date
+from datetime import datetime, timezone
 
 from flask_login import UserMixin
 from sqlalchemy import UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from werkzeug.security import check_password_hash, generate_password_hash
 
 from .extensions import db
+from .passwords import password_hasher
+from .services.outliers import OUTLIER_BITS, OUTLIER_METRICS
+
+
+def utcnow() -> datetime:
+    """Naive UTC timestamp, as stored in DateTime columns."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 
 def _decimal_hours_to_hhmm(value: float | None) -> str | None:
@@ -89,12 +96,20 @@ class User(UserMixin, db.Model):
     )
 
     def set_password(self, password: str) -> None:
-        """Hash and set the user's password."""
-        self.password_hash = generate_password_hash(password)
+        """Hash and set the user's password (PASSWORD_HASH_METHOD)."""
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password: str) -> bool:
         """Check if the provided password matches the stored hash."""
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def upgrade_password_hash(self, password: str) -> bool:
+        """Re-hash a verified password made with an outdated method or cost."""
+        new_hash = password_hasher.rehash(self.password_hash, password)
+        if new_hash is None:
+            return False
+        self.password_hash = new_hash
+        return True
 
     @property
     def is_active(self) -> bool:
@@ -102,6 +117,20 @@ class User(UserMixin, db.Model):
         return self.is_active_user
 
 
+class UserSearchTerm(db.Model):
+    """
+    Suffix of a user's lower-cased name or email, for indexed substring
+    search on SQLite (see search.py).
+    """
+
+    __tablename__ = "user_search_terms"
+
+    user_id: Mapped[int] = mapped_column(
+        db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    term: Mapped[str] = mapped_column(db.String(32), primary_key=True, index=True)
+
+
 class HealthEntry(db.Model):
     """Database model for daily health tracking entries."""
 
@@ -122,6 +151,8 @@ class HealthEntry(db.Model):
     body_fat_percent: Mapped[float | None] = mapped_column(nullable=True)
     calories_kcal: Mapped[int | None] = mapped_column(nullable=True)
     protein_g: Mapped[int | None] = mapped_column(nullable=True)
+    carbs_g: Mapped[int | None] = mapped_column(nullable=True)
+    fat_g: Mapped[int | None] = mapped_column(nullable=True)
     steps_count: Mapped[int | None] = mapped_column(nullable=True)
     sleep_hours: Mapped[float | None] = mapped_column(nullable=True)
 
@@ -132,6 +163,36 @@ class HealthEntry(db.Model):
     sleep_quality: Mapped[str | None] = mapped_column(db.String(20), nullable=True)
     observations: Mapped[str | None] = mapped_column(db.Text, nullable=True)
 
+    # Set at write time when weight/body fat spike against the user's recent
+    # readings (see services/outliers.py); derived metrics can skip these rows.
+    # outlier_metrics has one OUTLIER_BITS bit per flagged metric, and
+    # is_outlier is set when any bit is.
+    is_outlier: Mapped[bool] = mapped_column(
+        default=False, server_default=db.false(), nullable=False
+    )
+    outlier_metrics: Mapped[int] = mapped_column(
+        default=0, server_default="0", nullable=False
+    )
+
+    # Creation time; NULL for rows written before the column existed
+    created_at: Mapped[datetime | None] = mapped_column(default=utcnow, nullable=True)
+    # Last write time, used by GET /api/entries/changes for delta sync
+    updated_at: Mapped[datetime] = mapped_column(
+        default=utcnow, onupdate=utcnow, nullable=False, index=True
+    )
+
+    def _history_query(self, *, inclusive: bool, exclude_outliers: bool = False):
+        """Entries of the same user before (or up to) this date, newest first."""
+        date_filter = (
+            HealthEntry.date <= self.date if inclusive else HealthEntry.date < self.date
+        )
+        query = HealthEntry.query.filter(
+            HealthEntry.user_id == self.user_id, date_filter
+        )
+        if exclude_outliers:
+            query = query.filter(HealthEntry.is_outlier.is_(False))
+        return query.order_by(HealthEntry.date.desc())
+
     @property
     def fat_mass_kg(self) -> float | None:
         """Derived fat mass from weight and body fat percentage."""
@@ -150,18 +211,17 @@ class HealthEntry(db.Model):
     @property
     def fat_mass_change(self) -> float | None:
         """Difference in fat mass compared with the previous entry for the same user."""
+        return self.get_fat_mass_change()
+
+    def get_fat_mass_change(self, exclude_outliers: bool = False) -> float | None:
+        """``fat_mass_change``, optionally skipping entries flagged as outliers."""
         current_fat_mass = self.fat_mass_kg
-        if current_fat_mass is None:
+        if current_fat_mass is None or (exclude_outliers and self.is_outlier):
             return None
 
-        previous_entry = (
-            HealthEntry.query.filter(
-                HealthEntry.user_id == self.user_id,
-                HealthEntry.date < self.date,
-            )
-            .order_by(HealthEntry.date.desc())
-            .first()
-        )
+        previous_entry = self._history_query(
+            inclusive=False, exclude_outliers=exclude_outliers
+        ).first()
         if previous_entry is None or previous_entry.fat_mass_kg is None:
             return None
 
@@ -178,16 +238,16 @@ class HealthEntry(db.Model):
         estimate the maintenance calories by simply total calories - fat_mass_change * 7700.
         (see maintenance_kcal() )
         """
+        return self.get_fat_mass_change_7d()
+
+    def get_fat_mass_change_7d(self, exclude_outliers: bool = False) -> float | None:
+        """``fat_mass_change_7d``, optionally skipping entries flagged as outliers."""
         current_fat_mass = self.fat_mass_kg
-        if current_fat_mass is None:
+        if current_fat_mass is None or (exclude_outliers and self.is_outlier):
             return None
 
         previous_entries = (
-            HealthEntry.query.filter(
-                HealthEntry.user_id == self.user_id,
-                HealthEntry.date < self.date,
-            )
-            .order_by(HealthEntry.date.desc())
+            self._history_query(inclusive=False, exclude_outliers=exclude_outliers)
             .limit(7)
             .all()
         )
@@ -207,15 +267,7 @@ class HealthEntry(db.Model):
     @property
     def calories_kcal_7d(self) -> float | None:
         """Average calories across the last 7 entries, ignoring missing values."""
-        entries = (
-            HealthEntry.query.filter(
-                HealthEntry.user_id == self.user_id,
-                HealthEntry.date <= self.date,
-            )
-            .order_by(HealthEntry.date.desc())
-            .limit(7)
-            .all()
-        )
+        entries = self._history_query(inclusive=True).limit(7).all()
 
         calories_values = [
             entry.calories_kcal
@@ -237,31 +289,63 @@ class HealthEntry(db.Model):
         Max Wishnofsky, “Caloric equivalents of gained or lost weight,” 
         The American Journal of Clinical Nutrition (1958), DOI: 10.1093/ajcn/6.5.542
         """
+        return self.get_maintenance_kcal()
+
+    def get_maintenance_kcal(
+        self,
+        exclude_outliers: bool = False,
+        *,
+        calories_kcal_7d: float | None = None,
+        fat_mass_change_7d: float | None = None,
+    ) -> int | None:
+        """
+        ``maintenance_kcal``, optionally skipping outliers in the fat-mass trend.
+        Precomputed 7-day values can be passed to avoid re-querying them.
+        """
         # fat energy equivalent
         KCAL_PER_KG_FAT = 7700
 
-        if self.calories_kcal_7d is None or self.fat_mass_change_7d is None:
+        if calories_kcal_7d is None:
+            calories_kcal_7d = self.calories_kcal_7d
+        if fat_mass_change_7d is None:
+            fat_mass_change_7d = self.get_fat_mass_change_7d(exclude_outliers)
+        if calories_kcal_7d is None or fat_mass_change_7d is None:
             return None
 
-        return int(
-            round(self.calories_kcal_7d - (self.fat_mass_change_7d * KCAL_PER_KG_FAT))
-        )
+        return int(round(calories_kcal_7d - (fat_mass_change_7d * KCAL_PER_KG_FAT)))
 
-    def to_dict(self) -> dict[str, object]:
-        """Serialize the entry into JSON-friendly primitives."""
+    def to_dict(self, exclude_outliers: bool = False) -> dict[str, object]:
+        """
+        Serialize the entry into JSON-friendly primitives.
+        With ``exclude_outliers`` the derived fat-mass metrics skip flagged entries.
+        """
+        calories_kcal_7d = self.calories_kcal_7d
+        fat_mass_change_7d = self.get_fat_mass_change_7d(exclude_outliers)
         return {
             "id": self.id,
             "date": self.date.strftime("%Y-%m-%d"),
             "weight_kg": self.weight_kg,
             "body_fat_percent": self.body_fat_percent,
+            "is_outlier": self.is_outlier,
+            "outlier_metrics": [
+                metric
+                for metric in OUTLIER_METRICS
+                if (self.outlier_metrics or 0) & OUTLIER_BITS[metric]
+            ],
             "fat_mass_kg": self.fat_mass_kg,
-            "fat_mass_change": self.fat_mass_change,
-            "fat_mass_change_7d": self.fat_mass_change_7d,
-            "calories_kcal_7d": self.calories_kcal_7d,
-            "maintenance_kcal": self.maintenance_kcal,
+            "fat_mass_change": self.get_fat_mass_change(exclude_outliers),
+            "fat_mass_change_7d": fat_mass_change_7d,
+            "calories_kcal_7d": calories_kcal_7d,
+            "maintenance_kcal": self.get_maintenance_kcal(
+                exclude_outliers,
+                calories_kcal_7d=calories_kcal_7d,
+                fat_mass_change_7d=fat_mass_change_7d,
+            ),
             "lean_mass_kg": self.lean_mass_kg,
             "calories_kcal": self.calories_kcal,
             "protein_g": self.protein_g,
+            "carbs_g": self.carbs_g,
+            "fat_g": self.fat_g,
             "training_volume_kg": self.training_volume_kg,
             "steps_count": self.steps_count,
             "sleep_hours": _decimal_hours_to_hhmm(self.sleep_hours),
@@ -269,3 +353,173 @@ class HealthEntry(db.Model):
             "sleep_quality": self.sleep_quality,
             "observations": self.observations,
         }
+
+
+class EntryTombstone(db.Model):
+    """Marker left behind by a deleted HealthEntry so sync clients can drop it."""
+
+    __tablename__ = "entry_tombstones"
+    __table_args__ = (
+        UniqueConstraint("user_id", "date", name="uix_tombstone_user_date"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        db.ForeignKey("users.id"), nullable=False, index=True
+    )
+    date: Mapped[Date] = mapped_column(nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(
+        default=utcnow, nullable=False, index=True
+    )
+
+
+class IntradaySample(db.Model):
+    """
+    One wearable sample (see services/intraday.py for metric ids and units).
+
+    Keyed by (user_id, metric, ts) so range reads are a primary-key scan; on
+    SQLite the table is stored WITHOUT ROWID to keep minute data compact.
+    """
+
+    __tablename__ = "intraday_samples"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    user_id: Mapped[int] = mapped_column(
+        db.ForeignKey("users.id"), primary_key=True, autoincrement=False
+    )
+    metric: Mapped[int] = mapped_column(
+        db.SmallInteger, primary_key=True, autoincrement=False
+    )
+    ts: Mapped[int] = mapped_column(  # UTC epoch seconds
+        db.BigInteger, primary_key=True, autoincrement=False
+    )
+    value: Mapped[float] = mapped_column(nullable=False)
+
+
+class Workout(db.Model):
+    """A training session; sets are logged against it (see workout_writes.py)."""
+
+    __tablename__ = "workouts"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        db.ForeignKey("users.id"), nullable=False, index=True
+    )
+    date: Mapped[Date] = mapped_column(nullable=False)
+    name: Mapped[str | None] = mapped_column(db.String(100), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=utcnow, nullable=False)
+
+
+class WorkoutSet(db.Model):
+    """
+    One set of an exercise. ``user_id`` and ``date`` are copied from the
+    workout so rollup maintenance never needs a join.
+    """
+
+    __tablename__ = "workout_sets"
+    __table_args__ = (
+        db.Index("ix_workout_sets_user_exercise_date", "user_id", "exercise", "date"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    workout_id: Mapped[int] = mapped_column(
+        db.ForeignKey("workouts.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    user_id: Mapped[int] = mapped_column(db.ForeignKey("users.id"), nullable=False)
+    date: Mapped[Date] = mapped_column(nullable=False)
+    exercise: Mapped[str] = mapped_column(db.String(100), nullable=False)
+    reps: Mapped[int] = mapped_column(nullable=False)
+    load_kg: Mapped[float] = mapped_column(nullable=False)
+    e1rm_kg: Mapped[float | None] = mapped_column(nullable=True)
+
+
+class TrainingDayRollup(db.Model):
+    """
+    Running set totals per day; ``volume_kg`` is mirrored (rounded) into
+    HealthEntry.training_volume_kg.
+    """
+
+    __tablename__ = "training_day_rollups"
+
+    user_id: Mapped[int] = mapped_column(db.ForeignKey("users.id"), primary_key=True)
+    date: Mapped[Date] = mapped_column(primary_key=True)
+    volume_kg: Mapped[float] = mapped_column(default=0.0, nullable=False)
+    set_count: Mapped[int] = mapped_column(default=0, nullable=False)
+
+
+class ExerciseWeeklyRollup(db.Model):
+    """Per-exercise weekly volume and best estimated 1RM for progression charts."""
+
+    __tablename__ = "exercise_weekly_rollups"
+
+    user_id: Mapped[int] = mapped_column(db.ForeignKey("users.id"), primary_key=True)
+    exercise: Mapped[str] = mapped_column(db.String(100), primary_key=True)
+    week_start: Mapped[Date] = mapped_column(primary_key=True)
+    volume_kg: Mapped[float] = mapped_column(default=0.0, nullable=False)
+    set_count: Mapped[int] = mapped_column(default=0, nullable=False)
+    best_e1rm_kg: Mapped[float | None] = mapped_column(nullable=True)
+
+
+class MealItem(db.Model):
+    """One logged food item; rolled up per day by meal_writes.py."""
+
+    __tablename__ = "meal_items"
+    __table_args__ = (db.Index("ix_meal_items_user_date", "user_id", "date"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(db.ForeignKey("users.id"), nullable=False)
+    date: Mapped[Date] = mapped_column(nullable=False)
+    meal: Mapped[str | None] = mapped_column(db.String(50), nullable=True)
+    name: Mapped[str] = mapped_column(db.String(200), nullable=False)
+    calories_kcal: Mapped[float] = mapped_column(default=0.0, nullable=False)
+    protein_g: Mapped[float] = mapped_column(default=0.0, nullable=False)
+    carbs_g: Mapped[float] = mapped_column(default=0.0, nullable=False)
+    fat_g: Mapped[float] = mapped_column(default=0.0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(default=utcnow, nullable=False)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "date": self.date.isoformat(),
+            "meal": self.meal,
+            "name": self.name,
+            "calories_kcal": round(self.calories_kcal, 1),
+            "protein_g": round(self.protein_g, 1),
+            "carbs_g": round(self.carbs_g, 1),
+            "fat_g": round(self.fat_g, 1),
+        }
+
+
+class NutritionDayRollup(db.Model):
+    """
+    Running meal-item totals per day, mirrored (rounded) into the day's
+    HealthEntry calories_kcal / protein_g / carbs_g / fat_g.
+    """
+
+    __tablename__ = "nutrition_day_rollups"
+
+    user_id: Mapped[int] = mapped_column(db.ForeignKey("users.id"), primary_key=True)
+    date: Mapped[Date] = mapped_column(primary_key=True)
+    calories_kcal: Mapped[float] = mapped_column(default=0.0, nullable=False)
+    protein_g: Mapped[float] = mapped_column(default=0.0, nullable=False)
+    carbs_g: Mapped[float] = mapped_column(default=0.0, nullable=False)
+    fat_g: Mapped[float] = mapped_column(default=0.0, nullable=False)
+    item_count: Mapped[int] = mapped_column(default=0, nullable=False)
+
+
+class UserSummary(db.Model):
+    """
+    Per-user entry totals, refreshed in the same transaction as every write
+    to the user's entries (see summaries.py). Read by the clients page and
+    by window resolution instead of aggregating health_entries.
+    """
+
+    __tablename__ = "user_summaries"
+
+    user_id: Mapped[int] = mapped_column(
+        db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    entry_count: Mapped[int] = mapped_column(default=0, nullable=False)
+    first_entry_date: Mapped[Date | None] = mapped_column(nullable=True)
+    last_entry_date: Mapped[Date | None] = mapped_column(nullable=True)
+    last_write_at: Mapped[datetime | None] = mapped_column(nullable=True)
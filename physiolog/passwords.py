@@ -0,0 +1,172 @@
+"""
+passwords.py
+
+Password hashing with a configurable KDF, on a bounded worker pool.
+
+Method and cost come from PASSWORD_HASH_METHOD, in werkzeug's
+``generate_password_hash`` format: ``"scrypt"`` (werkzeug's default,
+``scrypt:32768:8:1``), ``"scrypt:16384:8:1"``, ``"pbkdf2:sha256:600000"``
+and so on. Stored hashes carry their own parameters, so they keep verifying
+after the setting changes. ``needs_rehash`` tells the login view to re-hash a
+password with the current parameters once it is known to be correct.
+
+Hashes are computed on a pool of PASSWORD_HASH_WORKERS threads. hashlib
+releases the GIL, so those threads use several cores, and no more than that
+many KDFs run at once in a process. At most PASSWORD_HASH_MAX_PENDING further
+requests may wait for a thread. A request that cannot get a slot within
+PASSWORD_HASH_WAIT_S raises ``PasswordHashBusy``, and the views answer 503
+with Retry-After.
+
+The cap bounds CPU concurrency only, not worker occupancy. ``hash`` and
+``verify`` block the calling request worker until its hash is done, so a
+login storm can still park up to PASSWORD_HASH_WORKERS +
+PASSWORD_HASH_MAX_PENDING request workers here, each for up to
+PASSWORD_HASH_WAIT_S plus one KDF. Lower PASSWORD_HASH_MAX_PENDING (0 turns
+away everything beyond the running hashes) to keep more of the server's
+workers free for API requests.
+
+Bulk hashing (``hash_many``) does not use those slots. It has its own
+PASSWORD_HASH_WORKERS slots and waits for them, so it keeps at most one task
+per thread in the pool. A login during a bulk import waits behind at most one
+round of bulk hashes and is never turned away because of it.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Sequence
+
+from flask import Flask
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHashBusy(RuntimeError):
+    """No hashing slot became free within PASSWORD_HASH_WAIT_S."""
+
+
+class PasswordHasher:
+    """Bounded pool for ``generate_password_hash``/``check_password_hash``."""
+
+    def __init__(self) -> None:
+        self.method = "scrypt"
+        self.workers = 4
+        self.max_pending = 64
+        self.wait_s = 5.0
+        self._executor: ThreadPoolExecutor | None = None
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_pending)
+        self._bulk_slots = threading.BoundedSemaphore(self.workers)
+        self._prefixes: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hashed": 0, "verified": 0, "rehashed": 0, "rejected": 0}
+
+    def init_app(self, app: Flask) -> None:
+        self.method = app.config.get("PASSWORD_HASH_METHOD", "scrypt")
+        self.workers = max(1, int(app.config.get("PASSWORD_HASH_WORKERS", 4)))
+        self.max_pending = max(0, int(app.config.get("PASSWORD_HASH_MAX_PENDING", 64)))
+        self.wait_s = float(app.config.get("PASSWORD_HASH_WAIT_S", 5))
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            self._slots = threading.BoundedSemaphore(self.workers + self.max_pending)
+            self._bulk_slots = threading.BoundedSemaphore(self.workers)
+
+    @property
+    def retry_after_s(self) -> int:
+        """Retry-After seconds suggested to requests turned away as busy."""
+        return max(1, math.ceil(self.wait_s))
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def _submit(self, fn: Callable[..., Any], *args: Any, bulk: bool = False) -> Future:
+        slots = self._bulk_slots if bulk else self._slots
+        if not slots.acquire(timeout=None if bulk else self.wait_s):
+            self._count("rejected")
+            raise PasswordHashBusy("password hashing is busy, retry shortly")
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="physiolog-hash"
+                )
+            executor = self._executor
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def hash(self, password: str) -> str:
+        """
+        Hash with the configured method (may raise ``PasswordHashBusy``).
+
+        Blocks the caller while it waits for a slot and for the hash.
+        """
+        future = self._submit(generate_password_hash, password, self.method)
+        password_hash = future.result()
+        self._count("hashed")
+        return password_hash
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        """
+        Check ``password`` against a stored hash (may raise ``PasswordHashBusy``).
+
+        Blocks the caller while it waits for a slot and for the check.
+        """
+        ok = self._submit(check_password_hash, password_hash, password).result()
+        self._count("verified")
+        return ok
+
+    def hash_many(self, passwords: Sequence[str]) -> list[str]:
+        """
+        Hashes of ``passwords``, in order (e.g. bulk provisioning).
+
+        Waits for its own slots instead of giving up; interactive hashing
+        keeps all of ``hash``/``verify``'s slots (see module docstring).
+        """
+        futures = [
+            self._submit(generate_password_hash, password, self.method, bulk=True)
+            for password in passwords
+        ]
+        hashes = [future.result() for future in futures]
+        self._count("hashed", len(hashes))
+        return hashes
+
+    def _method_prefix(self) -> str:
+        # "scrypt" -> "scrypt:32768:8:1": what werkzeug writes before the salt
+        method = self.method
+        prefix = self._prefixes.get(method)
+        if prefix is None:
+            prefix = generate_password_hash("", method).split("$", 1)[0]
+            self._prefixes[method] = prefix
+        return prefix
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Whether ``password_hash`` was made with other method or parameters."""
+        return password_hash.split("$", 1)[0] != self._method_prefix()
+
+    def rehash(self, password_hash: str, password: str) -> str | None:
+        """New hash of a verified ``password`` if ``needs_rehash``, else None."""
+        if not self.needs_rehash(password_hash):
+            return None
+        new_hash = self.hash(password)
+        self._count("rehashed")
+        return new_hash
+
+    def metrics(self) -> dict[str, object]:
+        method = self._method_prefix()
+        with self._lock:
+            return {
+                "method": method,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                **self._counters,
+            }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,130 @@
+"""
+principals.py
+
+Cached authenticated principal for the Flask-Login user loader.
+
+``load_user`` runs on every authenticated request. Instead of loading the
+``User`` row each time, it returns a ``Principal``: a small detached copy of
+the fields that request handling and templates read (id, email, name,
+is_admin, is_active_user, has_subscription). Principals are cached in the
+cache backend (cache.py) under the user's auth version. A committed change to
+the ``User`` row bumps that version (``on_accounts_committed`` in
+background.py), so new passwords, names and admin or subscription flags take
+effect on the next request. That holds across gunicorn workers only with a
+shared backend (CACHE_BACKEND=sqlite). With the per-process memory backend
+the cache stays off unless CACHE_SINGLE_PROCESS is set, and every request
+loads the ``User`` row.
+
+A principal is not an ORM object. Code that reads other columns or changes
+the account loads the row with ``user_row``.
+
+Settings: PRINCIPAL_CACHE_ENABLED, PRINCIPAL_CACHE_TTL_S.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+
+from flask import Flask
+from flask_login import UserMixin
+
+from .background import on_accounts_committed
+from .cache import MISSING, CacheBackend, MemoryBackend, coherent_across_workers
+from .extensions import db
+from .models import User
+
+
+@dataclass(eq=False)  # keep UserMixin's id-based equality
+class Principal(UserMixin):
+    """Detached, read-only view of a ``User`` for the current session."""
+
+    id: int
+    email: str
+    name: str | None
+    is_admin: bool
+    is_active_user: bool
+    has_subscription: bool
+
+    @property
+    def is_active(self) -> bool:
+        """Return whether the user is active."""
+        return self.is_active_user
+
+    @classmethod
+    def from_user(cls, user: User) -> Principal:
+        return cls(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            is_admin=user.is_admin,
+            is_active_user=user.is_active_user,
+            has_subscription=user.has_subscription,
+        )
+
+
+def user_row(user: User | Principal) -> User:
+    """The ORM row behind ``user`` (e.g. ``current_user``), loading it if needed."""
+    if isinstance(user, User):
+        return user
+    row = db.session.get(User, user.id)
+    if row is None:
+        raise LookupError(f"user {user.id} no longer exists")
+    return row
+
+
+class PrincipalCache:
+    """Version-invalidated cache of ``Principal`` objects (see module docstring)."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.ttl_s = 300.0
+        self.backend: CacheBackend = MemoryBackend()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def init_app(self, app: Flask, backend: CacheBackend) -> None:
+        self.enabled = app.config.get(
+            "PRINCIPAL_CACHE_ENABLED", True
+        ) and coherent_across_workers(app.config, backend, "Principal cache")
+        self.ttl_s = float(app.config.get("PRINCIPAL_CACHE_TTL_S", 300))
+        self.backend = backend
+        on_accounts_committed(self.invalidate)
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def _key(self, user_id: int) -> str:
+        version = self.backend.version(f"auth:{user_id}")
+        return f"principal|{user_id}|v{version}"
+
+    def load(self, user_id: int) -> User | Principal | None:
+        """Principal for ``user_id`` (the ORM row when the cache is off)."""
+        if not self.enabled:
+            return db.session.get(User, user_id)
+        key = self._key(user_id)
+        principal = self.backend.get(key)
+        if principal is not MISSING:
+            self._count("hits")
+            return principal
+        self._count("misses")
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        principal = Principal.from_user(user)
+        self.backend.set(key, principal, self.ttl_s)
+        return principal
+
+    def invalidate(self, user_ids) -> None:
+        """Drop cached principals of these users (bumps their auth versions)."""
+        for user_id in user_ids:
+            self.backend.bump_version(f"auth:{user_id}")
+        self._count("invalidations", len(user_ids))
+
+    def metrics(self) -> dict[str, object]:
+        with self._lock:
+            return {"enabled": self.enabled, **self._counters}
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,144 @@
+"""
+provisioning.py
+
+Bulk creation of client accounts assigned to an admin
+(``POST /api/admin/clients/bulk`` and scripts/provision_clients.py).
+
+Rows are validated first, and every problem is reported against its row
+instead of failing the whole roster. Emails repeated in the roster or
+already registered are conflicts. Existing accounts are never assigned by
+email. Passwords of the remaining rows are hashed on the worker pool
+(passwords.py). Users and assignments are then written with batched
+multi-row INSERTs. New accounts are reported to the session (search terms,
+principal cache) and the admin's cached client ids are invalidated on
+commit. The caller commits.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from .background import mark_account_dirty
+from .models import AdminClientAssignment, User
+from .passwords import password_hasher
+from .scope import mark_assignments_dirty
+
+BATCH_SIZE = 500
+ROSTER_COLUMNS = ("email", "name", "password")
+
+
+def parse_roster_csv(text: str) -> list[dict[str, str]]:
+    """Rows of a CSV roster with an ``email,name,password`` header (any order)."""
+    reader = csv.DictReader(io.StringIO(text))
+    if reader.fieldnames is None:
+        return []
+    header = [(name or "").strip().lower() for name in reader.fieldnames]
+    if "email" not in header:
+        raise ValueError("CSV header must include an email column")
+    reader.fieldnames = header
+    return [
+        {column: (row.get(column) or "") for column in ROSTER_COLUMNS} for row in reader
+    ]
+
+
+def _validate(item: Any) -> tuple[str, str | None, str]:
+    """(email, name, password) of a roster item, or ValueError."""
+    if not isinstance(item, dict):
+        raise ValueError("Invalid user")
+    email = str(item.get("email") or "").strip().lower()
+    name = str(item.get("name") or "").strip() or None
+    password = str(item.get("password") or "")
+    if not email or "@" not in email or len(email) > 120:
+        raise ValueError("A valid email is required")
+    if name is not None and len(name) > 100:
+        raise ValueError("name must be at most 100 characters")
+    if not password:
+        raise ValueError("password is required")
+    return email, name, password
+
+
+def _batches(values: Sequence, size: int) -> Iterable[Sequence]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def provision_clients(
+    session: Session, admin_user_id: int, items: Sequence[Any]
+) -> list[dict[str, Any]]:
+    """
+    Create the users in ``items`` and assign them to the admin (no commit).
+
+    Returns:
+        list[dict]: one result per item, in order:
+        ``{"index": 0, "email": ..., "status": "created", "user_id": 7}``, or
+        ``"status": "conflict"``/``"error"`` with an ``"error"`` message.
+    """
+    results: list[dict[str, Any]] = [{} for _ in items]
+    valid: dict[str, tuple[int, str | None, str]] = {}
+    for index, item in enumerate(items):
+        try:
+            email, name, password = _validate(item)
+        except ValueError as exc:
+            results[index] = {"index": index, "status": "error", "error": str(exc)}
+            continue
+        if email in valid:
+            results[index] = {
+                "index": index,
+                "email": email,
+                "status": "conflict",
+                "error": "Duplicate email in request",
+            }
+            continue
+        valid[email] = (index, name, password)
+
+    emails = list(valid)
+    for batch in _batches(emails, BATCH_SIZE):
+        for email in session.scalars(select(User.email).where(User.email.in_(batch))):
+            index = valid.pop(email)[0]
+            results[index] = {
+                "index": index,
+                "email": email,
+                "status": "conflict",
+                "error": "Email already registered",
+            }
+
+    new_rows = list(valid.items())
+    hashes = password_hasher.hash_many([password for _, (_, _, password) in new_rows])
+    user_rows = [
+        {"email": email, "name": name, "password_hash": password_hash}
+        for (email, (_, name, _)), password_hash in zip(new_rows, hashes)
+    ]
+    user_ids: dict[str, int] = {}
+    for batch in _batches(user_rows, BATCH_SIZE):
+        user_ids.update(
+            (email, user_id)
+            for user_id, email in session.execute(
+                insert(User).returning(User.id, User.email), list(batch)
+            )
+        )
+    for batch in _batches(list(user_ids.values()), BATCH_SIZE):
+        session.execute(
+            insert(AdminClientAssignment),
+            [
+                {"admin_user_id": admin_user_id, "client_user_id": user_id}
+                for user_id in batch
+            ],
+        )
+
+    for email, user_id in user_ids.items():
+        mark_account_dirty(session, user_id)
+        index = valid[email][0]
+        results[index] = {
+            "index": index,
+            "email": email,
+            "status": "created",
+            "user_id": user_id,
+        }
+    if user_ids:
+        mark_assignments_dirty(session, admin_user_id)
+    return results
@@ -6,21 +6,74 @@ It defines the API routes for the PhySioLog Flask application.
 Author: Jose Guzman, sjm.guzman<at>gmail.com
 """
 
+import csv
+import time
 from datetime import date, datetime, timedelta
 
-from flask import Blueprint, Response, jsonify, request, session
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+)
 from flask_login import current_user, login_required
-from sqlalchemy.exc import IntegrityError
-
+from sqlalchemy import func
+
+from .admission import admission_control
+from .background import recompute_queue
+from .cache import response_cache
+from .cohort import cohort_averages, cohort_detailed_stats, cohort_trends
+from .columnar_store import columnar_store
+from .entry_writes import (
+    bulk_upsert_entries,
+    delete_entry,
+    insert_entry,
+    merge_entry,
+    refresh_outlier_flags_near,
+    refresh_user_outlier_flags,
+    update_entry,
+)
+from .export import iter_clients_export
 from .extensions import db
-from .models import AdminClientAssignment, HealthEntry, User
+from .intraday_store import ingest_samples, latest_sample_ts, read_buckets
+from .meal_writes import add_meal_items, delete_meal_item
+from .models import (
+    EntryTombstone,
+    ExerciseWeeklyRollup,
+    HealthEntry,
+    MealItem,
+    User,
+    utcnow,
+)
+from .passwords import PasswordHashBusy, password_hasher
+from .principals import Principal, principal_cache, user_row
+from .provisioning import parse_roster_csv, provision_clients
+from .scope import assignment_cache, current_scope
 from .services import (
+    METRICS,
+    MealItemInput,
+    SetInput,
     build_entry_fields,
-    compute_stats,
+    choose_bucket_s,
+    columns_from_rows,
+    compute_stats_columnar,
+    decode_sync_token,
+    encode_sync_token,
+    mask_outliers,
+    metric_id,
+    normalize_exercise,
     parse_entry_date_required,
+    parse_meal_item,
     parse_optional_sleep_total_hhmm,
+    parse_series_payload,
+    parse_set_item,
     run_smoke_test,
+    to_epoch_s,
 )
+from .summaries import last_entry_date
+from .workout_writes import add_sets, delete_set
 
 api_bp = Blueprint("api", __name__, url_prefix="/api")
 
@@ -76,31 +129,282 @@ def resolve_days_from_query(days_param: int | None, window: str) -> int | None:
     return None
 
 
-def get_effective_user() -> User:
-    """Return the user whose data should be exposed to the current session."""
-    if not current_user.is_admin:
-        return current_user
+def parse_flag(value: str | None) -> bool:
+    """Interpret a query-string flag such as ?dispersion=1 or ?dispersion=true."""
+    return (value or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def parse_quantiles_param(raw: str) -> tuple[float, ...]:
+    """Parse ?quantiles=0.25,0.5,0.75 into a tuple of floats in [0, 1]."""
+    if not raw.strip():
+        return ()
+    try:
+        values = tuple(float(part) for part in raw.split(",") if part.strip())
+    except ValueError as exc:
+        raise ValueError("quantiles must be comma-separated numbers in [0, 1]") from exc
+    if any(not 0.0 <= q <= 1.0 for q in values):
+        raise ValueError("quantiles must be comma-separated numbers in [0, 1]")
+    return values
+
+
+def parse_prefer_header() -> set[str]:
+    """Return the preferences of an RFC 7240 `Prefer` header ({"return=minimal"})."""
+    raw = request.headers.get("Prefer", "")
+    return {
+        token.strip().lower().replace(" ", "")
+        for token in raw.replace(";", ",").split(",")
+        if token.strip()
+    }
 
-    selected_user_id = session.get("selected_user_id")
-    if selected_user_id is None:
+
+def outlier_detector_settings() -> dict[str, float | int]:
+    """Outlier detector parameters from the app config (see config.py)."""
+    return {
+        "window": current_app.config.get("OUTLIER_WINDOW", 15),
+        "threshold": current_app.config.get("OUTLIER_THRESHOLD", 3.5),
+        "min_history": current_app.config.get("OUTLIER_MIN_HISTORY", 5),
+    }
+
+
+def get_effective_user() -> User | Principal:
+    """
+    Return the user whose data should be exposed to the current session.
+    This may be the cached principal; use ``user_row`` for other columns.
+    """
+    scope = current_scope()
+    if scope.selected_client_id is None:
         return current_user
+    return principal_cache.load(scope.selected_client_id) or current_user
+
+
+def effective_user_id() -> int:
+    """The user whose data the current session sees (no query)."""
+    return current_scope().user_id
+
+
+@api_bp.route("/metrics", methods=["GET"])
+@login_required
+def metrics() -> Response | tuple[Response, int]:
+    """
+    Admin-only runtime metrics for monitoring.
+
+    Response:
+        200 OK
+        {"success": true,
+         "background_queue": {"depth": 0, "last_lag_s": 0.012, ...},
+         "response_cache": {"hits": 120, "misses": 14, "hit_ratio": 0.896, ...},
+         "columnar_store": {"reads": 80, "stale": 3, "refreshes": 12, ...},
+         "principal_cache": {"hits": 950, "misses": 12, "invalidations": 3, ...},
+         "password_hasher": {"method": "scrypt:32768:8:1", "rejected": 0, ...},
+         "admission_control": {"in_flight": 2, "admitted": 4100, ...}}
+        403 Forbidden:
+            Current user is not an admin.
+    """
+    if not current_user.is_admin:
+        return jsonify({"success": False, "error": "Admin access required"}), 403
+    return jsonify(
+        {
+            "success": True,
+            "background_queue": recompute_queue.metrics(),
+            "response_cache": response_cache.metrics(),
+            "columnar_store": columnar_store.metrics(),
+            "principal_cache": principal_cache.metrics(),
+            "password_hasher": password_hasher.metrics(),
+            "admission_control": admission_control.metrics(),
+        }
+    )
+
+
+@api_bp.route("/admin/cohort-stats", methods=["GET"])
+@login_required
+@admission_control.admit("heavy")
+def cohort_stats() -> Response | tuple[Response, int]:
+    """
+    Admin-only statistics for every assigned client (see cohort.py).
+
+    Optional query parameters:
+        days / window: per-client window ending at the client's latest entry,
+            as in /api/stats
+        dispersion, quantiles: as in /api/stats (computed per client on the
+            cohort thread pool)
+        exclude_outliers (bool): ignore weight/body fat of flagged entries
+
+    Response:
+        200 OK
+        {"success": true, "window": "30d", "window_days": 30,
+         "clients": [{"user_id": 3, "email": "...", "name": "...",
+                      "start_date": "2026-02-01", "end_date": "2026-02-25",
+                      "stats": {"avg_weight": 72.1, ..., "total_entries": 21},
+                      "latest": {"weight_kg": 71.0, "weight_kg_date": "2026-02-25",
+                                 "fat_mass_kg": 12.8, "fat_mass_kg_date": "2026-02-25"},
+                      "change_7d": {"weight_kg": -0.4, "weight_kg_since": "2026-02-18",
+                                    "fat_mass_kg": null, "fat_mass_kg_since": null}}]}
+        Clients without entries in the window have null dates and stats.
+        403 Forbidden:
+            Current user is not an admin.
+    """
+    if not current_user.is_admin:
+        return jsonify({"success": False, "error": "Admin access required"}), 403
 
-    selected_user = (
-        db.session.query(User)
-        .join(
-            AdminClientAssignment,
-            AdminClientAssignment.client_user_id == User.id,
+    days_param = request.args.get("days", type=int)
+    window = request.args.get("window", default="", type=str).lower().strip()
+    dispersion = parse_flag(request.args.get("dispersion"))
+    exclude_outliers = parse_flag(request.args.get("exclude_outliers"))
+    try:
+        days = resolve_days_from_query(days_param, window)
+        quantiles = parse_quantiles_param(request.args.get("quantiles", default=""))
+    except ValueError as exc:
+        return jsonify({"success": False, "error": str(exc)}), 400
+
+    client_ids = assignment_cache.client_ids(current_user.id)
+    if dispersion or quantiles:
+        stats_by_user = cohort_detailed_stats(
+            client_ids,
+            days,
+            dispersion=dispersion,
+            quantiles=quantiles,
+            exclude_outliers=exclude_outliers,
         )
-        .filter(
-            AdminClientAssignment.admin_user_id == current_user.id,
-            User.id == selected_user_id,
+    else:
+        stats_by_user = cohort_averages(
+            client_ids, days, exclude_outliers=exclude_outliers
+        )
+    trends_by_user = cohort_trends(client_ids, exclude_outliers=exclude_outliers)
+
+    clients = []
+    for user_id, email, name in db.session.execute(
+        db.select(User.id, User.email, User.name)
+        .where(User.id.in_(client_ids))
+        .order_by(func.coalesce(User.name, ""), User.email, User.id)
+    ):
+        stats_row = stats_by_user.get(user_id)
+        trend = trends_by_user.get(user_id, {})
+        clients.append(
+            {
+                "user_id": user_id,
+                "email": email,
+                "name": name,
+                "start_date": (
+                    stats_row["start_date"].isoformat() if stats_row else None
+                ),
+                "end_date": stats_row["end_date"].isoformat() if stats_row else None,
+                "stats": stats_row["stats"] if stats_row else None,
+                "latest": trend.get("latest"),
+                "change_7d": trend.get("change_7d"),
+            }
         )
-        .first()
+
+    return jsonify(
+        {
+            "success": True,
+            "window": window or "all",
+            "window_days": days,
+            "clients": clients,
+        }
+    )
+
+
+@api_bp.route("/admin/clients/bulk", methods=["POST"])
+@login_required
+def clients_bulk() -> Response | tuple[Response, int]:
+    """
+    Create client accounts assigned to the current admin (see provisioning.py).
+
+    Expected body, either JSON:
+        {"users": [{"email": "ana@example.com", "name": "Ana", "password": "..."}, ...]}
+    or a ``text/csv`` roster with an ``email,name,password`` header.
+
+    Responses:
+        200 OK:
+        {
+            "success": true,
+            "summary": {"created": 120, "conflicts": 2, "errors": 1},
+            "results": [{"index": 0, "email": "ana@example.com", "status": "created",
+                         "user_id": 7},
+                        {"index": 4, "email": "bo@example.com", "status": "conflict",
+                         "error": "Email already registered"},
+                        ...]
+        }
+        Conflicting and invalid rows are reported per row and do not block
+        the others.
+        400 Bad Request:
+            Invalid body, missing roster, more than PROVISION_MAX_ROWS rows
+            (use scripts/provision_clients.py for those) or database error.
+        403 Forbidden:
+            Current user is not an admin.
+    """
+    if not current_user.is_admin:
+        return jsonify({"success": False, "error": "Admin access required"}), 403
+
+    if request.mimetype == "text/csv":
+        try:
+            items = parse_roster_csv(request.get_data(as_text=True))
+        except (ValueError, csv.Error) as exc:
+            return jsonify({"success": False, "error": str(exc)}), 400
+    else:
+        payload = parse_json_object_payload()
+        if isinstance(payload, tuple):
+            return payload
+        items = payload.get("users")
+    if not isinstance(items, list) or not items:
+        return (
+            jsonify({"success": False, "error": "users must be a non-empty list"}),
+            400,
+        )
+    max_rows = current_app.config.get("PROVISION_MAX_ROWS", 200)
+    if len(items) > max_rows:
+        return jsonify(
+            {
+                "success": False,
+                "error": f"at most {max_rows} users per request; "
+                "use scripts/provision_clients.py for larger rosters",
+            }
+        ), 400
+
+    try:
+        results = provision_clients(db.session, current_user.id, items)
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(exc)}), 400
+
+    summary = {"created": 0, "conflicts": 0, "errors": 0}
+    summary_keys = {"created": "created", "conflict": "conflicts"}
+    for result in results:
+        summary[summary_keys.get(result["status"], "errors")] += 1
+    return jsonify({"success": True, "summary": summary, "results": results}), 200
+
+
+@api_bp.route("/admin/export", methods=["GET"])
+@login_required
+@admission_control.admit("heavy")
+def clients_export() -> Response | tuple[Response, int]:
+    """
+    Admin-only zip of every assigned client's health entries (see export.py).
+
+    Response:
+        200 OK, application/zip streamed while it is built; one
+        ``<user id>-<email>.csv`` per client
+        403 Forbidden:
+            Current user is not an admin.
+    """
+    if not current_user.is_admin:
+        return jsonify({"success": False, "error": "Admin access required"}), 403
+    filename = f"physiolog-clients-{utcnow():%Y%m%d}.zip"
+    return Response(
+        stream_with_context(
+            iter_clients_export(
+                current_user.id,
+                yield_per=current_app.config.get("EXPORT_YIELD_PER", 1000),
+            )
+        ),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
-    return selected_user or current_user
 
 
 @api_bp.route("/llm-smoke", methods=["GET"])
+@admission_control.admit("llm")
 def llm_smoke() -> Response | tuple[Response, int]:
     """
     OpenAI API smoke test route to verify connectivity and basic functionality.
@@ -119,8 +423,10 @@ def llm_smoke() -> Response | tuple[Response, int]:
 # =========================================================================
 # Protected routes (require login)
 # =========================================================================
-@api_bp.route("/entries", methods=["GET", "POST", "PUT"])
+@api_bp.route("/entries", methods=["GET", "POST", "PUT", "DELETE"])
 @login_required
+@response_cache.cached_view("entries", user_id=effective_user_id)
+@admission_control.admit("heavy")
 def entries() -> Response | tuple[Response, int]:
     """
         Handle health entry retrieval and creation.
@@ -131,6 +437,8 @@ def entries() -> Response | tuple[Response, int]:
         - date (str, optional): Format YYYY-MM-DD
             If provided, returns a single entry for that date.
             If omitted, returns all entries ordered by date (descending).
+        - exclude_outliers (bool, optional): derived fat-mass metrics skip
+            entries flagged as body-composition outliers.
 
     Response:
         200 OK
@@ -157,13 +465,23 @@ def entries() -> Response | tuple[Response, int]:
             - body_fat_percent (float, optional; accepts legacy `body_fat`)
             - calories_kcal (int, optional; accepts legacy `calories`)
             - protein_g (int, optional; accepts legacy `protein`)
+            - carbs_g (int, optional; accepts `carbs`)
+            - fat_g (int, optional; accepts `fat`)
             - training_volume_kg (int, optional; accepts legacy `training_volume`)
             - steps_count (int, optional; accepts legacy `steps`)
             - sleep_hours (str, optional; accepts legacy `sleep_total`) Format HH:MM
             - sleep_quality (str, optional)
             - observations (str, optional)
 
+        Optional `Prefer` request header (comma-separated, PostgREST style):
+            - return=minimal: respond with {"success", "id", "date"} only and
+                skip serializing the derived metrics.
+            - resolution=merge-duplicates (POST only): update the entry for an
+                existing date instead of answering 409.
+
         Responses:
+            200 OK:
+                Existing entry updated (PUT, or POST with merge-duplicates).
             201 Created:
                 Entry successfully created.
             400 Bad Request:
@@ -171,12 +489,45 @@ def entries() -> Response | tuple[Response, int]:
             409 Conflict:
                 Entry for the provided date already exists.
 
+        DELETE
+        ------
+        Deletes the entry for ?date=YYYY-MM-DD and leaves a tombstone for
+        GET /api/entries/changes. 404 if there is no entry for that date.
+
         Returns:
             flask.Response or (flask.Response, int):
                 JSON response containing success status and data or error message.
     """
     effective_user = get_effective_user()
 
+    if request.method == "DELETE":
+        date_str = request.args.get("date", default="", type=str).strip()
+        try:
+            query_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            return jsonify(
+                {"success": False, "error": "Invalid date format, expected YYYY-MM-DD"}
+            ), 400
+        ttl_days = current_app.config.get("SYNC_TOMBSTONE_TTL_DAYS", 90)
+        try:
+            deleted = delete_entry(
+                effective_user.id, query_date, tombstone_ttl_days=ttl_days
+            )
+            if deleted:
+                # later readings lose this one from their detection window
+                refresh_outlier_flags_near(
+                    effective_user.id, query_date, **outlier_detector_settings()
+                )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"success": False, "error": str(e)}), 400
+        if not deleted:
+            return jsonify(
+                {"success": False, "error": "Entry not found for the given date"}
+            ), 404
+        return jsonify({"success": True}), 200
+
     if request.method in {"POST", "PUT"}:
         payload = parse_json_object_payload()
         if isinstance(payload, tuple):
@@ -191,46 +542,51 @@ def entries() -> Response | tuple[Response, int]:
             return jsonify({"success": False, "error": str(exc)}), 400
 
         entry_fields = build_entry_fields(data, sleep_decimal)
+        prefer = parse_prefer_header()
 
-        if request.method == "PUT":
-            entry = HealthEntry.query.filter_by(
-                user_id=effective_user.id, date=parsed_date
-            ).first()
-            if not entry:
-                return jsonify(
-                    {"success": False, "error": "Entry not found for the given date"}
-                ), 404
-
-            for field_name, field_value in entry_fields.items():
-                setattr(entry, field_name, field_value)
-
-            try:
-                db.session.commit()
-            except Exception as e:
-                db.session.rollback()
-                return jsonify({"success": False, "error": str(e)}), 400
-
-            return jsonify({"success": True, "entry": entry.to_dict()}), 200
-
-        entry = HealthEntry(
-            user_id=effective_user.id,
-            date=parsed_date,
-            **entry_fields,
-        )
-
-        db.session.add(entry)
+        # Single statement per write: UPDATE ... RETURNING for PUT,
+        # INSERT ... ON CONFLICT (user_id, date) DO NOTHING/DO UPDATE ... RETURNING
+        # for POST; then the outlier flags around the date
+        created = request.method == "POST"
         try:
+            if request.method == "PUT":
+                entry_id = update_entry(effective_user.id, parsed_date, entry_fields)
+            elif "resolution=merge-duplicates" in prefer:
+                entry_id, created = merge_entry(
+                    effective_user.id, parsed_date, entry_fields
+                )
+            else:
+                entry_id = insert_entry(effective_user.id, parsed_date, entry_fields)
+            if entry_id is not None:
+                # flags of this entry and of the later ones it is history for
+                refresh_outlier_flags_near(
+                    effective_user.id, parsed_date, **outlier_detector_settings()
+                )
             db.session.commit()
-        except IntegrityError:
-            db.session.rollback()
-            return jsonify({"success": False, "error": "Date already exists"}), 409
         except Exception as e:
             db.session.rollback()
             return jsonify({"success": False, "error": str(e)}), 400
 
-        return jsonify({"success": True, "entry": entry.to_dict()}), 201
+        if entry_id is None:
+            if request.method == "PUT":
+                return jsonify(
+                    {"success": False, "error": "Entry not found for the given date"}
+                ), 404
+            return jsonify({"success": False, "error": "Date already exists"}), 409
+
+        status_code = 201 if created else 200
+        if "return=minimal" in prefer:
+            response = jsonify(
+                {"success": True, "id": entry_id, "date": parsed_date.isoformat()}
+            )
+            response.headers["Preference-Applied"] = "return=minimal"
+            return response, status_code
+
+        entry = db.session.get(HealthEntry, entry_id)
+        return jsonify({"success": True, "entry": entry.to_dict()}), status_code
 
     # GET request:
+    exclude_outliers = parse_flag(request.args.get("exclude_outliers"))
     date_str = request.args.get("date", type=str)
     if date_str:
         date_str = date_str.strip()
@@ -248,7 +604,9 @@ def entries() -> Response | tuple[Response, int]:
             return jsonify(
                 {"success": False, "error": "Entry not found for the given date"}
             ), 404
-        return jsonify({"success": True, "entry": entry.to_dict()})
+        return jsonify(
+            {"success": True, "entry": entry.to_dict(exclude_outliers=exclude_outliers)}
+        )
 
     window = request.args.get("window", default="", type=str).lower().strip()
     days_param = request.args.get("days", type=int)
@@ -264,26 +622,569 @@ def entries() -> Response | tuple[Response, int]:
         return jsonify({"success": False, "error": str(exc)}), 400
 
     if days is not None:
-        latest_entry = (
-            HealthEntry.query.filter_by(user_id=effective_user.id)
-            .order_by(HealthEntry.date.desc())
-            .first()
-        )
-        if latest_entry:
-            end_date = latest_entry.date
+        end_date = last_entry_date(db.session, effective_user.id)
+        if end_date is not None:
             start_date = end_date - timedelta(days=days - 1)
             query = query.filter(HealthEntry.date >= start_date)
 
     all_entries = query.all()
-    serialized_entries = [entry.to_dict() for entry in all_entries]
+    serialized_entries = [
+        entry.to_dict(exclude_outliers=exclude_outliers) for entry in all_entries
+    ]
     return jsonify({"success": True, "entries": serialized_entries})
 
 
+@api_bp.route("/entries/changes", methods=["GET"])
+@login_required
+def entries_changes() -> Response | tuple[Response, int]:
+    """
+    Delta sync for client-side entry caches.
+
+    Query parameters:
+        - since (str, optional): token from a previous response. If omitted,
+            for another user (admin switched client) or older than the tombstone
+            TTL, a full snapshot is returned.
+
+    Response:
+        200 OK
+        {
+            "success": true,
+            "user_id": 3,
+            "full": false,
+            "token": "...",          # pass as ?since= next time
+            "entries": [ ... serialized HealthEntry objects ... ],
+            "deleted": ["2026-02-01", ...]
+        }
+        With "full": true the client replaces its cache with `entries`.
+        Otherwise it upserts `entries` (changed rows plus every later entry,
+        whose derived 7-day metrics depend on them) and drops `deleted` dates.
+        400 Bad Request:
+            Malformed `since` token.
+    """
+    effective_user = get_effective_user()
+    now = utcnow()
+    overlap = timedelta(seconds=current_app.config.get("SYNC_TOKEN_OVERLAP_S", 5))
+    ttl = timedelta(days=current_app.config.get("SYNC_TOMBSTONE_TTL_DAYS", 90))
+
+    since = None
+    token = request.args.get("since", default="", type=str).strip()
+    if token:
+        try:
+            token_user_id, since = decode_sync_token(token)
+        except ValueError as exc:
+            return jsonify({"success": False, "error": str(exc)}), 400
+        if token_user_id != effective_user.id or since < now - ttl:
+            since = None
+
+    base_query = HealthEntry.query.filter_by(user_id=effective_user.id)
+    deleted: list[str] = []
+    if since is None:
+        entries = base_query.order_by(HealthEntry.date.desc()).all()
+    else:
+        changed_dates = [
+            row[0]
+            for row in db.session.query(HealthEntry.date).filter(
+                HealthEntry.user_id == effective_user.id,
+                HealthEntry.updated_at > since,
+            )
+        ]
+        tombstone_dates = [
+            row[0]
+            for row in db.session.query(EntryTombstone.date)
+            .outerjoin(
+                HealthEntry,
+                (HealthEntry.user_id == EntryTombstone.user_id)
+                & (HealthEntry.date == EntryTombstone.date),
+            )
+            .filter(
+                EntryTombstone.user_id == effective_user.id,
+                EntryTombstone.deleted_at > since,
+                HealthEntry.id.is_(None),
+            )
+        ]
+        deleted = [d.isoformat() for d in sorted(tombstone_dates)]
+        earliest = min(changed_dates + tombstone_dates, default=None)
+        entries = (
+            base_query.filter(HealthEntry.date >= earliest)
+            .order_by(HealthEntry.date.desc())
+            .all()
+            if earliest is not None
+            else []
+        )
+
+    return jsonify(
+        {
+            "success": True,
+            "user_id": effective_user.id,
+            "full": since is None,
+            "token": encode_sync_token(effective_user.id, now - overlap),
+            "entries": [entry.to_dict() for entry in entries],
+            "deleted": deleted,
+        }
+    )
+
+
+@api_bp.route("/entries/bulk", methods=["POST"])
+@login_required
+def entries_bulk() -> Response | tuple[Response, int]:
+    """
+    Create or update many health entries in one transaction.
+
+    Expected JSON:
+        {"entries": [{"date": "2026-02-01", "weight_kg": 72.5, ...}, ...]}
+        Each item accepts the same fields as POST /api/entries. Existing
+        entries for a date are overwritten (PUT semantics), new dates are created.
+
+    Responses:
+        200 OK:
+        {
+            "success": true,
+            "summary": {"created": 360, "updated": 4, "errors": 1},
+            "results": [{"index": 0, "date": "2026-02-01", "status": "created"},
+                        {"index": 7, "status": "error", "error": "Invalid date format"},
+                        ...]
+        }
+        Invalid items are reported per row and do not block the valid ones.
+        400 Bad Request:
+            Invalid JSON, missing/oversized `entries` list or database error.
+    """
+    payload = parse_json_object_payload()
+    if isinstance(payload, tuple):
+        return payload
+
+    items = payload.get("entries")
+    if not isinstance(items, list) or not items:
+        return jsonify(
+            {"success": False, "error": "entries must be a non-empty list"}
+        ), 400
+    max_rows = current_app.config.get("BULK_ENTRIES_MAX_ROWS", 1000)
+    if len(items) > max_rows:
+        return jsonify(
+            {"success": False, "error": f"at most {max_rows} entries per request"}
+        ), 400
+
+    effective_user = get_effective_user()
+    results: list[dict[str, object]] = []
+    rows: dict[date, dict[str, object]] = {}
+    row_index: dict[date, int] = {}
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append(
+                {"index": index, "status": "error", "error": "Invalid entry"}
+            )
+            continue
+        try:
+            parsed_date = parse_entry_date_required(item)
+            sleep_raw = item.get("sleep_hours", item.get("sleep_total"))
+            sleep_decimal = parse_optional_sleep_total_hhmm(sleep_raw)
+        except ValueError as exc:
+            results.append({"index": index, "status": "error", "error": str(exc)})
+            continue
+        if parsed_date in rows:
+            results.append(
+                {
+                    "index": index,
+                    "status": "error",
+                    "error": "Duplicate date in request",
+                }
+            )
+            continue
+        rows[parsed_date] = build_entry_fields(item, sleep_decimal)
+        row_index[parsed_date] = index
+
+    try:
+        statuses = bulk_upsert_entries(effective_user.id, rows)
+        if statuses:
+            refresh_user_outlier_flags(effective_user.id, **outlier_detector_settings())
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(exc)}), 400
+
+    results.extend(
+        {
+            "index": row_index[entry_date],
+            "date": entry_date.isoformat(),
+            "status": status,
+        }
+        for entry_date, status in statuses.items()
+    )
+    results.sort(key=lambda result: result["index"])
+    summary = {"created": 0, "updated": 0, "errors": 0}
+    for result in results:
+        summary["errors" if result["status"] == "error" else result["status"]] += 1
+
+    return jsonify({"success": True, "summary": summary, "results": results}), 200
+
+
+@api_bp.route("/workouts/sets", methods=["POST"])
+@login_required
+def workout_sets() -> Response | tuple[Response, int]:
+    """
+    Log many sets in one transaction.
+
+    Expected JSON:
+        {"sets": [{"date": "2026-02-01", "exercise": "Bench Press", "reps": 5,
+                   "load_kg": 80, "workout": "Push day"}, ...]}
+        `workout` is optional; sets with the same date and workout name are
+        grouped into one workout. The day's training_volume_kg and the weekly
+        per-exercise rollups are updated in the same transaction.
+
+    Responses:
+        200 OK:
+        {
+            "success": true,
+            "summary": {"created": 24, "errors": 1},
+            "results": [{"index": 0, "id": 101, "status": "created"},
+                        {"index": 3, "status": "error", "error": "reps must be ..."},
+                        ...]
+        }
+        400 Bad Request:
+            Invalid JSON, missing/oversized `sets` list or database error.
+    """
+    payload = parse_json_object_payload()
+    if isinstance(payload, tuple):
+        return payload
+
+    items = payload.get("sets")
+    if not isinstance(items, list) or not items:
+        return (
+            jsonify({"success": False, "error": "sets must be a non-empty list"}),
+            400,
+        )
+    max_rows = current_app.config.get("BULK_SETS_MAX_ROWS", 2000)
+    if len(items) > max_rows:
+        return jsonify(
+            {"success": False, "error": f"at most {max_rows} sets per request"}
+        ), 400
+
+    effective_user = get_effective_user()
+    results: list[dict[str, object]] = []
+    valid: list[tuple[int, SetInput]] = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append({"index": index, "status": "error", "error": "Invalid set"})
+            continue
+        try:
+            valid.append((index, parse_set_item(item)))
+        except ValueError as exc:
+            results.append({"index": index, "status": "error", "error": str(exc)})
+
+    try:
+        set_ids = add_sets(effective_user.id, [s for _, s in valid])
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(exc)}), 400
+
+    results.extend(
+        {"index": index, "id": set_id, "status": "created"}
+        for (index, _), set_id in zip(valid, set_ids)
+    )
+    results.sort(key=lambda result: result["index"])
+    summary = {"created": len(set_ids), "errors": len(results) - len(set_ids)}
+    return jsonify({"success": True, "summary": summary, "results": results}), 200
+
+
+@api_bp.route("/workouts/sets/<int:set_id>", methods=["DELETE"])
+@login_required
+def workout_set_delete(set_id: int) -> Response | tuple[Response, int]:
+    """Delete one set and subtract it from the daily and weekly rollups."""
+    effective_user = get_effective_user()
+    try:
+        deleted = delete_set(effective_user.id, set_id)
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(exc)}), 400
+    if not deleted:
+        return jsonify({"success": False, "error": "Set not found"}), 404
+    return jsonify({"success": True}), 200
+
+
+@api_bp.route("/workouts/progression", methods=["GET"])
+@login_required
+@response_cache.cached_view("workouts-progression", user_id=effective_user_id)
+@admission_control.admit("heavy")
+def workout_progression() -> Response | tuple[Response, int]:
+    """
+    Weekly per-exercise progression, read from the pre-aggregated rollups.
+
+    Query parameters:
+        - exercise (str, optional): only this exercise (case-insensitive).
+        - weeks (int, optional): only the last N weeks (default 12).
+
+    Response:
+        200 OK
+        {
+            "success": true,
+            "exercises": {
+                "bench press": [{"week_start": "2026-01-26", "volume_kg": 4200.0,
+                                 "sets": 12, "best_e1rm_kg": 96.7}, ...]
+            }
+        }
+    """
+    effective_user = get_effective_user()
+    weeks = request.args.get("weeks", default=12, type=int)
+    if weeks is None or weeks <= 0:
+        return (
+            jsonify({"success": False, "error": "weeks must be a positive integer"}),
+            400,
+        )
+
+    query = db.session.query(ExerciseWeeklyRollup).filter(
+        ExerciseWeeklyRollup.user_id == effective_user.id
+    )
+    exercise = request.args.get("exercise", default="", type=str)
+    if exercise.strip():
+        try:
+            exercise = normalize_exercise(exercise)
+        except ValueError as exc:
+            return jsonify({"success": False, "error": str(exc)}), 400
+        query = query.filter(ExerciseWeeklyRollup.exercise == exercise)
+    latest_week = query.with_entities(
+        func.max(ExerciseWeeklyRollup.week_start)
+    ).scalar()
+    exercises: dict[str, list[dict[str, object]]] = {}
+    if latest_week is not None:
+        rows = query.filter(
+            ExerciseWeeklyRollup.week_start > latest_week - timedelta(weeks=weeks)
+        ).order_by(ExerciseWeeklyRollup.exercise, ExerciseWeeklyRollup.week_start)
+        for row in rows:
+            exercises.setdefault(row.exercise, []).append(
+                {
+                    "week_start": row.week_start.isoformat(),
+                    "volume_kg": round(row.volume_kg, 1),
+                    "sets": row.set_count,
+                    "best_e1rm_kg": (
+                        None
+                        if row.best_e1rm_kg is None
+                        else round(row.best_e1rm_kg, 1)
+                    ),
+                }
+            )
+    return jsonify({"success": True, "exercises": exercises})
+
+
+@api_bp.route("/meals/items", methods=["GET", "POST"])
+@login_required
+def meal_items() -> Response | tuple[Response, int]:
+    """
+    List or log meal items. The day's calories_kcal, protein_g, carbs_g and
+    fat_g entry fields are kept as rollups of its items.
+
+    GET
+    ---
+    Query parameters:
+        - date (str, required): YYYY-MM-DD
+
+    Response:
+        200 OK
+        {"success": true, "items": [{"id": 7, "date": "2026-02-01", "meal": "lunch",
+                                     "name": "Rice", "calories_kcal": 260.0, ...}]}
+
+    POST
+    ----
+    Expected JSON:
+        {"items": [{"date": "2026-02-01", "meal": "lunch", "name": "Rice",
+                    "calories_kcal": 260, "protein_g": 5, "carbs_g": 56, "fat_g": 0.5},
+                   ...]}
+        Missing macros count as 0; missing calories are derived from the
+        macros (4/4/9 kcal per g).
+
+    Responses:
+        200 OK:
+        {"success": true, "summary": {"created": 5, "errors": 0},
+         "results": [{"index": 0, "id": 7, "status": "created"}, ...]}
+        400 Bad Request:
+            Invalid JSON, missing/oversized `items` list or database error.
+    """
+    effective_user = get_effective_user()
+
+    if request.method == "GET":
+        date_str = request.args.get("date", default="", type=str).strip()
+        try:
+            query_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            return jsonify(
+                {"success": False, "error": "Invalid date format, expected YYYY-MM-DD"}
+            ), 400
+        items = (
+            db.session.query(MealItem)
+            .filter(MealItem.user_id == effective_user.id, MealItem.date == query_date)
+            .order_by(MealItem.id)
+        )
+        return jsonify({"success": True, "items": [item.to_dict() for item in items]})
+
+    payload = parse_json_object_payload()
+    if isinstance(payload, tuple):
+        return payload
+
+    raw_items = payload.get("items")
+    if not isinstance(raw_items, list) or not raw_items:
+        return (
+            jsonify({"success": False, "error": "items must be a non-empty list"}),
+            400,
+        )
+    max_rows = current_app.config.get("BULK_MEAL_ITEMS_MAX_ROWS", 1000)
+    if len(raw_items) > max_rows:
+        return jsonify(
+            {"success": False, "error": f"at most {max_rows} items per request"}
+        ), 400
+
+    results: list[dict[str, object]] = []
+    valid: list[tuple[int, MealItemInput]] = []
+    for index, item in enumerate(raw_items):
+        if not isinstance(item, dict):
+            results.append({"index": index, "status": "error", "error": "Invalid item"})
+            continue
+        try:
+            valid.append((index, parse_meal_item(item)))
+        except ValueError as exc:
+            results.append({"index": index, "status": "error", "error": str(exc)})
+
+    try:
+        item_ids = add_meal_items(effective_user.id, [item for _, item in valid])
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(exc)}), 400
+
+    results.extend(
+        {"index": index, "id": item_id, "status": "created"}
+        for (index, _), item_id in zip(valid, item_ids)
+    )
+    results.sort(key=lambda result: result["index"])
+    summary = {"created": len(item_ids), "errors": len(results) - len(item_ids)}
+    return jsonify({"success": True, "summary": summary, "results": results}), 200
+
+
+@api_bp.route("/meals/items/<int:item_id>", methods=["DELETE"])
+@login_required
+def meal_item_delete(item_id: int) -> Response | tuple[Response, int]:
+    """Delete one meal item and subtract it from the day's macro rollup."""
+    effective_user = get_effective_user()
+    try:
+        deleted = delete_meal_item(effective_user.id, item_id)
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(exc)}), 400
+    if not deleted:
+        return jsonify({"success": False, "error": "Item not found"}), 404
+    return jsonify({"success": True}), 200
+
+
+@api_bp.route("/intraday", methods=["GET", "POST"])
+@login_required
+@response_cache.cached_view("intraday", user_id=effective_user_id)
+@admission_control.admit("heavy")
+def intraday() -> Response | tuple[Response, int]:
+    """
+    Ingest and read intraday wearable samples (heart_rate, steps, sleep_stage).
+
+    POST
+    ----
+    Expected JSON (columnar, one object per metric):
+        {"series": [{"metric": "heart_rate",
+                     "ts": [1767225600, 1767225660, ...],   # UTC epoch seconds
+                     "values": [61, 63, ...]}, ...]}
+        Re-sent samples overwrite earlier values. Days touched by steps and
+        sleep_stage samples get their steps_count / sleep_hours recomputed
+        (entries are created when missing).
+
+    Response:
+        200 OK
+        {"success": true, "samples": 2880,
+         "days_updated": {"steps_count": ["2026-01-01"], "sleep_hours": [...]}}
+        400 Bad Request:
+            Invalid payload, unknown metric or more than INTRADAY_MAX_SAMPLES.
+
+    GET
+    ---
+    Query parameters:
+        - metric (str, required)
+        - start, end (str, optional): YYYY-MM-DD (end inclusive) or epoch
+            seconds (end exclusive). Defaults to the day before the latest sample.
+        - bucket (int, optional): bucket width in seconds; rounded up to the
+            supported resolutions (5 min .. 1 day, then whole days) and
+            widened to keep at most INTRADAY_MAX_POINTS buckets.
+
+    Response:
+        200 OK
+        {"success": true, "metric": "heart_rate", "bucket_s": 900,
+         "start": 1767225600, "end": 1767312000,
+         "points": {"ts": [...], "min": [...], "avg": [...], "max": [...],
+                    "sum": [...], "count": [...]}}
+    """
+    effective_user = get_effective_user()
+
+    if request.method == "POST":
+        payload = parse_json_object_payload()
+        if isinstance(payload, tuple):
+            return payload
+        try:
+            series = parse_series_payload(payload.get("series"))
+        except ValueError as exc:
+            return jsonify({"success": False, "error": str(exc)}), 400
+        n_samples = sum(len(ts) for ts, _ in series.values())
+        max_samples = current_app.config.get("INTRADAY_MAX_SAMPLES", 100_000)
+        if n_samples > max_samples:
+            error = f"at most {max_samples} samples per request"
+            return jsonify({"success": False, "error": error}), 400
+        try:
+            days_updated = ingest_samples(effective_user.id, series)
+            db.session.commit()
+        except Exception as exc:
+            db.session.rollback()
+            return jsonify({"success": False, "error": str(exc)}), 400
+        return jsonify(
+            {"success": True, "samples": n_samples, "days_updated": days_updated}
+        ), 200
+
+    metric = request.args.get("metric", default="", type=str)
+    start_param = request.args.get("start", default="", type=str)
+    end_param = request.args.get("end", default="", type=str)
+    try:
+        mid = metric_id(metric)
+        end = to_epoch_s(end_param, end_of_day=True) if end_param else None
+        start = to_epoch_s(start_param) if start_param else None
+    except ValueError as exc:
+        return jsonify({"success": False, "error": str(exc)}), 400
+    bucket_param = request.args.get("bucket", type=int)
+
+    if end is None:
+        latest = latest_sample_ts(effective_user.id, mid)
+        end = (latest + 1) if latest is not None else int(time.time())
+        if start is not None:
+            end = max(end, start + 1)
+    if start is None:
+        start = end - 86_400
+    if start >= end:
+        return jsonify({"success": False, "error": "start must be before end"}), 400
+
+    bucket_s = choose_bucket_s(
+        end - start, current_app.config.get("INTRADAY_MAX_POINTS", 500), bucket_param
+    )
+    return jsonify(
+        {
+            "success": True,
+            "metric": metric.strip().lower(),
+            "bucket_s": bucket_s,
+            "start": start,
+            "end": end,
+            "points": read_buckets(effective_user.id, mid, start, end, bucket_s),
+        }
+    )
+
+
 @api_bp.route("/user-profile", methods=["GET", "PUT"])
 @login_required
+@response_cache.cached_view("user-profile", user_id=effective_user_id)
 def user_profile() -> Response | tuple[Response, int]:
     """Read/update authenticated user's profile inputs used by overview calculations."""
-    effective_user = get_effective_user()
+    effective_user = user_row(get_effective_user())
 
     if request.method == "GET":
         return (
@@ -324,34 +1225,35 @@ def user_profile() -> Response | tuple[Response, int]:
 
     return (
         jsonify(
-                {
-                    "success": True,
-                    "profile": {
-                        "age": effective_user.age,
-                        "height_cm": effective_user.height_cm,
-                        "weight_kg": effective_user.weight_kg,
-                    },
-                }
-            ),
-            200,
-        )
+            {
+                "success": True,
+                "profile": {
+                    "age": effective_user.age,
+                    "height_cm": effective_user.height_cm,
+                    "weight_kg": effective_user.weight_kg,
+                },
+            }
+        ),
+        200,
+    )
 
 
 @api_bp.route("/user-settings", methods=["GET", "PUT"])
 @login_required
 def user_settings() -> Response | tuple[Response, int]:
     """Read/update authenticated user's account settings and profile metrics."""
+    user = user_row(current_user)
     if request.method == "GET":
         return (
             jsonify(
                 {
                     "success": True,
                     "settings": {
-                        "name": current_user.name,
-                        "email": current_user.email,
-                        "age": current_user.age,
-                        "height_cm": current_user.height_cm,
-                        "weight_kg": current_user.weight_kg,
+                        "name": user.name,
+                        "email": user.email,
+                        "age": user.age,
+                        "height_cm": user.height_cm,
+                        "weight_kg": user.weight_kg,
                     },
                 }
             ),
@@ -364,33 +1266,40 @@ def user_settings() -> Response | tuple[Response, int]:
     data = payload
 
     try:
-        name = str(data.get("name", current_user.name or "")).strip()
+        name = str(data.get("name", user.name or "")).strip()
         if not name:
             return jsonify({"success": False, "error": "name cannot be empty"}), 400
 
         password = str(data.get("password", "") or "")
         password_confirm = str(data.get("password_confirm", "") or "")
-        is_demo_user = (current_user.email or "").strip().lower() == "demo@example.com"
+        is_demo_user = (user.email or "").strip().lower() == "demo@example.com"
         if is_demo_user:
-            if name != (current_user.name or ""):
+            if name != (user.name or ""):
                 return jsonify({"success": False, "error": "Demo user cannot change name"}), 403
             if password or password_confirm:
                 return jsonify({"success": False, "error": "Demo user cannot change password"}), 403
         if password and password_confirm:
             if password != password_confirm:
                 return jsonify({"success": False, "error": "passwords do not match"}), 400
-            current_user.set_password(password)
+            user.set_password(password)
 
         age_val = parse_profile_number(data.get("age"))
         height_val = parse_profile_number(data.get("height_cm"))
         weight_val = parse_profile_number(data.get("weight_kg"))
     except ValueError as exc:
         return jsonify({"success": False, "error": str(exc)}), 400
+    except PasswordHashBusy as exc:
+        db.session.rollback()
+        return (
+            jsonify({"success": False, "error": str(exc)}),
+            503,
+            {"Retry-After": str(password_hasher.retry_after_s)},
+        )
 
-    current_user.name = name
-    current_user.age = int(age_val) if age_val is not None else None
-    current_user.height_cm = height_val
-    current_user.weight_kg = weight_val
+    user.name = name
+    user.age = int(age_val) if age_val is not None else None
+    user.height_cm = height_val
+    user.weight_kg = weight_val
 
     try:
         db.session.commit()
@@ -403,6 +1312,8 @@ def user_settings() -> Response | tuple[Response, int]:
 
 @api_bp.route("/stats")  # GET only (default when no methods specified)
 @login_required
+@response_cache.cached_view("stats", user_id=effective_user_id)
+@admission_control.admit("heavy")
 def stats() -> Response | tuple[Response, int]:
     """
     Return aggregated statitistics for health entries.
@@ -410,6 +1321,9 @@ def stats() -> Response | tuple[Response, int]:
     Optional query parameters:
         days (int): if provided, restrict to the last N days of entries (default: all)
         Example: /api/stats?days=7 or /api/stats?window=7d 30d 3m 1y
+        dispersion (bool): add var_/std_/min_/max_ keys per metric
+        quantiles (str): comma-separated quantiles, e.g. 0.25,0.5,0.75 -> p25_/p50_/p75_
+        exclude_outliers (bool): ignore weight/body fat of flagged entries
 
     Response:
     Example response for /api/stats?days=7:
@@ -433,41 +1347,64 @@ def stats() -> Response | tuple[Response, int]:
     # window can be: "", "7d", "30d", "3m", "1y", or omitted
     window = request.args.get("window", default="", type=str).lower().strip()
 
+    dispersion = parse_flag(request.args.get("dispersion"))
+    exclude_outliers = parse_flag(request.args.get("exclude_outliers"))
+
     # Decide days
     try:
         days = resolve_days_from_query(days_param, window)
+        quantiles = parse_quantiles_param(request.args.get("quantiles", default=""))
     except ValueError as exc:
         return jsonify({"success": False, "error": str(exc)}), 400
 
     effective_user = get_effective_user()
-
-    # query = HealthEntry.query.order_by(HealthEntry.date.desc())
-    base_query = HealthEntry.query.filter_by(user_id=effective_user.id)
-    query = base_query.order_by(HealthEntry.date.desc())
-
-    start_date = None
-    end_date = None
-
-    if days is not None:
-        latest_entry = base_query.order_by(HealthEntry.date.desc()).first()
-        if not latest_entry:
+    metric_names = list(METRICS.values())
+
+    # Memory-mapped columns when the columnar store is current, else SQL
+    snapshot = columnar_store.load(effective_user.id, metric_names)
+    if snapshot is not None:
+        if days is not None:
+            snapshot = snapshot.last_days(days)
+        if not len(snapshot):
             return jsonify({"success": False, "error": "No data available"}), 404
-        end_date = latest_entry.date
-        start_date = end_date - timedelta(days=days - 1)
-        query = query.filter(HealthEntry.date >= start_date)
+        oldest_entry_date, latest_entry_date = snapshot.first_date, snapshot.last_date
+        # newest first, like the SQL path (reversed views, no copies)
+        columns = {name: snapshot.columns[name][::-1] for name in metric_names}
+        flags = snapshot.outlier_metrics[::-1]
+    else:
+        # Column-only select: stats are computed on NumPy columns, not ORM objects
+        query = (
+            db.session.query(
+                HealthEntry.date,
+                HealthEntry.outlier_metrics,
+                *(getattr(HealthEntry, name) for name in metric_names),
+            )
+            .filter(HealthEntry.user_id == effective_user.id)
+            .order_by(HealthEntry.date.desc())
+        )
+        if days is not None:
+            latest = last_entry_date(db.session, effective_user.id)
+            if latest is None:
+                return jsonify({"success": False, "error": "No data available"}), 404
+            query = query.filter(HealthEntry.date >= latest - timedelta(days=days - 1))
+
+        rows = query.all()
+        if not rows:
+            return jsonify({"success": False, "error": "No data available"}), 404
+        latest_entry_date, oldest_entry_date = rows[0][0], rows[-1][0]
+        columns = columns_from_rows((row[2:] for row in rows), metric_names)
+        flags = [row[1] for row in rows]
 
-    entries = query.all()
-    if not entries:
-        return jsonify({"success": False, "error": "No data available"}), 404
+    if exclude_outliers:
+        columns = mask_outliers(columns, flags)
 
-    # For all-time, expose an actual date span so the UI can show day count.
+    end_date = latest_entry_date
     if days is None:
-        latest_entry_date = entries[0].date
-        oldest_entry_date = entries[-1].date
+        # For all-time, expose an actual date span so the UI can show day count.
         start_date = oldest_entry_date
-        end_date = latest_entry_date
         window_days = (end_date - start_date).days + 1
     else:
+        start_date = end_date - timedelta(days=days - 1)
         window_days = days
 
     return jsonify(
@@ -477,6 +1414,10 @@ def stats() -> Response | tuple[Response, int]:
             "window_days": window_days,
             "start_date": start_date.isoformat() if start_date else None,
             "end_date": end_date.isoformat(),
-            "stats": compute_stats(entries),
+            "stats": compute_stats_columnar(
+                columns,
+                dispersion=dispersion,
+                quantiles=quantiles,
+            ),
         }
     )
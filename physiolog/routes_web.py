@@ -6,24 +6,53 @@ It defines the web routes for the PhySioLog Flask application.
 Author: Jose Guzman, sjm.guzman<at>gmail.com
 """
 
+import base64
+import binascii
+import hashlib
+import json
 from pathlib import Path
 from urllib.parse import urlparse
 
 import markdown2
 from flask import Blueprint, abort, flash, redirect, render_template, request, session, url_for
 from flask_login import current_user, login_required, login_user, logout_user
-from sqlalchemy import func, or_
+from sqlalchemy import func, tuple_
 
+from .cache import object_cache
 from .extensions import db
-from .models import AdminClientAssignment, HealthEntry, User
+from .models import AdminClientAssignment, User, UserSummary
+from .passwords import PasswordHashBusy, password_hasher
+from .principals import principal_cache
+from .scope import assignment_cache, current_scope
+from .search import normalize_search_query, user_search_filter, user_search_rank
 
 web_bp = Blueprint("web", __name__)
 DOCS_DIR = Path("docs").resolve()
 MARKDOWN_EXTRAS = ["fenced-code-blocks", "tables", "break-on-newline"]
 DOCS_PER_PAGE_OPTIONS = ["5", "10", "20", "all"]
+# Docs cache keys embed the files' signature or content hash, so edits show
+# up immediately; the TTL only bounds how long unused entries linger.
+DOCS_CACHE_TTL_S = 24 * 3600
+
+
+def _docs_signature() -> str:
+    """Cheap fingerprint of the docs tree (paths, sizes, mtimes; no reads)."""
+    digest = hashlib.sha1()
+    if DOCS_DIR.exists():
+        for file in sorted(DOCS_DIR.rglob("*.md")):
+            stat = file.stat()
+            digest.update(f"{file}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
 
 
 def build_docs_tree() -> dict[str, list[dict[str, str]]]:
+    """Docs sections and pages, cached until a markdown file changes."""
+    return object_cache.get_or_set(
+        f"docs-tree|{DOCS_DIR}|{_docs_signature()}", _scan_docs_tree, DOCS_CACHE_TTL_S
+    )
+
+
+def _scan_docs_tree() -> dict[str, list[dict[str, str]]]:
     tree: dict[str, list[dict[str, str]]] = {}
     if not DOCS_DIR.exists():
         return tree
@@ -66,22 +95,10 @@ def get_selected_client():
     if not current_user.is_authenticated or not current_user.is_admin:
         return None
 
-    selected_user_id = session.get("selected_user_id")
-    if selected_user_id is None:
+    selected_client_id = current_scope().selected_client_id
+    if selected_client_id is None:
         return None
-
-    return (
-        db.session.query(User)
-        .join(
-            AdminClientAssignment,
-            AdminClientAssignment.client_user_id == User.id,
-        )
-        .filter(
-            AdminClientAssignment.admin_user_id == current_user.id,
-            User.id == selected_user_id,
-        )
-        .first()
-    )
+    return principal_cache.load(selected_client_id)
 
 
 def _resolve_doc_file(doc_path: str) -> Path | None:
@@ -105,6 +122,14 @@ def _normalize_markdown_whitespace(text: str) -> str:
 
 
 def _render_docs_markdown_blocks(text: str) -> list[str]:
+    """Rendered HTML blocks of a docs page, cached by content hash."""
+    key = "docs-md|" + hashlib.sha1(text.encode("utf-8")).hexdigest()
+    return object_cache.get_or_set(
+        key, lambda: _render_markdown_blocks_uncached(text), DOCS_CACHE_TTL_S
+    )
+
+
+def _render_markdown_blocks_uncached(text: str) -> list[str]:
     blocks: list[str] = []
     current_lines: list[str] = []
 
@@ -174,6 +199,32 @@ def _paginate_docs(
     return section_pages[start:end], page, total_pages
 
 
+def _encode_keyset_cursor(values: list) -> str:
+    """Opaque "after" cursor for keyset pagination of the clients list."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_keyset_cursor(token: str, size: int) -> list | None:
+    """Values from ``_encode_keyset_cursor``, or None if absent or malformed."""
+    token = token.strip()
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(
+            isinstance(v, (int, str)) and not isinstance(v, bool) for v in values
+        )
+    ):
+        return None
+    return values
+
+
 def _default_landing_endpoint() -> str:
     """Return the default landing endpoint for the authenticated user."""
     if current_user.is_authenticated and current_user.is_admin:
@@ -198,7 +249,17 @@ def login():
         email = request.form.get("email", "").strip().lower()
         password = request.form.get("password", "")
         user = User.query.filter_by(email=email).first()
-        if user and user.check_password(password):
+        try:
+            authenticated = user is not None and user.check_password(password)
+        except PasswordHashBusy:
+            flash("Too many sign-ins right now, please try again shortly", "error")
+            return _hashing_busy("login.html")
+        if authenticated:
+            try:
+                if user.upgrade_password_hash(password):
+                    db.session.commit()
+            except PasswordHashBusy:
+                pass  # keep the old hash, a later login upgrades it
             login_user(user)
             nxt = request.args.get("next")
             # prevent open redirect by only allowing relative local targets
@@ -211,6 +272,15 @@ def login():
     return render_template("login.html")
 
 
+def _hashing_busy(template: str):
+    """503 page while the password hashing pool is saturated (passwords.py)."""
+    return (
+        render_template(template),
+        503,
+        {"Retry-After": str(password_hasher.retry_after_s)},
+    )
+
+
 @web_bp.route("/register", methods=["GET", "POST"])
 def register():
     """Register page"""
@@ -237,7 +307,11 @@ def register():
             return render_template("register.html")
 
         user = User(name=name, email=email)
-        user.set_password(password)
+        try:
+            user.set_password(password)
+        except PasswordHashBusy:
+            flash("Too many sign-ups right now, please try again shortly", "error")
+            return _hashing_busy("register.html")
         db.session.add(user)
         db.session.commit()
 
@@ -386,7 +460,7 @@ def clients():
     if not current_user.is_admin:
         abort(403)
 
-    email_query = request.args.get("email", "").strip().lower()
+    email_query = normalize_search_query(request.args.get("email", ""))
     per_page_raw = request.args.get("per_page", "10").strip().lower()
     page_raw = request.args.get("page", "1").strip()
 
@@ -403,41 +477,68 @@ def clients():
     if page < 1:
         page = 1
 
+    # Entry totals come from the per-user summary rows (summaries.py)
     query = db.session.query(
         User,
-        func.count(HealthEntry.id).label("entry_count"),
-        func.max(HealthEntry.date).label("last_entry_date"),
+        func.coalesce(UserSummary.entry_count, 0).label("entry_count"),
+        UserSummary.last_entry_date.label("last_entry_date"),
     ).join(
         AdminClientAssignment,
         AdminClientAssignment.client_user_id == User.id,
     ).outerjoin(
-        HealthEntry, HealthEntry.user_id == User.id
+        UserSummary, UserSummary.user_id == User.id
     ).filter(
         AdminClientAssignment.admin_user_id == current_user.id
     )
 
+    # Sort key, also used as the keyset: (rank,) name, email, id
+    sort_keys = [func.coalesce(User.name, ""), User.email, User.id]
     if email_query:
-        query = query.filter(
-            or_(
-                User.email.ilike(f"%{email_query}%"),
-                User.name.ilike(f"%{email_query}%"),
-            )
-        )
-
-    query = query.group_by(User.id)
-
-    total_clients = query.count()
+        # Indexed substring search (search.py), best matches first
+        dialect_name = db.session.get_bind().dialect.name
+        query = query.filter(user_search_filter(email_query, dialect_name))
+        sort_keys.insert(0, user_search_rank(email_query))
+
+    # Page and total in one statement; "after" continues from a keyset cursor
+    after = _decode_keyset_cursor(request.args.get("after", ""), len(sort_keys))
+    if per_page == "all" or after is None:
+        after = None
+    else:
+        query = query.filter(tuple_(*sort_keys) > tuple_(*after))
+    query = query.add_columns(
+        func.count().over().label("matched"),
+        *(key.label(f"sort_{i}") for i, key in enumerate(sort_keys)),
+    ).order_by(*sort_keys)
+
+    def fetch_page(page: int) -> list:
+        if per_page == "all":
+            return query.all()
+        offset = 0 if after is not None else (page - 1) * per_page
+        return query.offset(offset).limit(per_page).all()
+
+    rows = fetch_page(page)
+    if not rows and page > 1 and after is None:
+        # Past the last page: clamp (the only case needing a second query)
+        total = query.order_by(None).count()
+        page = max(1, (total + per_page - 1) // per_page)
+        rows = fetch_page(page)
+
+    matched = rows[0].matched if rows else 0
+    skipped = (page - 1) * per_page if after is not None else 0
+    total_clients = skipped + matched
     total_pages = (
         1 if per_page == "all" else max(1, (total_clients + per_page - 1) // per_page)
     )
-    if page > total_pages:
-        page = total_pages
-
-    paginated_query = query.order_by(User.name.asc(), User.email.asc())
-    if per_page != "all":
-        paginated_query = paginated_query.offset((page - 1) * per_page).limit(per_page)
+    next_cursor = None
+    if rows and page < total_pages:
+        last = rows[-1]
+        next_cursor = _encode_keyset_cursor(
+            [getattr(last, f"sort_{i}") for i in range(len(sort_keys))]
+        )
 
-    users_with_last_entry = paginated_query.all()
+    users_with_last_entry = [
+        (row[0], row.entry_count, row.last_entry_date) for row in rows
+    ]
     selected_user_id = session.get("selected_user_id")
     return render_template(
         "clients.html",
@@ -447,6 +548,7 @@ def clients():
         page=page,
         per_page=per_page,
         total_pages=total_pages,
+        next_cursor=next_cursor,
         per_page_options=["5", "10", "20", "all"],
     )
 
@@ -459,18 +561,9 @@ def update_client_subscription(user_id: int):
     if not current_user.is_admin:
         abort(403)
 
-    user = (
-        db.session.query(User)
-        .join(
-            AdminClientAssignment,
-            AdminClientAssignment.client_user_id == User.id,
-        )
-        .filter(
-            AdminClientAssignment.admin_user_id == current_user.id,
-            User.id == user_id,
-        )
-        .first()
-    )
+    if user_id not in assignment_cache.client_ids(current_user.id):
+        abort(404)
+    user = db.session.get(User, user_id)
     if user is None:
         abort(404)
     next_status = request.form.get("status", "").strip().lower()
@@ -496,22 +589,10 @@ def select_client(user_id: int):
     if not current_user.is_admin:
         abort(403)
 
-    user = (
-        db.session.query(User)
-        .join(
-            AdminClientAssignment,
-            AdminClientAssignment.client_user_id == User.id,
-        )
-        .filter(
-            AdminClientAssignment.admin_user_id == current_user.id,
-            User.id == user_id,
-        )
-        .first()
-    )
-    if user is None:
+    if user_id not in assignment_cache.client_ids(current_user.id):
         abort(404)
 
-    session["selected_user_id"] = user.id
+    session["selected_user_id"] = user_id
 
     return redirect(
         url_for(
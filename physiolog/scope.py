@@ -0,0 +1,161 @@
+"""
+scope.py
+
+Admin/client scope of the current request.
+
+An admin observes the client selected in ``session["selected_user_id"]``,
+provided that client is assigned to them. Everyone else sees their own
+data. ``current_scope()`` resolves this once per request and keeps the
+result on ``flask.g``, so the API helpers and the template context processor
+share it.
+
+The selection is checked against ``assignment_cache.client_ids(admin_id)``,
+the admin's set of client ids. That set is cached in the cache backend
+(cache.py) under an ``assignments:<admin id>`` version. The version is bumped
+after every commit that adds, changes or removes one of the admin's
+``AdminClientAssignment`` rows; Core writers call
+``mark_assignments_dirty``. A scoped API request therefore runs no join,
+and usually no query at all.
+
+A revoked assignment must stop granting access in every worker, so the set
+is only cached when the backend is shared by all of them (or
+CACHE_SINGLE_PROCESS is set). Otherwise each call reads the assignment rows.
+
+Settings: ADMIN_SCOPE_CACHE_TTL_S.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+
+from flask import Flask, g, session
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .cache import MISSING, CacheBackend, MemoryBackend, coherent_across_workers
+from .extensions import db
+from .models import AdminClientAssignment
+
+logger = logging.getLogger(__name__)
+
+DIRTY_ADMINS_KEY = "physiolog_dirty_assignment_admin_ids"
+SCOPE_G_KEY = "physiolog_scope"
+
+
+@dataclass(frozen=True)
+class Scope:
+    """Whose data the current request sees."""
+
+    user_id: int
+    selected_client_id: int | None = None  # set while an admin observes a client
+
+
+def mark_assignments_dirty(session: Session, admin_user_id: int) -> None:
+    """Invalidate the admin's cached client ids once ``session`` commits."""
+    session.info.setdefault(DIRTY_ADMINS_KEY, set()).add(admin_user_id)
+
+
+class AssignmentCache:
+    """Cached set of client ids per admin (see module docstring)."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.ttl_s = 300.0
+        self.backend: CacheBackend = MemoryBackend()
+
+    def init_app(self, app: Flask, backend: CacheBackend) -> None:
+        self.enabled = coherent_across_workers(app.config, backend, "Admin scope cache")
+        self.ttl_s = float(app.config.get("ADMIN_SCOPE_CACHE_TTL_S", 300))
+        self.backend = backend
+        _register_session_events()
+        app.before_request(_reset_scope)
+
+    def client_ids(self, admin_user_id: int) -> frozenset[int]:
+        if not self.enabled:
+            return self._load(admin_user_id)
+        version = self.backend.version(f"assignments:{admin_user_id}")
+        key = f"client-ids|{admin_user_id}|v{version}"
+        ids = self.backend.get(key)
+        if ids is MISSING:
+            ids = self._load(admin_user_id)
+            self.backend.set(key, ids, self.ttl_s)
+        return ids
+
+    @staticmethod
+    def _load(admin_user_id: int) -> frozenset[int]:
+        return frozenset(
+            db.session.scalars(
+                db.select(AdminClientAssignment.client_user_id).where(
+                    AdminClientAssignment.admin_user_id == admin_user_id
+                )
+            )
+        )
+
+    def invalidate(self, admin_user_ids) -> None:
+        for admin_user_id in admin_user_ids:
+            self.backend.bump_version(f"assignments:{admin_user_id}")
+
+
+assignment_cache = AssignmentCache()
+
+
+def current_scope() -> Scope:
+    """Scope of the authenticated request, resolved once and kept on ``g``."""
+    scope = g.get(SCOPE_G_KEY)
+    if scope is None:
+        scope = _resolve_scope()
+        setattr(g, SCOPE_G_KEY, scope)
+    return scope
+
+
+def _reset_scope() -> None:
+    # g outlives a request when an app context is already pushed
+    g.pop(SCOPE_G_KEY, None)
+
+
+def _resolve_scope() -> Scope:
+    if not current_user.is_admin:
+        return Scope(current_user.id)
+    selected_user_id = session.get("selected_user_id")
+    if (
+        selected_user_id is not None
+        and selected_user_id in assignment_cache.client_ids(current_user.id)
+    ):
+        return Scope(selected_user_id, selected_user_id)
+    return Scope(current_user.id)
+
+
+_session_events_registered = False
+
+
+def _register_session_events() -> None:
+    """Attach the flush/commit listeners once per process."""
+    global _session_events_registered
+    if _session_events_registered:
+        return
+    _session_events_registered = True
+    event.listen(Session, "after_flush", _collect_dirty_admins)
+    event.listen(Session, "after_commit", _invalidate_dirty_admins)
+    event.listen(Session, "after_soft_rollback", _discard_dirty_admins)
+
+
+def _collect_dirty_admins(session: Session, flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, AdminClientAssignment) and obj.admin_user_id is not None:
+            mark_assignments_dirty(session, obj.admin_user_id)
+
+
+def _invalidate_dirty_admins(session: Session) -> None:
+    admin_ids = session.info.pop(DIRTY_ADMINS_KEY, None)
+    if admin_ids:
+        try:
+            assignment_cache.invalidate(admin_ids)
+        except Exception:
+            logger.exception("Assignment cache invalidation failed")
+
+
+def _discard_dirty_admins(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:  # outermost transaction only
+        session.info.pop(DIRTY_ADMINS_KEY, None)
@@ -0,0 +1,156 @@
+"""
+search.py
+
+Indexed substring and prefix search over user names and emails, used by the
+admin clients list.
+
+A leading-wildcard ``ILIKE '%q%'`` cannot use a b-tree index, so each dialect
+gets its own index:
+
+- PostgreSQL: a trigram GIN index (pg_trgm) on ``user_search_text()``, created
+  with the users table (``CREATE EXTENSION pg_trgm`` needs the privilege; see
+  dev_docs/MIGRATION_GUIDE.md). ``LIKE '%q%'`` on the same expression uses it.
+- SQLite: user_search_terms holds every suffix of the lower-cased name and
+  email, truncated to ``TERM_MAX_LEN`` characters. A substring of either
+  string is a prefix of one of those suffixes, so a match is a b-tree range
+  scan ``term >= q AND term < q + U+10FFFF``. The rows of users whose account
+  changed are rebuilt before their transaction commits (the same dirty-account
+  set as background.py), so the index never lags.
+
+In both cases candidates are re-checked with ``LIKE`` and ranked by
+``user_search_rank``: exact match, then prefix, then word prefix, then any
+substring.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from sqlalchemy import (
+    DDL,
+    ColumnElement,
+    case,
+    delete,
+    event,
+    func,
+    insert,
+    or_,
+    select,
+)
+from sqlalchemy.orm import Session
+
+from .background import DIRTY_ACCOUNTS_KEY
+from .models import User, UserSearchTerm
+
+TERM_MAX_LEN = 32
+_TERM_UPPER_BOUND = "\U0010ffff"
+
+
+def normalize_search_query(raw: str) -> str:
+    """Lower-cased, trimmed query with inner whitespace collapsed."""
+    return " ".join(raw.split()).lower()
+
+
+def search_terms(*values: str | None) -> set[str]:
+    """Every suffix (truncated to TERM_MAX_LEN) of each normalized value."""
+    terms: set[str] = set()
+    for value in values:
+        text = normalize_search_query(value or "")
+        for start in range(len(text)):
+            if not text[start].isspace():
+                terms.add(text[start : start + TERM_MAX_LEN])
+    return terms
+
+
+def user_search_text() -> ColumnElement[str]:
+    """Expression covered by the PostgreSQL trigram index."""
+    return func.lower(User.email + " " + func.coalesce(User.name, ""))
+
+
+def user_search_filter(query: str, dialect_name: str) -> ColumnElement[bool]:
+    """Index-backed filter for users whose name or email contains ``query``."""
+    if dialect_name == "postgresql":
+        return user_search_text().contains(query, autoescape=True)
+    prefix = query[:TERM_MAX_LEN]
+    candidates = select(UserSearchTerm.user_id).where(
+        UserSearchTerm.term >= prefix, UserSearchTerm.term < prefix + _TERM_UPPER_BOUND
+    )
+    exact = or_(
+        func.lower(User.email).contains(query, autoescape=True),
+        func.lower(func.coalesce(User.name, "")).contains(query, autoescape=True),
+    )
+    return User.id.in_(candidates) & exact
+
+
+def user_search_rank(query: str) -> ColumnElement[int]:
+    """0 exact, 1 prefix, 2 word prefix, 3 other substring (lower is better)."""
+    email = func.lower(User.email)
+    name = func.lower(func.coalesce(User.name, ""))
+    return case(
+        (or_(email == query, name == query), 0),
+        (
+            or_(
+                email.startswith(query, autoescape=True),
+                name.startswith(query, autoescape=True),
+            ),
+            1,
+        ),
+        (
+            or_(
+                name.contains(" " + query, autoescape=True),
+                *(
+                    email.contains(separator + query, autoescape=True)
+                    for separator in ".@_-+"
+                ),
+            ),
+            2,
+        ),
+        else_=3,
+    )
+
+
+def refresh_search_terms(session: Session, user_ids: Iterable[int]) -> None:
+    """Rebuild user_search_terms rows of ``user_ids`` (no commit)."""
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    session.execute(delete(UserSearchTerm).where(UserSearchTerm.user_id.in_(user_ids)))
+    rows = [
+        {"user_id": user_id, "term": term}
+        for user_id, email, name in session.execute(
+            select(User.id, User.email, User.name).where(User.id.in_(user_ids))
+        )
+        for term in search_terms(email, name)
+    ]
+    if rows:
+        session.execute(insert(UserSearchTerm), rows)
+
+
+_session_events_registered = False
+
+
+def register_session_events() -> None:
+    """Attach the before-commit listener and the PostgreSQL index DDL once."""
+    global _session_events_registered
+    if _session_events_registered:
+        return
+    _session_events_registered = True
+    event.listen(Session, "before_commit", _refresh_dirty_terms)
+    event.listen(
+        User.__table__,
+        "after_create",
+        DDL(
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm;"
+            " CREATE INDEX IF NOT EXISTS ix_users_search_trgm ON users"
+            " USING gin (lower(email || ' ' || coalesce(name, '')) gin_trgm_ops)"
+        ).execute_if(dialect="postgresql"),
+    )
+
+
+def _refresh_dirty_terms(session: Session) -> None:
+    if session.get_bind().dialect.name == "postgresql":
+        return  # served by the trigram index
+    session.flush()  # ORM changes are reported by the flush
+    user_ids = session.info.get(DIRTY_ACCOUNTS_KEY)
+    if user_ids:
+        refresh_search_terms(session, user_ids)
@@ -6,9 +6,39 @@ It imports and exposes service functions to use within the application.
 """
 
 from .openai import run_smoke_test
-from .stats import compute_stats
+from .stats import (
+    METRICS,
+    StatsAccumulator,
+    columns_from_rows,
+    compute_stats,
+    compute_stats_columnar,
+)
 from .entries import (
     build_entry_fields,
+    decode_sync_token,
+    encode_sync_token,
     parse_entry_date_required,
     parse_optional_sleep_total_hhmm,
 )
+from .outliers import (
+    RollingMedianMAD,
+    flag_outliers_batch,
+    mask_outliers,
+    outlier_metrics_batch,
+)
+from .intraday import (
+    INTRADAY_METRICS,
+    build_sample_series,
+    choose_bucket_s,
+    metric_id,
+    parse_series_payload,
+    to_epoch_s,
+)
+from .workouts import (
+    SetInput,
+    estimate_1rm_kg,
+    normalize_exercise,
+    parse_set_item,
+    week_start,
+)
+from .meals import MACRO_COLUMNS, MealItemInput, parse_meal_item
@@ -4,6 +4,8 @@ Entry-related parsing and mapping helpers.
 
 from __future__ import annotations
 
+import base64
+import binascii
 from datetime import date, datetime
 import re
 from typing import Any, Mapping
@@ -53,9 +55,27 @@ def build_entry_fields(
         "body_fat_percent": pick_value("body_fat_percent", "body_fat"),
         "calories_kcal": pick_value("calories_kcal", "calories"),
         "protein_g": pick_value("protein_g", "protein"),
+        "carbs_g": pick_value("carbs_g", "carbs"),
+        "fat_g": pick_value("fat_g", "fat"),
         "training_volume_kg": pick_value("training_volume_kg", "training_volume"),
         "steps_count": pick_value("steps_count", "steps"),
         "sleep_hours": sleep_decimal,
         "sleep_quality": data.get("sleep_quality"),
         "observations": data.get("observations"),
     }
+
+
+def encode_sync_token(user_id: int, since: datetime) -> str:
+    """Build the opaque ``since`` token returned by GET /api/entries/changes."""
+    raw = f"{user_id}|{since.isoformat()}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_sync_token(token: str) -> tuple[int, datetime]:
+    """Parse a token from ``encode_sync_token`` into (user_id, since)."""
+    try:
+        padded = token.strip() + "=" * (-len(token.strip()) % 4)
+        user_part, since_part = base64.urlsafe_b64decode(padded).decode().split("|")
+        return int(user_part), datetime.fromisoformat(since_part)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("Invalid since token") from exc
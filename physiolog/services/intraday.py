@@ -0,0 +1,185 @@
+"""
+intraday.py
+
+Intraday (minute-level) wearable samples: metric registry, payload parsing
+and the day/bucket arithmetic shared by the store (intraday_store.py), the
+API and scripts/import_intraday.py.
+
+Samples are stored as (user, metric id, epoch seconds, value). Timestamps are
+UTC epoch seconds and days are UTC days. Sleep is the exception: a night's
+sleep crosses midnight, so a sleep sample belongs to the day that follows it
+when it is taken after noon (``SLEEP_DAY_OFFSET_S``). A night starting at
+23:00 on Feb 1 then counts as the sleep for Feb 2, matching the manual
+``sleep_hours`` entry for the morning of Feb 2.
+
+Like stats.py, this module avoids Flask and SQLAlchemy dependencies.
+"""
+
+from __future__ import annotations
+
+from datetime import date as Date
+from datetime import datetime, timedelta, timezone
+from typing import Any, Sequence
+
+import numpy as np
+
+# Stable ids stored in intraday_samples.metric (never renumber)
+INTRADAY_METRICS: dict[str, int] = {
+    "heart_rate": 1,  # beats per minute
+    "steps": 2,  # steps since the previous sample
+    "sleep_stage": 3,  # SLEEP_STAGES code
+}
+INTRADAY_METRIC_NAMES: dict[int, str] = {v: k for k, v in INTRADAY_METRICS.items()}
+
+SLEEP_STAGES: dict[str, int] = {"awake": 0, "light": 1, "deep": 2, "rem": 3}
+
+# Each sleep-stage sample covers one minute of the night
+SLEEP_SAMPLE_INTERVAL_S = 60
+
+DAY_S = 86_400
+SLEEP_DAY_OFFSET_S = 12 * 3_600
+
+# Daily HealthEntry column derived from each metric and how it is aggregated
+DAILY_AGGREGATES: dict[int, tuple[str, str]] = {
+    INTRADAY_METRICS["steps"]: ("steps_count", "sum"),
+    INTRADAY_METRICS["sleep_stage"]: ("sleep_hours", "asleep_hours"),
+}
+
+# Resolutions offered to range reads, coarsest last. Raw minute samples are
+# never returned.
+BUCKET_LADDER_S: tuple[int, ...] = (300, 900, 3_600, 3 * 3_600, 6 * 3_600, DAY_S)
+
+
+def metric_id(name: str) -> int:
+    """Metric id for a metric name. Raises ValueError for unknown metrics."""
+    try:
+        return INTRADAY_METRICS[str(name).strip().lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unknown metric {name!r}, expected one of {', '.join(INTRADAY_METRICS)}"
+        ) from None
+
+
+def build_sample_series(
+    metric: str, ts: Sequence[Any], values: Sequence[Any]
+) -> tuple[int, np.ndarray, np.ndarray]:
+    """
+    Validate one metric's samples and return ``(metric_id, ts, values)``.
+
+    Timestamps are whole epoch seconds. The arrays come back sorted by
+    timestamp; for a repeated timestamp the last value wins.
+
+    Raises:
+        ValueError: for unknown metrics, mismatched lengths, non-integer or
+            negative timestamps, and non-finite values.
+    """
+    mid = metric_id(metric)
+    try:
+        ts_arr = np.asarray(ts, dtype=float)
+        val_arr = np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError(f"{metric}: ts and values must be numbers") from None
+    if ts_arr.ndim != 1 or ts_arr.shape != val_arr.shape:
+        raise ValueError(f"{metric}: ts and values must be lists of equal length")
+    if not np.all(np.isfinite(ts_arr)) or np.any(ts_arr < 0) or np.any(ts_arr % 1):
+        raise ValueError(f"{metric}: ts must be non-negative integer epoch seconds")
+    if not np.all(np.isfinite(val_arr)):
+        raise ValueError(f"{metric}: values must be finite numbers")
+    if mid == INTRADAY_METRICS["sleep_stage"] and not np.all(
+        np.isin(val_arr, list(SLEEP_STAGES.values()))
+    ):
+        raise ValueError(f"{metric}: values must be sleep stage codes {SLEEP_STAGES}")
+
+    ts_int = ts_arr.astype(np.int64)
+    # stable sort, then keep the last occurrence of each timestamp
+    order = np.argsort(ts_int, kind="stable")
+    ts_sorted, val_sorted = ts_int[order], val_arr[order]
+    keep = np.ones(ts_sorted.shape, dtype=bool)
+    keep[:-1] = ts_sorted[1:] != ts_sorted[:-1]
+    return mid, ts_sorted[keep], val_sorted[keep]
+
+
+def parse_series_payload(
+    series: Any,
+) -> dict[int, tuple[np.ndarray, np.ndarray]]:
+    """
+    Parse the columnar ingest payload
+    ``[{"metric": "heart_rate", "ts": [...], "values": [...]}, ...]``.
+
+    Returns:
+        dict[int, tuple[np.ndarray, np.ndarray]]: (ts, values) per metric id.
+    """
+    if not isinstance(series, list) or not series:
+        raise ValueError("series must be a non-empty list")
+    parsed: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+    for item in series:
+        if not isinstance(item, dict):
+            raise ValueError("Each series must be an object")
+        metric = item.get("metric")
+        ts, values = item.get("ts"), item.get("values")
+        if not isinstance(ts, list) or not isinstance(values, list):
+            raise ValueError(f"{metric}: ts and values must be lists of equal length")
+        mid, ts_arr, val_arr = build_sample_series(metric, ts, values)
+        if mid in parsed:  # same metric sent twice: merge, later values win
+            prev_ts, prev_val = parsed[mid]
+            _, ts_arr, val_arr = build_sample_series(
+                metric,
+                np.concatenate([prev_ts, ts_arr]),
+                np.concatenate([prev_val, val_arr]),
+            )
+        parsed[mid] = (ts_arr, val_arr)
+    return parsed
+
+
+def day_offset_s(mid: int) -> int:
+    """Seconds added to a timestamp before truncating it to its day."""
+    return SLEEP_DAY_OFFSET_S if mid == INTRADAY_METRICS["sleep_stage"] else 0
+
+
+def day_keys(mid: int, ts: np.ndarray) -> np.ndarray:
+    """Unique day numbers (days since 1970-01-01) the samples belong to."""
+    return np.unique((np.asarray(ts, dtype=np.int64) + day_offset_s(mid)) // DAY_S)
+
+
+def day_key_to_date(key: int) -> Date:
+    return Date(1970, 1, 1) + timedelta(days=int(key))
+
+
+def day_ts_range(mid: int, key: int) -> tuple[int, int]:
+    """Half-open ``[start, end)`` timestamp range of day ``key`` for a metric."""
+    start = int(key) * DAY_S - day_offset_s(mid)
+    return start, start + DAY_S
+
+
+def to_epoch_s(value: str, *, end_of_day: bool = False) -> int:
+    """
+    Parse ``YYYY-MM-DD`` (UTC midnight, or the next midnight with
+    ``end_of_day``) or integer epoch seconds.
+    """
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        day = datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise ValueError("Expected YYYY-MM-DD or epoch seconds") from None
+    if end_of_day:
+        day += timedelta(days=1)
+    return int(day.timestamp())
+
+
+def choose_bucket_s(span_s: int, max_points: int, requested: int | None = None) -> int:
+    """
+    Bucket width for a range read: the requested width rounded up to the
+    ladder, widened until the range fits in ``max_points`` buckets. Past the
+    ladder (ranges longer than ``max_points`` days, or a requested width
+    above a day) buckets are whole days, so they stay aligned to UTC days.
+    """
+    max_points = max(1, max_points)
+    for bucket in BUCKET_LADDER_S:
+        if requested is not None and bucket < requested:
+            continue
+        if -(-span_s // bucket) <= max_points:
+            return bucket
+    width = max(requested or 0, -(-span_s // max_points))
+    return -(-width // DAY_S) * DAY_S
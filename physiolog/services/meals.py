@@ -0,0 +1,75 @@
+"""
+meals.py
+
+Meal-level nutrition helpers: payload parsing and the macro columns rolled
+up into the day's HealthEntry (see meal_writes.py). Like stats.py, this
+module avoids Flask and SQLAlchemy dependencies.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Mapping
+
+from .entries import parse_entry_date_required
+
+# Per-item nutrients, named after the HealthEntry columns they roll up into
+MACRO_COLUMNS: tuple[str, ...] = ("calories_kcal", "protein_g", "carbs_g", "fat_g")
+
+# Atwater factors, used when an item has macros but no calories
+KCAL_PER_G: dict[str, float] = {"protein_g": 4.0, "carbs_g": 4.0, "fat_g": 9.0}
+
+
+@dataclass(frozen=True)
+class MealItemInput:
+    """One validated item from a POST /api/meals/items payload."""
+
+    date: date
+    name: str
+    meal: str | None
+    calories_kcal: float
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+
+    def macros(self) -> dict[str, float]:
+        return {column: getattr(self, column) for column in MACRO_COLUMNS}
+
+
+def _parse_amount(item: Mapping[str, Any], key: str, upper: float) -> float | None:
+    value = item.get(key)
+    if value is None:
+        return None
+    if (
+        isinstance(value, bool)
+        or not isinstance(value, (int, float))
+        or not 0 <= value <= upper
+    ):
+        raise ValueError(f"{key} must be a number between 0 and {upper:g}")
+    return float(value)
+
+
+def parse_meal_item(item: Mapping[str, Any]) -> MealItemInput:
+    """
+    Validate one item ``{date, name, meal?, calories_kcal?, protein_g?,
+    carbs_g?, fat_g?}``. Missing macros count as 0. Missing calories are
+    derived from the macros.
+    """
+    entry_date = parse_entry_date_required(item)
+    name = " ".join(str(item.get("name") or "").split())
+    if not name:
+        raise ValueError("name is required")
+    meal = " ".join(str(item.get("meal") or "").split()).lower() or None
+
+    grams = {column: _parse_amount(item, column, 2000) or 0.0 for column in KCAL_PER_G}
+    calories = _parse_amount(item, "calories_kcal", 10000)
+    if calories is None:
+        calories = sum(grams[column] * factor for column, factor in KCAL_PER_G.items())
+    return MealItemInput(
+        date=entry_date,
+        name=name[:200],
+        meal=meal[:50] if meal else None,
+        calories_kcal=calories,
+        **grams,
+    )
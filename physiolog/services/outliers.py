@@ -0,0 +1,253 @@
+"""
+outliers.py
+
+Robust outlier detection for body-composition measurements.
+
+Bioimpedance body-fat readings and weigh-ins spike frequently (hydration,
+scale placement, time of day). A reading is flagged when it sits too far from
+the median of the user's previous ``window`` readings, measured in robust
+standard deviations (modified z-score with the MAD, Iglewicz & Hoaglin 1993):
+
+    |x - median| / (1.4826 * MAD) > threshold
+
+Each metric is judged on its own. An entry's flags are a bitmask with one
+bit per ``OUTLIER_METRICS`` entry (``OUTLIER_BITS``), so a body-fat spike
+does not hide the weight reading of the same day (``mask_outliers``).
+
+Like stats.py, this module avoids Flask and SQLAlchemy dependencies.
+
+Use cases
+---------
+1. Streaming (one user, in date order):
+
+    >>> detector = RollingMedianMAD(window=15)
+    >>> flags = [detector.check_and_push(w, min_scale=0.5) for w in weights]
+
+2. Vectorized backfill over an existing history (see scripts/backfill_outliers.py):
+
+    >>> flag_outliers_batch(np.array(weights, dtype=float), window=15)
+"""
+
+from __future__ import annotations
+
+import math
+import warnings
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+
+# Metrics checked for spikes (HealthEntry attribute names)
+OUTLIER_METRICS: tuple[str, ...] = ("weight_kg", "body_fat_percent")
+
+# Bit of each metric in HealthEntry.outlier_metrics (never renumber)
+OUTLIER_BITS: dict[str, int] = {
+    metric: 1 << index for index, metric in enumerate(OUTLIER_METRICS)
+}
+
+# Defaults, overridable through OUTLIER_* settings in config.py
+OUTLIER_WINDOW = 15
+OUTLIER_THRESHOLD = 3.5
+OUTLIER_MIN_HISTORY = 5
+
+# Smallest robust spread assumed per metric, so a run of identical readings
+# (MAD == 0) does not turn every later change into an outlier.
+OUTLIER_MIN_SCALE: dict[str, float] = {
+    "weight_kg": 0.5,
+    "body_fat_percent": 0.75,
+}
+
+# Scales the MAD to a standard deviation for normally distributed data
+MAD_TO_SIGMA = 1.4826
+
+
+class RollingMedianMAD:
+    """
+    Sliding window of the last ``window`` values with median and MAD queries.
+
+    Values are kept in a sorted list next to a FIFO of arrival order. Inserts
+    and evictions locate their position by binary search (O(log w)
+    comparisons; the list shift is a memmove, negligible for per-user windows).
+    The median is O(1) and the MAD is an O(log w) selection over the two sorted
+    runs of deviations on either side of the median.
+    """
+
+    def __init__(self, window: int = OUTLIER_WINDOW) -> None:
+        if window < 1:
+            raise ValueError("window must be a positive integer")
+        self.window = window
+        self._fifo: deque[float] = deque()
+        self._sorted: list[float] = []
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def push(self, value: float) -> None:
+        """Add a value, evicting the oldest one once the window is full."""
+        self._fifo.append(value)
+        insort(self._sorted, value)
+        if len(self._fifo) > self.window:
+            oldest = self._fifo.popleft()
+            del self._sorted[bisect_left(self._sorted, oldest)]
+
+    def median(self) -> float | None:
+        """Median of the current window, or None if empty."""
+        n = len(self._sorted)
+        if n == 0:
+            return None
+        mid = n // 2
+        if n % 2:
+            return self._sorted[mid]
+        return (self._sorted[mid - 1] + self._sorted[mid]) / 2
+
+    def _kth_deviation(self, k: int, center: float) -> float:
+        """k-th smallest (0-based) |x - center| over the window."""
+        s = self._sorted
+        split = bisect_left(s, center)
+        left_len, right_len = split, len(s) - split
+
+        def left(i: int) -> float:  # ascending deviations below the center
+            return center - s[split - 1 - i]
+
+        def right(j: int) -> float:  # ascending deviations above the center
+            return s[split + j] - center
+
+        lo, hi = max(0, k + 1 - right_len), min(k + 1, left_len)
+        while lo < hi:
+            i = (lo + hi) // 2
+            j = k + 1 - i
+            if j > 0 and left(i) < right(j - 1):
+                lo = i + 1
+            else:
+                hi = i
+        i, j = lo, k + 1 - lo
+        return max(
+            left(i - 1) if i > 0 else -math.inf,
+            right(j - 1) if j > 0 else -math.inf,
+        )
+
+    def mad(self) -> float | None:
+        """Median absolute deviation from the median, or None if empty."""
+        center = self.median()
+        if center is None:
+            return None
+        n = len(self._sorted)
+        mid = n // 2
+        if n % 2:
+            return self._kth_deviation(mid, center)
+        return (
+            self._kth_deviation(mid - 1, center) + self._kth_deviation(mid, center)
+        ) / 2
+
+    def is_outlier(
+        self,
+        value: float,
+        *,
+        threshold: float = OUTLIER_THRESHOLD,
+        min_history: int = OUTLIER_MIN_HISTORY,
+        min_scale: float = 0.0,
+    ) -> bool:
+        """Whether ``value`` is an outlier relative to the current window."""
+        if len(self._sorted) < min_history:
+            return False
+        center = self.median()
+        mad = self.mad()
+        assert center is not None and mad is not None
+        scale = max(MAD_TO_SIGMA * mad, min_scale)
+        if scale == 0:
+            return value != center
+        return abs(value - center) / scale > threshold
+
+    def check_and_push(self, value: float, **kwargs: Any) -> bool:
+        """Test ``value`` against the window, then add it. Returns the flag."""
+        flagged = self.is_outlier(value, **kwargs)
+        self.push(value)
+        return flagged
+
+
+def flag_outliers_batch(
+    values: np.ndarray,
+    *,
+    window: int = OUTLIER_WINDOW,
+    threshold: float = OUTLIER_THRESHOLD,
+    min_history: int = OUTLIER_MIN_HISTORY,
+    min_scale: float = 0.0,
+) -> np.ndarray:
+    """
+    Vectorized equivalent of feeding ``values`` through ``check_and_push``.
+
+    Args:
+        values:
+            One user's readings of one metric in chronological order; NaN marks
+            missing days, which are skipped (never flagged, not in the window).
+
+    Returns:
+        np.ndarray: Boolean array of the same length as ``values``.
+    """
+    values = np.asarray(values, dtype=float)
+    flags = np.zeros(values.shape, dtype=bool)
+    present_idx = np.flatnonzero(~np.isnan(values))
+    present = values[present_idx]
+    if present.size == 0:
+        return flags
+
+    # Row i holds the `window` readings before present[i] (NaN-padded at start)
+    padded = np.concatenate([np.full(window, np.nan), present[:-1]])
+    history = np.lib.stride_tricks.sliding_window_view(padded, window)
+    history_len = np.count_nonzero(~np.isnan(history), axis=1)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)  # all-NaN rows
+        center = np.nanmedian(history, axis=1)
+        mad = np.nanmedian(np.abs(history - center[:, None]), axis=1)
+
+    scale = np.maximum(MAD_TO_SIGMA * mad, min_scale)
+    deviation = np.abs(present - center)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        outlying = np.where(scale > 0, deviation / scale > threshold, deviation > 0)
+    flags[present_idx] = (history_len >= min_history) & outlying
+    return flags
+
+
+def outlier_metrics_batch(
+    columns: Mapping[str, Any],
+    *,
+    window: int = OUTLIER_WINDOW,
+    threshold: float = OUTLIER_THRESHOLD,
+    min_history: int = OUTLIER_MIN_HISTORY,
+) -> np.ndarray:
+    """
+    ``OUTLIER_BITS`` bitmasks (int array) for one user's entries given as
+    columns in date order: each metric is flagged by ``flag_outliers_batch``.
+    """
+    lengths = {len(values) for values in columns.values()}
+    flags = np.zeros(lengths.pop() if lengths else 0, dtype=np.int64)
+    for metric in OUTLIER_METRICS:
+        if metric not in columns:
+            continue
+        metric_flags = flag_outliers_batch(
+            np.asarray(columns[metric], dtype=float),
+            window=window,
+            threshold=threshold,
+            min_history=min_history,
+            min_scale=OUTLIER_MIN_SCALE.get(metric, 0.0),
+        )
+        flags[metric_flags] |= OUTLIER_BITS[metric]
+    return flags
+
+
+def mask_outliers(
+    columns: Mapping[str, np.ndarray], outlier_metrics: Sequence[int] | np.ndarray
+) -> dict[str, np.ndarray]:
+    """
+    Copy of ``columns`` with each ``OUTLIER_METRICS`` column set to NaN on the
+    rows whose ``outlier_metrics`` bitmask flags that metric.
+    """
+    outlier_metrics = np.asarray(outlier_metrics, dtype=np.int64)
+    masked = dict(columns)
+    for metric in OUTLIER_METRICS:
+        if metric in masked:
+            flagged = (outlier_metrics & OUTLIER_BITS[metric]) != 0
+            masked[metric] = np.where(flagged, np.nan, masked[metric])
+    return masked
@@ -31,11 +31,52 @@ Use cases
     ...     steps_count: int | None = 8000
     ...     sleep_hours: float | None = 7.5
     >>> compute_stats([FakeEntry()])
+
+4. Dispersion and percentiles:
+    Standard deviation, min/max and approximate quantiles are computed in the
+    same streaming pass. Memory stays bounded because quantiles come from a
+    t-digest sketch rather than from a stored copy of the values.
+
+    >>> compute_stats(HealthEntry.query.yield_per(100), dispersion=True,
+    ...               quantiles=(0.25, 0.5, 0.75))
+
+5. Parallel / sharded aggregation:
+    ``StatsAccumulator`` holds the running state of ``compute_stats``. Partial
+    accumulators built in separate processes, chunks or database shards can be
+    merged (map-reduce style) and finalized. Counts, averages, variances and
+    min/max match the single pass exactly. Quantiles match it only while every
+    part still fits in the t-digest buffer (500 values). Past that, merged
+    digests are compressed differently, and the estimates agree with the true
+    quantiles to within the sketch's rank error, well under 1% for the
+    default compression.
+
+    >>> from concurrent.futures import ProcessPoolExecutor
+    >>> from functools import reduce
+    >>> def partial_stats(chunk):
+    ...     acc = StatsAccumulator()
+    ...     acc.update_batch(chunk)  # {"weight_kg": [...], "steps_count": [...]}
+    ...     return acc.to_dict()     # JSON-friendly, safe to ship across processes
+    >>> with ProcessPoolExecutor() as pool:
+    ...     dicts = pool.map(partial_stats, chunks)
+    ...     parts = [StatsAccumulator.from_dict(d) for d in dicts]
+    >>> reduce(StatsAccumulator.merge, parts).finalize()
+
+6. Columnar / vectorized:
+    When the data is already columnar (a pandas DataFrame, a dict of NumPy
+    arrays or a column-only SQL select), ``compute_stats_columnar`` produces
+    the same output with nan-aware NumPy reductions instead of per-entry
+    ``getattr``/``float`` calls. See scripts/benchmark_stats.py.
+
+    >>> df = pd.read_csv("data/health_data.csv")  # after column mapping
+    >>> compute_stats_columnar(df, dispersion=True)
 """
 
 from __future__ import annotations
 
-from typing import Iterable, Protocol
+import math
+from typing import Any, Iterable, Mapping, Protocol, Sequence
+
+import numpy as np
 
 # from .models import HealthEntry
 # Map output statistic keys -> HealthEntry attribute names
@@ -88,39 +129,568 @@ class HasHealthMetrics(Protocol):
     sleep_hours: float | None
 
 
-def compute_stats(entries: Iterable[HasHealthMetrics]) -> dict[str, float | int | None]:
+def stat_suffix(stat_key: str) -> str:
+    """Return the metric of a ``METRICS`` key (``"avg_weight"`` -> ``"weight"``)."""
+    return stat_key.removeprefix("avg_")
+
+
+def quantile_label(q: float) -> str:
+    """Return the output key prefix for a quantile (``0.5`` -> ``"p50"``)."""
+    return f"p{q * 100:g}"
+
+
+class TDigest:
+    """
+    Merging t-digest sketch for approximate quantiles over a stream.
+
+    Values are buffered and periodically compressed into at most
+    ~``compression`` weighted centroids, so memory is bounded regardless of how
+    many values are added. Centroids near the tails are kept small (k1 scale
+    function), which keeps extreme percentiles accurate.
+
+    See: T. Dunning and O. Ertl, "Computing Extremely Accurate Quantiles Using
+    t-Digests" (2019), arXiv:1902.04023
+    """
+
+    def __init__(self, compression: float = 100.0) -> None:
+        self.compression = float(compression)
+        self.means: list[float] = []
+        self.weights: list[float] = []
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: list[float] = []
+        self._buffer_limit = max(int(self.compression) * 5, 50)
+
+    def add(self, value: float) -> None:
+        """Add a single observation."""
+        self._buffer.append(value)
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def add_many(self, values: Sequence[float]) -> None:
+        """
+        Add observations in order. Builds the same sketch as calling ``add``
+        for each value, one buffer-sized slice at a time.
+        """
+        start = 0
+        while start < len(values):
+            chunk = values[start : start + self._buffer_limit - len(self._buffer)]
+            start += len(chunk)
+            self._buffer.extend(chunk)
+            self.count += len(chunk)
+            self.min = min(self.min, min(chunk))
+            self.max = max(self.max, max(chunk))
+            if len(self._buffer) >= self._buffer_limit:
+                self._compress()
+
+    def _k_limit(self, q: float) -> float:
+        """Largest cumulative quantile reachable from ``q`` within one k-unit."""
+        k = self.compression / (2 * math.pi) * math.asin(2 * q - 1) + 1
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _compress(self, extra: Iterable[tuple[float, float]] = ()) -> None:
+        points = list(zip(self.means, self.weights))
+        points.extend((value, 1.0) for value in self._buffer)
+        points.extend(extra)
+        self._buffer = []
+        if not points:
+            return
+        points.sort(key=lambda point: point[0])
+        total = sum(weight for _, weight in points)
+
+        means: list[float] = []
+        weights: list[float] = []
+        cum_weight = 0.0
+        cur_mean, cur_weight = points[0]
+        q_limit = self._k_limit(0.0)
+        for mean, weight in points[1:]:
+            if (cum_weight + cur_weight + weight) / total <= q_limit:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                means.append(cur_mean)
+                weights.append(cur_weight)
+                cum_weight += cur_weight
+                q_limit = self._k_limit(cum_weight / total)
+                cur_mean, cur_weight = mean, weight
+        means.append(cur_mean)
+        weights.append(cur_weight)
+        self.means, self.weights = means, weights
+
+    def merge(self, other: TDigest) -> TDigest:
+        """
+        Fold another digest into this one (in place) and return self.
+        Exact only while both are still uncompressed buffers; otherwise the
+        result is a sketch of the union with the usual rank error.
+        """
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if not other.means and not self.means:
+            # Both still raw: keep exact values while they fit in the buffer
+            self._buffer.extend(other._buffer)
+            if len(self._buffer) >= self._buffer_limit:
+                self._compress()
+        else:
+            self._compress(
+                list(zip(other.means, other.weights))
+                + [(value, 1.0) for value in other._buffer]
+            )
+        return self
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-friendly snapshot of the sketch (see ``from_dict``)."""
+        return {
+            "compression": self.compression,
+            "means": list(self.means),
+            "weights": list(self.weights),
+            "buffer": list(self._buffer),
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> TDigest:
+        """Rebuild a sketch from ``to_dict`` output."""
+        digest = cls(compression=data["compression"])
+        digest.means = [float(v) for v in data["means"]]
+        digest.weights = [float(v) for v in data["weights"]]
+        digest._buffer = [float(v) for v in data["buffer"]]
+        digest.count = float(data["count"])
+        if data["min"] is not None:
+            digest.min = float(data["min"])
+            digest.max = float(data["max"])
+        return digest
+
+    def quantile(self, q: float) -> float | None:
+        """Return the approximate ``q`` quantile (0 <= q <= 1), or None if empty."""
+        if not 0.0 <= q <= 1.0:
+            raise ValueError("quantile must be between 0 and 1")
+        self._compress()
+        if not self.means:
+            return None
+        if len(self.means) == 1:
+            return self.means[0]
+
+        target = q * self.count
+        first_half = self.weights[0] / 2
+        if target <= first_half:
+            if first_half <= 0.5:
+                return self.means[0]
+            frac = target / first_half
+            return self.min + (self.means[0] - self.min) * frac
+
+        last_half = self.weights[-1] / 2
+        if target >= self.count - last_half:
+            if last_half <= 0.5:
+                return self.means[-1]
+            frac = (self.count - target) / last_half
+            return self.max - (self.max - self.means[-1]) * frac
+
+        cum_weight = first_half
+        for i in range(len(self.means) - 1):
+            step = (self.weights[i] + self.weights[i + 1]) / 2
+            if target <= cum_weight + step:
+                frac = (target - cum_weight) / step
+                return self.means[i] + (self.means[i + 1] - self.means[i]) * frac
+            cum_weight += step
+        return self.means[-1]
+
+
+class MetricAccumulator:
+    """
+    Streaming summary of a single metric.
+
+    Keeps the running sum (for the mean reported by ``compute_stats``), the
+    Welford mean/M2 pair (for a numerically stable variance), min/max and an
+    optional ``TDigest`` for quantiles. Every update is O(1) amortized.
+    """
+
+    def __init__(self, track_quantiles: bool = False) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+        self.digest: TDigest | None = TDigest() if track_quantiles else None
+
+    def add(self, value: float) -> None:
+        """Add a single (non-missing) observation."""
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if self.digest is not None:
+            self.digest.add(value)
+
+    def merge(self, other: MetricAccumulator) -> MetricAccumulator:
+        """
+        Fold another accumulator into this one (in place) and return self.
+        Uses the Chan et al. pairwise update for the Welford mean/M2.
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.mean, self.m2 = other.mean, other.m2
+        else:
+            count = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / count
+            self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count += other.count
+        self.total += other.total
+        if self.min is None or (other.min is not None and other.min < self.min):
+            self.min = other.min
+        if self.max is None or (other.max is not None and other.max > self.max):
+            self.max = other.max
+        if self.digest is not None and other.digest is not None:
+            self.digest.merge(other.digest)
+        elif self.digest is not None or other.digest is not None:
+            raise ValueError("cannot merge accumulators with and without quantiles")
+        return self
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-friendly snapshot of the accumulator (see ``from_dict``)."""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min,
+            "max": self.max,
+            "digest": self.digest.to_dict() if self.digest is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> MetricAccumulator:
+        """Rebuild an accumulator from ``to_dict`` output."""
+        acc = cls()
+        acc.count = int(data["count"])
+        acc.total = float(data["total"])
+        acc.mean = float(data["mean"])
+        acc.m2 = float(data["m2"])
+        acc.min = data["min"]
+        acc.max = data["max"]
+        if data.get("digest") is not None:
+            acc.digest = TDigest.from_dict(data["digest"])
+        return acc
+
+    def average(self) -> float | None:
+        """Arithmetic mean, or None if no values were seen."""
+        if self.count == 0:
+            return None
+        return self.total / self.count
+
+    def variance(self) -> float | None:
+        """
+        Population variance (divides by N, as the metabolism page does).
+        None when fewer than two values were seen.
+        """
+        if self.count < 2:
+            return None
+        return self.m2 / self.count
+
+
+def _round_or_none(value: float | None, ndigits: int = 2) -> float | None:
+    return None if value is None else round(value, ndigits)
+
+
+def _as_float_array(values: Any) -> np.ndarray:
+    """Convert a column (list with None, NumPy array, pandas Series) to float64."""
+    if hasattr(values, "to_numpy"):
+        return values.to_numpy(dtype=float, na_value=np.nan)
+    return np.asarray(values, dtype=float)
+
+
+def _columnar_shape(columns: Mapping[str, Any]) -> tuple[int, set[str]]:
+    """Return (row count, column names) of a DataFrame or mapping of columns."""
+    if hasattr(columns, "columns") and hasattr(columns, "index"):
+        return len(columns.index), set(columns.columns)  # pandas DataFrame
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("all columns must have the same length")
+    return (lengths.pop() if lengths else 0), set(columns)
+
+
+def _batch_accumulator(values: np.ndarray, track_quantiles: bool) -> MetricAccumulator:
+    """Summarize a float column (NaN = missing) with vectorized reductions."""
+    acc = MetricAccumulator(track_quantiles=track_quantiles)
+    present = values[~np.isnan(values)]
+    if present.size == 0:
+        return acc
+    acc.count = int(present.size)
+    acc.total = float(present.sum())
+    acc.mean = acc.total / acc.count
+    acc.m2 = float(np.square(present - acc.mean).sum())
+    acc.min = float(present.min())
+    acc.max = float(present.max())
+    if acc.digest is not None:
+        acc.digest.add_many(present.tolist())
+    return acc
+
+
+def columns_from_rows(
+    rows: Iterable[Sequence[Any]], names: Sequence[str]
+) -> dict[str, np.ndarray]:
+    """
+    Turn row tuples (e.g. from a column-only SQL select) into float columns.
+
+    >>> query = select(HealthEntry.weight_kg, HealthEntry.steps_count)
+    >>> rows = db.session.execute(query)
+    >>> columns_from_rows(rows, ["weight_kg", "steps_count"])
+    """
+    rows = list(rows)
+    return {
+        name: np.array([row[i] for row in rows], dtype=float)
+        for i, name in enumerate(names)
+    }
+
+
+def _validate_quantiles(quantiles: Sequence[float] | None) -> tuple[float, ...]:
+    values = tuple(quantiles or ())
+    for q in values:
+        if not 0.0 <= q <= 1.0:
+            raise ValueError("quantiles must be between 0 and 1")
+    return values
+
+
+class StatsAccumulator:
+    """
+    Mergeable running state of ``compute_stats`` for every ``METRICS`` field.
+
+    Feed it entries one at a time (``update``) or as columns (``update_batch``),
+    combine partial results from other chunks/processes/shards with ``merge``,
+    ship it across process boundaries with ``to_dict``/``from_dict`` and turn
+    it into the ``compute_stats`` output with ``finalize``.
+
+    Args:
+        track_quantiles:
+            Keep a t-digest per metric so ``finalize`` can report quantiles.
+            Accumulators can only be merged with others of the same kind.
+    """
+
+    def __init__(self, track_quantiles: bool = False) -> None:
+        self.track_quantiles = track_quantiles
+        self.total_entries = 0
+        self.metrics: dict[str, MetricAccumulator] = {
+            stat_key: MetricAccumulator(track_quantiles=track_quantiles)
+            for stat_key in METRICS
+        }
+
+    def update(self, entry: HasHealthMetrics) -> None:
+        """Add one entry (any object matching ``HasHealthMetrics``)."""
+        self.total_entries += 1
+        for stat_key, attr_name in METRICS.items():
+            value = getattr(entry, attr_name)
+            if value is not None:
+                self.metrics[stat_key].add(float(value))
+
+    def update_batch(self, columns: Mapping[str, Sequence[Any]]) -> None:
+        """
+        Add a batch of entries given as columns.
+
+        Args:
+            columns:
+                pandas DataFrame or mapping of ``HealthEntry`` attribute names
+                (e.g. ``"weight_kg"``) to equal-length sequences or arrays; one
+                position per entry. None/NaN
+                mark missing values, and metrics without a column count as
+                missing for the whole batch.
+        """
+        row_count, available = _columnar_shape(columns)
+        self.total_entries += row_count
+        for stat_key, attr_name in METRICS.items():
+            if attr_name not in available:
+                continue
+            self.metrics[stat_key].merge(
+                _batch_accumulator(
+                    _as_float_array(columns[attr_name]), self.track_quantiles
+                )
+            )
+
+    def merge(self, other: StatsAccumulator) -> StatsAccumulator:
+        """
+        Fold another accumulator into this one (in place) and return self.
+
+        Counts, averages, variances and min/max come out exactly as a single
+        pass over both inputs. Quantiles do only while both sides are still
+        uncompressed (500 values per metric or fewer in total); past that they
+        are approximate, within the t-digest rank error, and can differ from
+        what a single pass reports.
+        """
+        if other.track_quantiles != self.track_quantiles:
+            raise ValueError("cannot merge accumulators with and without quantiles")
+        self.total_entries += other.total_entries
+        for stat_key, acc in self.metrics.items():
+            acc.merge(other.metrics[stat_key])
+        return self
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-friendly (and picklable) snapshot, see ``from_dict``."""
+        return {
+            "track_quantiles": self.track_quantiles,
+            "total_entries": self.total_entries,
+            "metrics": {k: acc.to_dict() for k, acc in self.metrics.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> StatsAccumulator:
+        """Rebuild an accumulator from ``to_dict`` output."""
+        acc = cls(track_quantiles=bool(data["track_quantiles"]))
+        acc.total_entries = int(data["total_entries"])
+        for stat_key in METRICS:
+            acc.metrics[stat_key] = MetricAccumulator.from_dict(
+                data["metrics"][stat_key]
+            )
+        return acc
+
+    def finalize(
+        self,
+        *,
+        dispersion: bool = False,
+        quantiles: Sequence[float] | None = None,
+    ) -> dict[str, float | int | None]:
+        """Return the ``compute_stats`` dictionary for the data seen so far."""
+        quantiles = _validate_quantiles(quantiles)
+        if quantiles and not self.track_quantiles:
+            raise ValueError("quantiles require StatsAccumulator(track_quantiles=True)")
+
+        result: dict[str, float | int | None] = {
+            k: _round_or_none(acc.average()) for k, acc in self.metrics.items()
+        }
+        result["total_entries"] = self.total_entries
+
+        for stat_key, acc in self.metrics.items():
+            name = stat_suffix(stat_key)
+            if dispersion:
+                variance = acc.variance()
+                result[f"var_{name}"] = _round_or_none(variance)
+                result[f"std_{name}"] = _round_or_none(
+                    math.sqrt(variance) if variance is not None else None
+                )
+                result[f"min_{name}"] = _round_or_none(acc.min)
+                result[f"max_{name}"] = _round_or_none(acc.max)
+            if acc.digest is not None:
+                for q in quantiles:
+                    result[f"{quantile_label(q)}_{name}"] = _round_or_none(
+                        acc.digest.quantile(q)
+                    )
+        return result
+
+
+def compute_stats(
+    entries: Iterable[HasHealthMetrics],
+    *,
+    dispersion: bool = False,
+    quantiles: Sequence[float] | None = None,
+) -> dict[str, float | int | None]:
     """
     Compute aggregate statistics from an iterable of health-metric objects.
 
     The function processes entries in a single pass, making it memory-efficient
-    for large datasets or streaming database queries.
+    for large datasets or streaming database queries. Optional dispersion and
+    quantile statistics are computed in that same pass with bounded memory.
 
     Args:
         entries:
             Any iterable of objects matching the ``HasHealthMetrics`` protocol.
+        dispersion:
+            If True, also report ``var_<metric>``, ``std_<metric>``,
+            ``min_<metric>`` and ``max_<metric>`` for every metric.
+        quantiles:
+            Optional quantiles in [0, 1] (e.g. ``(0.5, 0.9)``) reported as
+            ``p50_<metric>``, ``p90_<metric>``. Values are t-digest estimates;
+            they are exact for small samples.
 
     Returns:
         dict[str, float | int | None]:
             Dictionary containing averaged metrics and total entry count.
-            Keys are defined by ``METRICS`` plus ``total_entries``.
+            Keys are defined by ``METRICS`` plus ``total_entries`` and any
+            requested dispersion or quantile keys.
     """
-    sums: dict[str, float] = {stat_key: 0.0 for stat_key in METRICS}
-    counts: dict[str, int] = {stat_key: 0 for stat_key in METRICS}
-    total_entries = 0
-
+    quantiles = _validate_quantiles(quantiles)
+    acc = StatsAccumulator(track_quantiles=bool(quantiles))
     for e in entries:
-        total_entries += 1
-        for stat_key, attr_name in METRICS.items():
-            value = getattr(e, attr_name)
-            if value is not None:
-                sums[stat_key] += float(value)
-                counts[stat_key] += 1
+        acc.update(e)
+    return acc.finalize(dispersion=dispersion, quantiles=quantiles)
 
-    def avg(stat_key: str) -> float | None:
-        if counts[stat_key] == 0:
-            return None
-        return round(sums[stat_key] / counts[stat_key], 2)
 
-    result: dict[str, float | int | None] = {k: avg(k) for k in METRICS}
+def compute_stats_columnar(
+    columns: Mapping[str, Any],
+    *,
+    dispersion: bool = False,
+    quantiles: Sequence[float] | None = None,
+) -> dict[str, float | int | None]:
+    """
+    Vectorized ``compute_stats`` for columnar input.
+
+    Args:
+        columns:
+            A pandas DataFrame or a mapping of ``HealthEntry`` attribute names
+            (e.g. ``"weight_kg"``) to equal-length arrays; None/NaN mark missing
+            values and absent metrics are reported as None.
+        dispersion:
+            Same as ``compute_stats``.
+        quantiles:
+            Same as ``compute_stats``, but exact: ``np.quantile`` with the
+            interpolation (``"hazen"``) that ``TDigest`` applies while every
+            value is its own centroid. Both paths report the same quantiles
+            for a few dozen values per metric; past that ``compute_stats``
+            returns t-digest estimates of these.
+
+    Returns:
+        dict[str, float | int | None]: Same keys and rounding as ``compute_stats``.
+    """
+    quantiles = _validate_quantiles(quantiles)
+    total_entries, available = _columnar_shape(columns)
+
+    result: dict[str, float | int | None] = {}
+    extra: dict[str, float | None] = {}
+    for stat_key, attr_name in METRICS.items():
+        name = stat_suffix(stat_key)
+        values = (
+            _as_float_array(columns[attr_name])
+            if attr_name in available
+            else np.empty(0)
+        )
+        present = values[~np.isnan(values)]
+        count = int(present.size)
+
+        result[stat_key] = _round_or_none(float(present.mean()) if count else None)
+        if dispersion:
+            variance = float(present.var()) if count >= 2 else None
+            extra[f"var_{name}"] = _round_or_none(variance)
+            extra[f"std_{name}"] = _round_or_none(
+                math.sqrt(variance) if variance is not None else None
+            )
+            low = float(present.min()) if count else None
+            high = float(present.max()) if count else None
+            extra[f"min_{name}"] = _round_or_none(low)
+            extra[f"max_{name}"] = _round_or_none(high)
+        if quantiles:
+            points = (
+                np.quantile(present, quantiles, method="hazen").tolist()
+                if count
+                else [None] * len(quantiles)
+            )
+            for q, point in zip(quantiles, points):
+                extra[f"{quantile_label(q)}_{name}"] = _round_or_none(point)
+
     result["total_entries"] = total_entries
+    result.update(extra)
     return result
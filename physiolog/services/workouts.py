@@ -0,0 +1,90 @@
+"""
+workouts.py
+
+Set-level training helpers: payload parsing, exercise naming, set volume,
+estimated one-rep max and week bucketing. Used by workout_writes.py and the
+/api/workouts routes. Like stats.py, this module avoids Flask and SQLAlchemy
+dependencies.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Mapping
+
+from .entries import parse_entry_date_required
+
+# Sets above this many reps are too far from a single to estimate a 1RM from
+E1RM_MAX_REPS = 12
+
+
+@dataclass(frozen=True)
+class SetInput:
+    """One validated set from a POST /api/workouts/sets item."""
+
+    date: date
+    exercise: str
+    reps: int
+    load_kg: float
+    workout: str | None = None
+
+    @property
+    def volume_kg(self) -> float:
+        return set_volume_kg(self.reps, self.load_kg)
+
+    @property
+    def e1rm_kg(self) -> float | None:
+        return estimate_1rm_kg(self.reps, self.load_kg)
+
+
+def normalize_exercise(name: Any) -> str:
+    """Canonical exercise key: trimmed, lower-case, single spaces."""
+    normalized = " ".join(str(name or "").split()).lower()
+    if not normalized:
+        raise ValueError("exercise is required")
+    if len(normalized) > 100:
+        raise ValueError("exercise must be at most 100 characters")
+    return normalized
+
+
+def set_volume_kg(reps: int, load_kg: float) -> float:
+    """Training volume (tonnage) of one set."""
+    return reps * load_kg
+
+
+def estimate_1rm_kg(reps: int, load_kg: float) -> float | None:
+    """Epley estimate of the one-rep max, or None when reps are out of range."""
+    if reps < 1 or reps > E1RM_MAX_REPS or load_kg <= 0:
+        return None
+    if reps == 1:
+        return load_kg
+    return load_kg * (1 + reps / 30)
+
+
+def week_start(day: date) -> date:
+    """Monday of the ISO week containing ``day``."""
+    return day - timedelta(days=day.weekday())
+
+
+def parse_set_item(item: Mapping[str, Any]) -> SetInput:
+    """Validate one set item ``{date, exercise, reps, load_kg, workout?}``."""
+    entry_date = parse_entry_date_required(item)
+    exercise = normalize_exercise(item.get("exercise"))
+
+    reps = item.get("reps")
+    if isinstance(reps, bool) or not isinstance(reps, int) or not 1 <= reps <= 1000:
+        raise ValueError("reps must be an integer between 1 and 1000")
+
+    load = item.get("load_kg", 0)
+    if (
+        isinstance(load, bool)
+        or not isinstance(load, (int, float))
+        or not 0 <= load <= 1000
+    ):
+        raise ValueError("load_kg must be a number between 0 and 1000")
+
+    workout = item.get("workout")
+    if workout is not None:
+        workout = str(workout).strip()[:100] or None
+    return SetInput(entry_date, exercise, reps, float(load), workout)
@@ -0,0 +1,106 @@
+"""
+summaries.py
+
+Transactional maintenance of UserSummary rows (entry count, first and last
+entry date, last write time).
+
+Right before a transaction commits, the summaries of every user whose data it
+touched are recomputed with one ``INSERT ... SELECT ... GROUP BY ... ON
+CONFLICT DO UPDATE`` over those users' entries, inside the same transaction.
+The set of users is the one the recompute queue already tracks
+(``mark_user_dirty`` and ORM flushes, see background.py). ORM writes, the Core
+statements in entry_writes.py and the import scripts therefore all keep the
+summary exact, and no writer has to update it by hand. Each refresh reads
+only the touched users' rows through the (user_id, date) index.
+
+For rows written before the table existed, run
+``scripts/backfill_user_summaries.py``. Until then ``last_entry_date`` falls
+back to ``max(date)`` for users without a summary row.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Iterable
+
+from sqlalchemy import DateTime, event, func, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .background import DIRTY_USERS_KEY
+from .models import HealthEntry, User, UserSummary, utcnow
+
+
+def refresh_user_summaries(session: Session, user_ids: Iterable[int]) -> None:
+    """Recompute the UserSummary rows of ``user_ids`` (no commit)."""
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    source = (
+        select(
+            User.id,
+            func.count(HealthEntry.id),
+            func.min(HealthEntry.date),
+            func.max(HealthEntry.date),
+            literal(utcnow(), DateTime()),
+        )
+        .outerjoin(HealthEntry, HealthEntry.user_id == User.id)
+        .where(User.id.in_(user_ids))
+        .group_by(User.id)
+    )
+    dialect_name = session.get_bind().dialect.name
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    stmt = insert(UserSummary.__table__).from_select(
+        [
+            "user_id",
+            "entry_count",
+            "first_entry_date",
+            "last_entry_date",
+            "last_write_at",
+        ],
+        source,
+    )
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={
+                column: stmt.excluded[column]
+                for column in (
+                    "entry_count",
+                    "first_entry_date",
+                    "last_entry_date",
+                    "last_write_at",
+                )
+            },
+        )
+    )
+
+
+def last_entry_date(session: Session, user_id: int) -> date | None:
+    """Date of the user's latest entry, from the summary row when there is one."""
+    summary = session.get(UserSummary, user_id)
+    if summary is not None:
+        return summary.last_entry_date
+    # not backfilled yet
+    return session.scalar(
+        select(func.max(HealthEntry.date)).where(HealthEntry.user_id == user_id)
+    )
+
+
+_session_events_registered = False
+
+
+def register_session_events() -> None:
+    """Attach the before-commit listener once per process."""
+    global _session_events_registered
+    if _session_events_registered:
+        return
+    _session_events_registered = True
+    event.listen(Session, "before_commit", _refresh_dirty_summaries)
+
+
+def _refresh_dirty_summaries(session: Session) -> None:
+    session.flush()  # ORM changes are reported by the flush
+    user_ids = session.info.get(DIRTY_USERS_KEY)
+    if user_ids:
+        refresh_user_summaries(session, user_ids)
@@ -0,0 +1,255 @@
+"""
+workout_writes.py
+
+Write paths for set-level workout logging with incrementally maintained
+rollups.
+
+Adding sets updates two rollup tables in the same transaction with
+``INSERT ... ON CONFLICT DO UPDATE SET x = x + excluded.x`` deltas, never by
+re-summing sets:
+
+- training_day_rollups (user, date): volume and set count, mirrored into
+  HealthEntry.training_volume_kg (a day with logged sets overrides the
+  hand-entered value).
+- exercise_weekly_rollups (user, exercise, ISO week): volume, set count and
+  best estimated 1RM, read by GET /api/workouts/progression.
+
+Deleting a set subtracts its deltas. Only the weekly best 1RM needs a rescan
+of that one week's sets, and only when the deleted set held it. As in
+entry_writes.py, nothing here commits.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date as Date
+from datetime import timedelta
+from typing import Sequence
+
+from sqlalchemy import delete, func, insert, select, update
+
+from .background import mark_user_dirty
+from .entry_writes import dialect_insert, upsert_entry_columns
+from .extensions import db
+from .models import ExerciseWeeklyRollup, TrainingDayRollup, Workout, WorkoutSet
+from .services.workouts import SetInput, week_start
+
+
+def _greatest(current, incoming):
+    """NULL-tolerant two-argument maximum for ON CONFLICT updates."""
+    name = "greatest" if db.session.get_bind().dialect.name == "postgresql" else "max"
+    return getattr(func, name)(
+        func.coalesce(current, incoming), func.coalesce(incoming, current)
+    )
+
+
+def _workout_ids(user_id: int, sets: Sequence[SetInput]) -> dict[tuple, int]:
+    """Find or create one workout per (date, name) in ``sets``."""
+    keys = {(s.date, s.workout) for s in sets}
+    ids: dict[tuple, int] = {}
+    for workout_id, workout_date, name in (
+        db.session.query(Workout.id, Workout.date, Workout.name)
+        .filter(
+            Workout.user_id == user_id,
+            Workout.date.in_({key[0] for key in keys}),
+        )
+        .order_by(Workout.id)
+    ):
+        ids.setdefault((workout_date, name), workout_id)
+
+    for workout_date, name in sorted(
+        keys - ids.keys(), key=lambda k: (k[0], k[1] or "")
+    ):
+        ids[(workout_date, name)] = db.session.execute(
+            insert(Workout)
+            .values(user_id=user_id, date=workout_date, name=name)
+            .returning(Workout.id)
+        ).scalar_one()
+    return ids
+
+
+def add_sets(user_id: int, sets: Sequence[SetInput]) -> list[int]:
+    """
+    Insert sets (one executemany) and apply their deltas to the rollups.
+
+    Returns:
+        list[int]: New set ids, in input order.
+    """
+    if not sets:
+        return []
+    workout_ids = _workout_ids(user_id, sets)
+    set_ids = list(
+        db.session.scalars(
+            insert(WorkoutSet).returning(WorkoutSet.id, sort_by_parameter_order=True),
+            [
+                {
+                    "workout_id": workout_ids[(s.date, s.workout)],
+                    "user_id": user_id,
+                    "date": s.date,
+                    "exercise": s.exercise,
+                    "reps": s.reps,
+                    "load_kg": s.load_kg,
+                    "e1rm_kg": s.e1rm_kg,
+                }
+                for s in sets
+            ],
+        )
+    )
+
+    day_deltas: dict[Date, list] = defaultdict(lambda: [0.0, 0])
+    week_deltas: dict[tuple[str, Date], list] = defaultdict(lambda: [0.0, 0, None])
+    for s in sets:
+        day = day_deltas[s.date]
+        day[0] += s.volume_kg
+        day[1] += 1
+        week = week_deltas[(s.exercise, week_start(s.date))]
+        week[0] += s.volume_kg
+        week[1] += 1
+        if s.e1rm_kg is not None and (week[2] is None or s.e1rm_kg > week[2]):
+            week[2] = s.e1rm_kg
+
+    day_stmt = dialect_insert(TrainingDayRollup.__table__)
+    db.session.execute(
+        day_stmt.on_conflict_do_update(
+            index_elements=["user_id", "date"],
+            set_={
+                "volume_kg": TrainingDayRollup.__table__.c.volume_kg
+                + day_stmt.excluded.volume_kg,
+                "set_count": TrainingDayRollup.__table__.c.set_count
+                + day_stmt.excluded.set_count,
+            },
+        ),
+        [
+            {"user_id": user_id, "date": d, "volume_kg": v, "set_count": n}
+            for d, (v, n) in day_deltas.items()
+        ],
+    )
+
+    week_table = ExerciseWeeklyRollup.__table__
+    week_stmt = dialect_insert(week_table)
+    db.session.execute(
+        week_stmt.on_conflict_do_update(
+            index_elements=["user_id", "exercise", "week_start"],
+            set_={
+                "volume_kg": week_table.c.volume_kg + week_stmt.excluded.volume_kg,
+                "set_count": week_table.c.set_count + week_stmt.excluded.set_count,
+                "best_e1rm_kg": _greatest(
+                    week_table.c.best_e1rm_kg, week_stmt.excluded.best_e1rm_kg
+                ),
+            },
+        ),
+        [
+            {
+                "user_id": user_id,
+                "exercise": exercise,
+                "week_start": week,
+                "volume_kg": v,
+                "set_count": n,
+                "best_e1rm_kg": best,
+            }
+            for (exercise, week), (v, n, best) in week_deltas.items()
+        ],
+    )
+
+    _mirror_day_volumes(user_id, list(day_deltas))
+    return set_ids
+
+
+def _mirror_day_volumes(user_id: int, dates: Sequence[Date]) -> None:
+    """Copy the day rollups into HealthEntry.training_volume_kg."""
+    volumes = {d: None for d in dates}
+    for rollup_date, volume in db.session.query(
+        TrainingDayRollup.date, TrainingDayRollup.volume_kg
+    ).filter(TrainingDayRollup.user_id == user_id, TrainingDayRollup.date.in_(dates)):
+        volumes[rollup_date] = int(round(volume))
+    upsert_entry_columns(
+        user_id, {d: {"training_volume_kg": v} for d, v in volumes.items()}
+    )
+
+
+def delete_set(user_id: int, set_id: int) -> bool:
+    """
+    Delete one of the user's sets and subtract it from the rollups.
+
+    Returns:
+        bool: False if the set does not exist for this user.
+    """
+    row = db.session.execute(
+        delete(WorkoutSet)
+        .where(WorkoutSet.id == set_id, WorkoutSet.user_id == user_id)
+        .returning(
+            WorkoutSet.workout_id,
+            WorkoutSet.date,
+            WorkoutSet.exercise,
+            WorkoutSet.reps,
+            WorkoutSet.load_kg,
+            WorkoutSet.e1rm_kg,
+        )
+    ).first()
+    if row is None:
+        return False
+    volume = row.reps * row.load_kg
+
+    day_table = TrainingDayRollup.__table__
+    db.session.execute(
+        update(day_table)
+        .where(day_table.c.user_id == user_id, day_table.c.date == row.date)
+        .values(
+            volume_kg=day_table.c.volume_kg - volume,
+            set_count=day_table.c.set_count - 1,
+        )
+    )
+    db.session.execute(
+        delete(day_table).where(
+            day_table.c.user_id == user_id,
+            day_table.c.date == row.date,
+            day_table.c.set_count <= 0,
+        )
+    )
+
+    week = week_start(row.date)
+    week_table = ExerciseWeeklyRollup.__table__
+    week_filter = (
+        week_table.c.user_id == user_id,
+        week_table.c.exercise == row.exercise,
+        week_table.c.week_start == week,
+    )
+    remaining = db.session.execute(
+        update(week_table)
+        .where(*week_filter)
+        .values(
+            volume_kg=week_table.c.volume_kg - volume,
+            set_count=week_table.c.set_count - 1,
+        )
+        .returning(week_table.c.set_count, week_table.c.best_e1rm_kg)
+    ).first()
+    if remaining is not None and remaining.set_count <= 0:
+        db.session.execute(delete(week_table).where(*week_filter))
+    elif (
+        remaining is not None
+        and row.e1rm_kg is not None
+        and (remaining.best_e1rm_kg is None or row.e1rm_kg >= remaining.best_e1rm_kg)
+    ):
+        best = db.session.scalar(
+            select(func.max(WorkoutSet.e1rm_kg)).where(
+                WorkoutSet.user_id == user_id,
+                WorkoutSet.exercise == row.exercise,
+                WorkoutSet.date >= week,
+                WorkoutSet.date < week + timedelta(days=7),
+            )
+        )
+        db.session.execute(
+            update(week_table).where(*week_filter).values(best_e1rm_kg=best)
+        )
+
+    db.session.execute(
+        delete(Workout).where(
+            Workout.id == row.workout_id,
+            ~select(WorkoutSet.id)
+            .where(WorkoutSet.workout_id == row.workout_id)
+            .exists(),
+        )
+    )
+    _mirror_day_volumes(user_id, [row.date])
+    mark_user_dirty(db.session, user_id)
+    return True
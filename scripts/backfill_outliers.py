@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Backfill HealthEntry.outlier_metrics / is_outlier for existing data.
+
+Each user's weight/body-fat history is loaded as NumPy columns and flagged in
+one vectorized pass (entry_writes.py: refresh_user_outlier_flags), using the
+OUTLIER_* settings from config.py. Only rows whose flags change are written,
+with a single bulk UPDATE per user.
+
+Usage:
+>>>  uv run python scripts/backfill_outliers.py
+>>>  uv run python scripts/backfill_outliers.py --user-id 3 --dry-run
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Ensure project root is importable BEFORE importing app modules
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from physiolog import create_app
+from physiolog.entry_writes import refresh_user_outlier_flags
+from physiolog.extensions import db
+from physiolog.models import User
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Backfill outlier flags")
+    parser.add_argument("--user-id", type=int, help="Only backfill this user")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Report changes without writing"
+    )
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        settings = {
+            "window": app.config.get("OUTLIER_WINDOW", 15),
+            "threshold": app.config.get("OUTLIER_THRESHOLD", 3.5),
+            "min_history": app.config.get("OUTLIER_MIN_HISTORY", 5),
+        }
+        user_ids = (
+            [args.user_id]
+            if args.user_id is not None
+            else [row[0] for row in db.session.query(User.id).order_by(User.id)]
+        )
+
+        checked = changed = 0
+        for user_id in user_ids:
+            n_rows, n_changed = refresh_user_outlier_flags(user_id, **settings)
+            checked += n_rows
+            changed += n_changed
+            if n_changed:
+                print(f"  • user {user_id}: {n_changed} of {n_rows} flags changed")
+        if args.dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+
+    print("✓ Outlier backfill complete!" + (" (dry run)" if args.dry_run else ""))
+    print(f"  • Entries checked: {checked}")
+    print(f"  • Flags changed: {changed}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
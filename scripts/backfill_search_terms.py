@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Backfill user_search_terms (SQLite client search index) for existing users.
+
+Account writes keep the terms current on their own (search.py); this is only
+needed once after the user_search_terms table is created, or to repair it.
+PostgreSQL uses a trigram index instead and needs no backfill.
+
+Usage:
+>>>  uv run python scripts/backfill_search_terms.py
+>>>  uv run python scripts/backfill_search_terms.py --user-id 3
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Ensure project root is importable BEFORE importing app modules
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from physiolog import create_app
+from physiolog.extensions import db
+from physiolog.models import User
+from physiolog.search import refresh_search_terms
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Backfill client search terms")
+    parser.add_argument("--user-id", type=int, help="Only backfill this user")
+    parser.add_argument(
+        "--batch-size", type=int, default=500, help="Users per statement"
+    )
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        user_ids = (
+            [args.user_id]
+            if args.user_id is not None
+            else [row[0] for row in db.session.query(User.id).order_by(User.id)]
+        )
+        for start in range(0, len(user_ids), args.batch_size):
+            refresh_search_terms(db.session, user_ids[start : start + args.batch_size])
+        db.session.commit()
+
+    print("✓ Search term backfill complete!")
+    print(f"  • Users refreshed: {len(user_ids)}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
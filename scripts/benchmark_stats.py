@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark the object path (compute_stats) against the NumPy columnar path
+(compute_stats_columnar) on synthetic health entries.
+
+Both paths are checked to produce the same output before timing.
+
+Usage:
+>>>  uv run python scripts/benchmark_stats.py
+>>>  uv run python scripts/benchmark_stats.py --entries 200000 --repeat 5 --dispersion
+"""
+
+import argparse
+import random
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root is importable BEFORE importing app modules
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from physiolog.services.stats import METRICS, compute_stats, compute_stats_columnar
+
+
+@dataclass
+class SyntheticEntry:
+    weight_kg: float | None
+    body_fat_percent: float | None
+    calories_kcal: int | None
+    protein_g: int | None
+    steps_count: int | None
+    sleep_hours: float | None
+
+
+def make_entries(n: int, seed: int = 42) -> list[SyntheticEntry]:
+    """Generate n entries with ~10% missing values per metric."""
+    rng = random.Random(seed)
+
+    def maybe(value):
+        return None if rng.random() < 0.1 else value
+
+    return [
+        SyntheticEntry(
+            weight_kg=maybe(round(rng.gauss(75, 4), 1)),
+            body_fat_percent=maybe(round(rng.gauss(18, 2), 1)),
+            calories_kcal=maybe(int(rng.gauss(2200, 300))),
+            protein_g=maybe(int(rng.gauss(150, 20))),
+            steps_count=maybe(int(rng.gauss(9000, 2500))),
+            sleep_hours=maybe(round(rng.gauss(7.2, 0.8), 2)),
+        )
+        for _ in range(n)
+    ]
+
+
+def to_columns(entries: list[SyntheticEntry]) -> dict[str, np.ndarray]:
+    """Columnar copy of the entries, as a column-only SQL select would return."""
+    return {
+        attr: np.array([getattr(e, attr) for e in entries], dtype=float)
+        for attr in METRICS.values()
+    }
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark compute_stats backends")
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dispersion", action="store_true")
+    args = parser.parse_args()
+
+    entries = make_entries(args.entries)
+    columns = to_columns(entries)
+
+    object_result = compute_stats(entries, dispersion=args.dispersion)
+    columnar_result = compute_stats_columnar(columns, dispersion=args.dispersion)
+    if object_result != columnar_result:
+        print("❌ Results differ:")
+        print(f"  object:   {object_result}")
+        print(f"  columnar: {columnar_result}")
+        return 1
+
+    object_time = best_of(
+        args.repeat, lambda: compute_stats(entries, dispersion=args.dispersion)
+    )
+    columnar_time = best_of(
+        args.repeat,
+        lambda: compute_stats_columnar(columns, dispersion=args.dispersion),
+    )
+
+    print(f"📊 {args.entries} entries, best of {args.repeat}")
+    print(f"  • compute_stats (objects):   {object_time * 1000:9.2f} ms")
+    print(f"  • compute_stats_columnar:    {columnar_time * 1000:9.2f} ms")
+    print(f"  • Speedup:                   {object_time / columnar_time:9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Import intraday wearable samples from a CSV/TSV export.
+
+Expected columns: ts, metric, value
+  - ts: UTC epoch seconds or an ISO timestamp (naive timestamps are UTC)
+  - metric: heart_rate, steps or sleep_stage (see services/intraday.py)
+  - value: number (sleep_stage: 0 awake, 1 light, 2 deep, 3 rem)
+
+Rows are ingested in chunks through the same path as POST /api/intraday
+(intraday_store.py: ingest_samples), one transaction per chunk, so the
+steps_count / sleep_hours of the touched days are refreshed as it goes.
+
+Usage:
+>>>  uv run python scripts/import_intraday.py data/watch.csv --email demo@example.com
+>>>  uv run python scripts/import_intraday.py watch.tsv --user-id 3 --chunk-size 5000
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Ensure project root is importable BEFORE importing app modules
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from physiolog import create_app
+from physiolog.extensions import db
+from physiolog.intraday_store import ingest_samples
+from physiolog.models import User
+from physiolog.services import build_sample_series
+
+
+def read_samples(path: Path) -> pd.DataFrame:
+    """Load the export and convert ``ts`` to integer epoch seconds."""
+    sep = "\t" if path.suffix.lower() == ".tsv" else ","
+    df = pd.read_csv(path, sep=sep, usecols=["ts", "metric", "value"])
+    if not pd.api.types.is_numeric_dtype(df["ts"]):
+        ts = pd.to_datetime(df["ts"], utc=True)
+        df["ts"] = (ts - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+    return df
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import intraday samples")
+    parser.add_argument("path", type=Path, help="CSV/TSV with ts, metric, value")
+    owner = parser.add_mutually_exclusive_group(required=True)
+    owner.add_argument("--user-id", type=int)
+    owner.add_argument("--email")
+    parser.add_argument(
+        "--chunk-size", type=int, default=50_000, help="Samples per transaction"
+    )
+    args = parser.parse_args()
+
+    df = read_samples(args.path)
+    app = create_app()
+    with app.app_context():
+        query = db.session.query(User)
+        user = (
+            query.filter_by(id=args.user_id).first()
+            if args.user_id is not None
+            else query.filter_by(email=args.email.strip().lower()).first()
+        )
+        if user is None:
+            print("✗ User not found")
+            return 1
+
+        days_updated: dict[str, set[str]] = {}
+        for start in range(0, len(df), args.chunk_size):
+            chunk = df.iloc[start : start + args.chunk_size]
+            series = {}
+            for metric, group in chunk.groupby("metric"):
+                mid, ts, values = build_sample_series(
+                    metric, group["ts"].to_numpy(), group["value"].to_numpy()
+                )
+                series[mid] = (ts, values)
+            for column, dates in ingest_samples(user.id, series).items():
+                days_updated.setdefault(column, set()).update(dates)
+            db.session.commit()
+            print(f"  • {min(start + args.chunk_size, len(df))}/{len(df)} samples")
+
+    print("✓ Intraday import complete!")
+    print(f"  • Samples: {len(df)}")
+    for column, dates in sorted(days_updated.items()):
+        print(f"  • {column} refreshed for {len(dates)} days")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
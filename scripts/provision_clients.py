@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Create client accounts from a CSV roster and assign them to an admin.
+
+The roster needs an ``email,name,password`` header. Rows whose email is
+repeated or already registered, and invalid rows, are reported and skipped;
+the others are created in one transaction (see physiolog/provisioning.py).
+
+Usage:
+>>>  uv run python scripts/provision_clients.py --admin coach@example.com roster.csv
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Ensure project root is importable BEFORE importing app modules
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from physiolog import create_app
+from physiolog.extensions import db
+from physiolog.models import User
+from physiolog.provisioning import parse_roster_csv, provision_clients
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Provision clients from a CSV roster")
+    parser.add_argument("roster", type=Path, help="CSV file with email,name,password")
+    parser.add_argument("--admin", required=True, help="Email of the assigned admin")
+    args = parser.parse_args()
+
+    items = parse_roster_csv(args.roster.read_text(encoding="utf-8"))
+
+    app = create_app()
+    with app.app_context():
+        admin = db.session.scalar(
+            db.select(User).where(User.email == args.admin.strip().lower())
+        )
+        if admin is None or not admin.is_admin:
+            print(f"✗ {args.admin} is not an admin account")
+            return 1
+        results = provision_clients(db.session, admin.id, items)
+        db.session.commit()
+
+    created = 0
+    for result in results:
+        if result["status"] == "created":
+            created += 1
+            continue
+        # header is line 1
+        print(
+            f"  line {result['index'] + 2}: {result.get('email', '')} {result['error']}"
+        )
+
+    print("✓ Provisioning complete!")
+    print(f"  • Users created and assigned: {created}")
+    print(f"  • Rows skipped: {len(results) - created}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,6 +25,194 @@ async function fetchJson(url, options) {
     return res.json();
 }
 
+// -----------------------------
+// Entry cache (IndexedDB + /api/entries/changes delta sync)
+// -----------------------------
+// Keeps the effective user's entries in IndexedDB and asks the server only
+// for what changed since the last sync token. Falls back to plain
+// /api/entries requests when IndexedDB is unavailable, and to the cached
+// copy when the network is.
+//
+// The copy belongs to one owner: "<viewer id>:<effective user id>", rendered
+// by base.html (an admin observing a client has their own). A copy synced for
+// another owner is never served; the next sync replaces it, and a failed sync
+// clears it. Logging out clears it too, so no copy stays on a shared browser.
+const ENTRY_CACHE_DB = "physiolog-entries";
+const ENTRY_CACHE_VERSION = 1;
+
+function entryCacheOwner() {
+    return document.body?.dataset.entryCacheOwner || "";
+}
+
+function idbRequest(req) {
+    return new Promise((resolve, reject) => {
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => reject(req.error);
+    });
+}
+
+function idbTransactionDone(tx) {
+    return new Promise((resolve, reject) => {
+        tx.oncomplete = () => resolve();
+        tx.onerror = () => reject(tx.error);
+        tx.onabort = () => reject(tx.error);
+    });
+}
+
+let ENTRY_CACHE_DB_PROMISE = null;
+
+function openEntryCacheDb() {
+    if (!("indexedDB" in window)) return Promise.resolve(null);
+    if (!ENTRY_CACHE_DB_PROMISE) {
+        const req = indexedDB.open(ENTRY_CACHE_DB, ENTRY_CACHE_VERSION);
+        req.onupgradeneeded = () => {
+            const db = req.result;
+            if (!db.objectStoreNames.contains("entries")) {
+                db.createObjectStore("entries", { keyPath: "date" });
+            }
+            if (!db.objectStoreNames.contains("meta")) {
+                db.createObjectStore("meta");
+            }
+        };
+        ENTRY_CACHE_DB_PROMISE = idbRequest(req).catch((err) => {
+            console.warn("IndexedDB unavailable, entry cache disabled", err);
+            return null;
+        });
+    }
+    return ENTRY_CACHE_DB_PROMISE;
+}
+
+function readSyncMeta(db) {
+    return idbRequest(db.transaction("meta", "readonly").objectStore("meta").get("sync"));
+}
+
+async function clearEntryCache(db) {
+    const tx = db.transaction(["entries", "meta"], "readwrite");
+    tx.objectStore("entries").clear();
+    tx.objectStore("meta").clear();
+    await idbTransactionDone(tx);
+}
+
+async function readCachedEntries(db) {
+    const tx = db.transaction("entries", "readonly");
+    const entries = await idbRequest(tx.objectStore("entries").getAll());
+    // newest first, like /api/entries
+    return entries.sort((a, b) => (a.date < b.date ? 1 : a.date > b.date ? -1 : 0));
+}
+
+async function applyEntryChanges(db, payload, owner) {
+    const tx = db.transaction(["entries", "meta"], "readwrite");
+    const store = tx.objectStore("entries");
+    if (payload.full) store.clear();
+    (payload.deleted || []).forEach((date) => store.delete(date));
+    (payload.entries || []).forEach((entry) => store.put(entry));
+    tx.objectStore("meta").put(
+        { token: payload.token, userId: payload.user_id, owner },
+        "sync"
+    );
+    await idbTransactionDone(tx);
+}
+
+let ENTRY_CACHE_SYNC = null;
+
+async function syncEntryCache() {
+    const db = await openEntryCacheDb();
+    if (!db) return false;
+    // share one in-flight sync between callers on the same page
+    if (!ENTRY_CACHE_SYNC) {
+        ENTRY_CACHE_SYNC = (async () => {
+            const owner = entryCacheOwner();
+            const meta = await readSyncMeta(db);
+            // a copy of someone else's entries is replaced by a full sync
+            const url = meta?.token && meta.owner === owner
+                ? `/api/entries/changes?since=${encodeURIComponent(meta.token)}`
+                : "/api/entries/changes";
+            await applyEntryChanges(db, await fetchJson(url), owner);
+            return true;
+        })().finally(() => {
+            ENTRY_CACHE_SYNC = null;
+        });
+    }
+    return ENTRY_CACHE_SYNC;
+}
+
+/* Same window semantics as the server: counted back from the latest entry. */
+function filterEntriesBySyncedWindow(entries, windowValue) {
+    const days = windowValueToDays(windowValue);
+    if (!days || !entries.length) return entries;
+    const end = new Date(`${entries[0].date}T00:00:00`);
+    const start = new Date(end);
+    start.setDate(start.getDate() - days + 1);
+    return entries.filter((e) => new Date(`${e.date}T00:00:00`) >= start);
+}
+
+async function getCachedEntries(windowValue) {
+    const db = await openEntryCacheDb();
+    if (db) {
+        try {
+            await syncEntryCache();
+        } catch (err) {
+            // offline or server error: serve the last synced copy if it is ours
+            const meta = await readSyncMeta(db);
+            if (!meta?.token) throw err;
+            if (meta.owner !== entryCacheOwner()) {
+                await clearEntryCache(db);
+                throw err;
+            }
+            console.warn("Entry sync failed, using cached entries", err);
+        }
+        return filterEntriesBySyncedWindow(await readCachedEntries(db), windowValue);
+    }
+
+    const url = windowValue
+        ? `/api/entries?window=${encodeURIComponent(windowValue)}`
+        : "/api/entries";
+    const payload = await fetchJson(url);
+    return Array.isArray(payload) ? payload : payload?.entries;
+}
+
+async function getCachedEntry(dateValue) {
+    const db = await openEntryCacheDb();
+    if (!db) return undefined; // caller falls back to /api/entries?date=
+    try {
+        await syncEntryCache();
+    } catch (err) {
+        console.warn("Entry sync failed", err);
+        return undefined;
+    }
+    const entry = await idbRequest(
+        db.transaction("entries", "readonly").objectStore("entries").get(dateValue)
+    );
+    return entry ?? null;
+}
+
+async function clearEntryCacheForLogout() {
+    const db = await openEntryCacheDb();
+    if (!db) return;
+    // let an in-flight sync land first so it cannot refill the stores
+    await ENTRY_CACHE_SYNC?.catch(() => {});
+    await clearEntryCache(db);
+}
+
+window.PhysioLogEntryCache = {
+    sync: syncEntryCache,
+    getEntries: getCachedEntries,
+    getEntry: getCachedEntry,
+    clear: clearEntryCacheForLogout,
+};
+
+// Clear the cache before the logout form posts. Bounded, so a stuck
+// IndexedDB never keeps anyone logged in; form.submit() skips this handler.
+document.addEventListener("submit", (event) => {
+    const form = event.target;
+    if (!form.matches?.(".profile-logout-form")) return;
+    event.preventDefault();
+    const timeout = new Promise((resolve) => setTimeout(resolve, 1000));
+    Promise.race([clearEntryCacheForLogout(), timeout])
+        .catch((err) => console.warn("Could not clear the entry cache", err))
+        .finally(() => form.submit());
+});
+
 // -----------------------------
 // Trends stats panel (trends.html)
 // -----------------------------
@@ -641,13 +829,8 @@ async function loadCharts(
 
     let entries;
     try {
-        const hasWindow = windowValue !== null && windowValue !== undefined && windowValue !== "";
-        const entriesUrl = hasWindow
-            ? `/api/entries?window=${encodeURIComponent(windowValue)}`
-            : "/api/entries";
-        const payload = await fetchJson(entriesUrl);
+        entries = await getCachedEntries(windowValue);
         if (requestId !== ACTIVE_TRENDS_REQUEST_ID) return;
-        entries = Array.isArray(payload) ? payload : payload?.entries;
         if (!Array.isArray(entries)) return;
     } catch (err) {
         if (requestId !== ACTIVE_TRENDS_REQUEST_ID) return;
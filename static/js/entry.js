@@ -17,6 +17,8 @@ function clearEntryFields() {
     setFieldValue("bodyFat", "");
     setFieldValue("calories", "");
     setFieldValue("protein", "");
+    setFieldValue("carbs", "");
+    setFieldValue("fat", "");
     setFieldValue("trainingVolume", "");
     setFieldValue("steps", "");
     setFieldValue("sleep", "");
@@ -28,6 +30,8 @@ function fillEntryFields(entry) {
     setFieldValue("bodyFat", entry.body_fat_percent);
     setFieldValue("calories", entry.calories_kcal);
     setFieldValue("protein", entry.protein_g);
+    setFieldValue("carbs", entry.carbs_g);
+    setFieldValue("fat", entry.fat_g);
     setFieldValue("trainingVolume", entry.training_volume_kg);
     setFieldValue("steps", entry.steps_count);
     setFieldValue(
@@ -54,6 +58,16 @@ async function loadEntryForDate(dateValue) {
         return;
     }
 
+    const cached = await window.PhysioLogEntryCache?.getEntry(dateValue);
+    if (cached !== undefined) {
+        if (cached) {
+            fillEntryFields(cached);
+        } else {
+            clearEntryFields();
+        }
+        return;
+    }
+
     const url = `/api/entries?date=${encodeURIComponent(dateValue)}`;
     const res = await fetch(url);
 
@@ -97,6 +111,8 @@ function collectEntryPayload() {
         body_fat_percent: parseFloat(entry$("bodyFat")?.value) || null,
         calories_kcal: parseInt(entry$("calories")?.value, 10) || null,
         protein_g: parseInt(entry$("protein")?.value, 10) || null,
+        carbs_g: parseInt(entry$("carbs")?.value, 10) || null,
+        fat_g: parseInt(entry$("fat")?.value, 10) || null,
         training_volume_kg: parseInt(entry$("trainingVolume")?.value, 10) || null,
         steps_count: parseInt(entry$("steps")?.value, 10) || null,
         sleep_hours: sleepValue,
@@ -147,9 +163,23 @@ function escapeHtml(value) {
         .replaceAll("'", "&#39;");
 }
 
+async function getEntriesForObservations() {
+    if (window.PhysioLogEntryCache) {
+        return window.PhysioLogEntryCache.getEntries();
+    }
+    const res = await fetch("/api/entries");
+    if (!res.ok) {
+        const text = await res.text().catch(() => "");
+        throw new Error(`/api/entries failed: ${res.status} ${res.statusText} ${text}`);
+    }
+    const payload = await res.json();
+    return Array.isArray(payload) ? payload : payload?.entries;
+}
+
 /**
  * Loads recent entries and renders their observations into `#entriesList`.
- * - Fetches `/api/entries`.
+ * - Reads entries through the IndexedDB entry cache (dashboard.js), or
+ *   fetches `/api/entries` when it is not loaded.
  * - Shows an empty state when there are no entries.
  * - Renders up to 7 most recent observation cards.
  * - Shows an error state card if the request fails.
@@ -162,14 +192,7 @@ async function loadLatestObservations() {
     if (!list) return;
 
     try {
-        const res = await fetch("/api/entries");
-        if (!res.ok) {
-            const text = await res.text().catch(() => "");
-            throw new Error(`/api/entries failed: ${res.status} ${res.statusText} ${text}`);
-        }
-
-        const payload = await res.json();
-        const entries = Array.isArray(payload) ? payload : payload?.entries;
+        const entries = await getEntriesForObservations();
         if (!Array.isArray(entries) || entries.length === 0) {
             list.innerHTML = `
                 <div class="stat-card">
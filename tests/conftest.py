@@ -0,0 +1,130 @@
+"""
+Shared test configuration and fixtures.
+
+Every test gets a fresh in-memory database. Modules that need other
+settings override the ``app_config`` fixture with a ``TestConfig`` subclass,
+e.g.::
+
+    @pytest.fixture
+    def app_config():
+        class Config(TestConfig):
+            RESPONSE_CACHE_ENABLED = False
+
+        return Config
+
+Users are added with the ``create_user`` factory and signed in with
+``login``, which returns a new test client per call.
+"""
+
+from __future__ import annotations
+
+from contextlib import ExitStack
+
+import pytest
+from flask import has_app_context
+
+from physiolog import create_app
+from physiolog.background import recompute_queue
+from physiolog.extensions import db
+from physiolog.models import User
+
+
+class TestConfig:
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    AUTO_CREATE_DB = False
+    DEBUG = False
+    SECRET_KEY = "test-secret-key"
+    # per-test caches; a shared file would outlive the in-memory database
+    CACHE_BACKEND = "memory"
+    CACHE_SINGLE_PROCESS = True
+
+
+@pytest.fixture
+def app_config():
+    return TestConfig
+
+
+@pytest.fixture
+def hold_app_context():
+    """
+    Whether ``app`` keeps an app context open during the test. Override with
+    False where requests must not share ``g`` with the test: Flask-Login
+    caches the loaded user there, which hides the user loader and keys
+    per-user state by the first user seen.
+    """
+    return True
+
+
+@pytest.fixture
+def app(app_config, hold_app_context):
+    app = create_app(app_config)
+    with app.app_context():
+        db.create_all()
+    if hold_app_context:
+        with app.app_context():
+            yield app
+            recompute_queue.join(timeout=5)
+    else:
+        yield app
+        recompute_queue.join(timeout=5)
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def create_user(app):
+    """
+    Factory that commits a user and returns it, e.g.
+    ``create_user("coach@example.com", is_admin=True)``. The password is "pw"
+    unless given. Without a held app context the user comes back detached,
+    with its columns loaded.
+    """
+
+    def create(
+        email: str,
+        *,
+        password: str = "pw",
+        name: str | None = None,
+        is_admin: bool = False,
+    ) -> User:
+        with ExitStack() as stack:
+            own_context = not has_app_context()
+            if own_context:
+                stack.enter_context(app.app_context())
+            user = User(email=email, name=name, is_admin=is_admin)
+            user.set_password(password)
+            db.session.add(user)
+            db.session.commit()
+            if own_context:
+                db.session.refresh(user)
+                db.session.expunge(user)
+            return user
+
+    return create
+
+
+@pytest.fixture
+def login(app):
+    """Factory returning a new test client signed in as ``email``."""
+
+    def sign_in(email: str, password: str = "pw"):
+        myclient = app.test_client()
+        res = myclient.post(
+            "/login",
+            data={"email": email, "password": password},
+            follow_redirects=False,
+        )
+        assert res.status_code in (302, 303)
+        return myclient
+
+    return sign_in
+
+
+@pytest.fixture
+def client(create_user, login):
+    """Test client signed in as test@example.com (password "testpassword")."""
+    create_user("test@example.com", password="testpassword")
+    return login("test@example.com", "testpassword")
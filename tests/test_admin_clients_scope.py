@@ -1,58 +1,18 @@
 from __future__ import annotations
 
-import pytest
+import html
+import re
 
-from physiolog import create_app
 from physiolog.extensions import db
 from physiolog.models import AdminClientAssignment, User
+from physiolog.search import search_terms
 
 
-class TestConfig:
-    TESTING = True
-    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-    AUTO_CREATE_DB = False
-    DEBUG = False
-    SECRET_KEY = "test-secret-key"
-
-
-@pytest.fixture
-def app():
-    app = create_app(TestConfig)
+def test_admin_clients_page_shows_only_assigned_users(app, create_user, login) -> None:
     with app.app_context():
-        db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
-
-
-@pytest.fixture
-def client(app):
-    return app.test_client()
-
-
-def _create_user(email: str, password: str, *, is_admin: bool = False) -> User:
-    user = User(email=email, is_admin=is_admin)
-    user.set_password(password)
-    db.session.add(user)
-    db.session.flush()
-    return user
-
-
-def _login(client, email: str, password: str) -> None:
-    res = client.post(
-        "/login",
-        data={"email": email, "password": password},
-        follow_redirects=False,
-    )
-    assert res.status_code in (302, 303)
-
-
-def test_admin_clients_page_shows_only_assigned_users(client, app) -> None:
-    with app.app_context():
-        admin = _create_user("admin@example.com", "pw", is_admin=True)
-        visible_client = _create_user("visible@example.com", "pw")
-        hidden_client = _create_user("hidden@example.com", "pw")
+        admin = create_user("admin@example.com", is_admin=True)
+        visible_client = create_user("visible@example.com")
+        create_user("hidden@example.com")
 
         db.session.add(
             AdminClientAssignment(
@@ -62,7 +22,7 @@ def test_admin_clients_page_shows_only_assigned_users(client, app) -> None:
         )
         db.session.commit()
 
-    _login(client, "admin@example.com", "pw")
+    client = login("admin@example.com")
 
     res = client.get("/admin")
     assert res.status_code == 200
@@ -71,11 +31,13 @@ def test_admin_clients_page_shows_only_assigned_users(client, app) -> None:
     assert "hidden@example.com" not in body
 
 
-def test_admin_cannot_update_unassigned_user_subscription(client, app) -> None:
+def test_admin_cannot_update_unassigned_user_subscription(
+    app, create_user, login
+) -> None:
     with app.app_context():
-        admin = _create_user("admin@example.com", "pw", is_admin=True)
-        assigned_client = _create_user("assigned@example.com", "pw")
-        other_client = _create_user("other@example.com", "pw")
+        admin = create_user("admin@example.com", is_admin=True)
+        assigned_client = create_user("assigned@example.com")
+        other_client = create_user("other@example.com")
 
         db.session.add(
             AdminClientAssignment(
@@ -86,7 +48,7 @@ def test_admin_cannot_update_unassigned_user_subscription(client, app) -> None:
         db.session.commit()
         other_client_id = other_client.id
 
-    _login(client, "admin@example.com", "pw")
+    client = login("admin@example.com")
 
     res = client.post(
         f"/admin/clients/{other_client_id}/subscription",
@@ -94,3 +56,99 @@ def test_admin_cannot_update_unassigned_user_subscription(client, app) -> None:
         follow_redirects=False,
     )
     assert res.status_code == 404
+
+
+def test_search_terms_cover_every_substring() -> None:
+    terms = search_terms("Ann.Lee@Example.com", "Ann Lee")
+    assert "lee@example.com" in terms
+    assert "lee" in terms
+    assert all(len(term) <= 32 for term in terms)
+    assert not any(term.startswith(" ") for term in terms)
+
+
+def test_admin_client_search_is_indexed_and_ranked(app, create_user, login) -> None:
+    with app.app_context():
+        admin = create_user("admin@example.com", is_admin=True)
+        clients = [
+            create_user("bob.annex@example.com"),  # word prefix
+            create_user("joanna@example.com"),  # substring
+            create_user("ann@example.com"),  # prefix
+            create_user("carl@example.com"),  # no match
+        ]
+        clients[3].name = "Carl"
+        db.session.add_all(
+            AdminClientAssignment(admin_user_id=admin.id, client_user_id=c.id)
+            for c in clients
+        )
+        db.session.commit()
+        renamed = db.session.get(User, clients[3].id)
+        renamed.name = "Carl Annika"  # terms follow account edits
+        db.session.commit()
+
+    client = login("admin@example.com")
+    body = client.get("/clients?email=ANN").get_data(as_text=True)
+    positions = [
+        body.find(email)
+        for email in (
+            "ann@example.com",
+            "bob.annex@example.com",
+            "carl@example.com",
+            "joanna@example.com",
+        )
+    ]
+    assert -1 not in positions
+    assert positions == sorted(positions)
+    assert "admin@example.com</td>" not in body
+
+    body = client.get("/clients?email=100%25").get_data(as_text=True)
+    assert "@example.com</td>" not in body
+
+
+def _client_emails(body: str) -> list[str]:
+    return re.findall(r"Email</span>([^<]+)</td>", body)
+
+
+def test_clients_pagination_keyset_and_offset_agree(app, create_user, login) -> None:
+    with app.app_context():
+        admin = create_user("admin@example.com", is_admin=True)
+        for i in range(7):
+            user = create_user(f"c{i}@example.com")
+            user.name = None if i % 3 == 0 else f"Client {i % 2}"
+            db.session.add(
+                AdminClientAssignment(admin_user_id=admin.id, client_user_id=user.id)
+            )
+        db.session.commit()
+
+    client = login("admin@example.com")
+    offset_pages = [
+        _client_emails(
+            client.get(f"/clients?per_page=5&page={n}").get_data(as_text=True)
+        )
+        for n in (1, 2)
+    ]
+    assert [len(p) for p in offset_pages] == [5, 2]
+
+    # follow the ">" links, which carry a keyset cursor
+    keyset_pages = []
+    url = "/clients?per_page=5&page=1"
+    for _ in range(2):
+        body = client.get(url).get_data(as_text=True)
+        keyset_pages.append(_client_emails(body))
+        match = re.search(r'href="([^"]*after=[^"]*)">&gt;</a>', body)
+        if match is None:
+            break
+        url = html.unescape(match.group(1))
+    assert keyset_pages == offset_pages
+    assert "page=2" in url and "after=" in url
+
+    # past the last page clamps to it; malformed cursors fall back to offsets
+    assert (
+        _client_emails(client.get("/clients?per_page=5&page=9").get_data(as_text=True))
+        == offset_pages[1]
+    )
+    assert (
+        _client_emails(
+            client.get("/clients?per_page=5&page=2&after=bm9wZQ").get_data(as_text=True)
+        )
+        == offset_pages[1]
+    )
@@ -2,59 +2,22 @@ from __future__ import annotations
 
 from datetime import date
 
-import pytest
+from sqlalchemy import event as sa_event
 
 from physiolog import create_app
+from physiolog.cache import SQLiteBackend
 from physiolog.extensions import db
 from physiolog.models import AdminClientAssignment, HealthEntry, User
+from physiolog.scope import AssignmentCache, assignment_cache
 
+from conftest import TestConfig
 
-class TestConfig:
-    TESTING = True
-    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-    AUTO_CREATE_DB = False
-    DEBUG = False
-    SECRET_KEY = "test-secret-key"
 
-
-@pytest.fixture
-def app():
-    app = create_app(TestConfig)
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
-
-
-@pytest.fixture
-def client(app):
-    return app.test_client()
-
-
-def _create_user(email: str, password: str, *, is_admin: bool = False) -> User:
-    user = User(email=email, is_admin=is_admin)
-    user.set_password(password)
-    db.session.add(user)
-    db.session.flush()
-    return user
-
-
-def _login(client, email: str, password: str) -> None:
-    res = client.post(
-        "/login",
-        data={"email": email, "password": password},
-        follow_redirects=False,
-    )
-    assert res.status_code in (302, 303)
-
-
-def test_select_client_marks_single_selected_user(client, app) -> None:
+def test_select_client_marks_single_selected_user(app, create_user, login) -> None:
     with app.app_context():
-        admin = _create_user("admin@example.com", "pw", is_admin=True)
-        client_one = _create_user("one@example.com", "pw")
-        client_two = _create_user("two@example.com", "pw")
+        admin = create_user("admin@example.com", is_admin=True)
+        client_one = create_user("one@example.com")
+        client_two = create_user("two@example.com")
 
         db.session.add_all(
             [
@@ -71,7 +34,7 @@ def test_select_client_marks_single_selected_user(client, app) -> None:
         db.session.commit()
         client_two_id = client_two.id
 
-    _login(client, "admin@example.com", "pw")
+    client = login("admin@example.com")
 
     res = client.post(
         f"/admin/clients/{client_two_id}/select",
@@ -83,10 +46,10 @@ def test_select_client_marks_single_selected_user(client, app) -> None:
     assert f'value="{client_two_id}" checked' in body
 
 
-def test_selected_client_drives_read_only_data_apis(client, app) -> None:
+def test_selected_client_drives_read_only_data_apis(app, create_user, login) -> None:
     with app.app_context():
-        admin = _create_user("admin@example.com", "pw", is_admin=True)
-        selected_client = _create_user("client@example.com", "pw")
+        admin = create_user("admin@example.com", is_admin=True)
+        selected_client = create_user("client@example.com")
         selected_client.age = 42
         selected_client.height_cm = 180
         selected_client.weight_kg = 81.5
@@ -108,7 +71,7 @@ def test_selected_client_drives_read_only_data_apis(client, app) -> None:
         db.session.commit()
         selected_client_id = selected_client.id
 
-    _login(client, "admin@example.com", "pw")
+    client = login("admin@example.com")
 
     select_res = client.post(
         f"/admin/clients/{selected_client_id}/select",
@@ -134,3 +97,106 @@ def test_selected_client_drives_read_only_data_apis(client, app) -> None:
     assert stats_res.status_code == 200
     stats_body = stats_res.get_json()
     assert stats_body["stats"]["total_entries"] == 1
+
+    # the browser's entry cache is owned by (admin, observed client)
+    with app.app_context():
+        admin_id = db.session.scalar(
+            db.select(User.id).where(User.email == "admin@example.com")
+        )
+    page = client.get("/trends").get_data(as_text=True)
+    assert f'data-entry-cache-owner="{admin_id}:{selected_client_id}"' in page
+
+
+def test_scope_uses_cached_assignments_until_they_change(
+    app, create_user, login
+) -> None:
+    with app.app_context():
+        admin = create_user("admin@example.com", is_admin=True)
+        client_one = create_user("one@example.com")
+        client_two = create_user("two@example.com")
+        db.session.add(
+            AdminClientAssignment(admin_user_id=admin.id, client_user_id=client_one.id)
+        )
+        db.session.commit()
+        admin_id, client_one_id, client_two_id = admin.id, client_one.id, client_two.id
+
+    client = login("admin@example.com")
+    assert client.post(f"/admin/clients/{client_two_id}/select").status_code == 404
+    assert client.post(f"/admin/clients/{client_one_id}/select").status_code in (
+        302,
+        303,
+    )
+
+    statements: list[str] = []
+    engine = db.engine
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    sa_event.listen(engine, "before_cursor_execute", listener)
+    try:
+        client.get("/api/stats")
+        client.get("/api/entries")
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", listener)
+    assert statements
+    assert not any("admin_client_assignments" in sql for sql in statements)
+
+    # a new assignment is visible on the next request
+    with app.app_context():
+        db.session.add(
+            AdminClientAssignment(admin_user_id=admin_id, client_user_id=client_two_id)
+        )
+        db.session.commit()
+    assert client.post(f"/admin/clients/{client_two_id}/select").status_code in (
+        302,
+        303,
+    )
+
+
+def _assign_one_client(create_user) -> tuple[int, int]:
+    admin = create_user("admin@example.com", is_admin=True)
+    client_user = create_user("one@example.com")
+    db.session.add(
+        AdminClientAssignment(admin_user_id=admin.id, client_user_id=client_user.id)
+    )
+    db.session.commit()
+    return admin.id, client_user.id
+
+
+def _revoke(admin_id: int) -> None:
+    # Core delete: no flush event, as if another worker had committed it
+    db.session.execute(
+        db.delete(AdminClientAssignment).where(
+            AdminClientAssignment.admin_user_id == admin_id
+        )
+    )
+    db.session.commit()
+
+
+def test_revoked_assignment_reaches_every_worker_sharing_the_backend(
+    create_user, tmp_path
+) -> None:
+    path = str(tmp_path / "cache.sqlite")
+    worker_a, worker_b = AssignmentCache(), AssignmentCache()
+    for worker in (worker_a, worker_b):
+        worker.enabled = True
+        worker.backend = SQLiteBackend(path)
+
+    admin_id, client_id = _assign_one_client(create_user)
+    assert worker_a.client_ids(admin_id) == {client_id}
+    _revoke(admin_id)
+    worker_b.invalidate([admin_id])
+    assert worker_a.client_ids(admin_id) == frozenset()
+
+
+def test_assignments_are_read_per_call_with_a_per_process_backend(create_user) -> None:
+    class MultiWorkerConfig(TestConfig):
+        CACHE_SINGLE_PROCESS = False
+
+    app = create_app(MultiWorkerConfig)
+    assert not assignment_cache.enabled
+    with app.app_context():
+        db.create_all()
+        admin_id, client_id = _assign_one_client(create_user)
+        assert assignment_cache.client_ids(admin_id) == {client_id}
+        _revoke(admin_id)
+        assert assignment_cache.client_ids(admin_id) == frozenset()
+        db.drop_all()
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import pytest
+
+from physiolog.admission import TokenBucket, admission_control
+
+from conftest import TestConfig
+
+
+@pytest.fixture
+def app_config():
+    class Config(TestConfig):
+        ADMISSION_HEAVY_RATE_PER_S = 0.5
+        ADMISSION_HEAVY_BURST = 3
+        ADMISSION_MAX_CONCURRENT = 4
+
+    return Config
+
+
+@pytest.fixture
+def hold_app_context():
+    # Flask-Login keeps the loaded user on ``g``, and the buckets are keyed
+    # by that user.
+    return False
+
+
+@pytest.fixture
+def alice(create_user, login):
+    create_user("a@example.com")
+    return login("a@example.com")
+
+
+def test_token_bucket_refills_at_rate() -> None:
+    bucket = TokenBucket(rate=2.0, burst=2.0, now=0.0)
+    assert bucket.take(0.0) == 0.0
+    assert bucket.take(0.0) == 0.0
+    assert bucket.take(0.0) == pytest.approx(0.5)
+    assert bucket.take(0.25) == pytest.approx(0.25)
+    assert bucket.take(0.5) == 0.0
+
+
+def test_heavy_reads_are_rate_limited_per_user(alice, create_user, login) -> None:
+    before = admission_control.metrics()
+    statuses = [alice.get("/api/stats").status_code for _ in range(4)]
+    assert statuses == [404, 404, 404, 429]  # no entries yet; then the burst is spent
+
+    res = alice.get("/api/entries")
+    assert res.status_code == 429
+    assert res.get_json() == {"success": False, "error": "Too many requests"}
+    assert int(res.headers["Retry-After"]) >= 1
+
+    # writes and other users are not affected
+    res = alice.post("/api/entries", json={"date": "2026-02-01", "weight_kg": 70})
+    assert res.status_code == 201
+    create_user("b@example.com")
+    assert login("b@example.com").get("/api/stats").status_code == 404
+
+    after = admission_control.metrics()
+    assert after["rejected_rate"] - before["rejected_rate"] == 2
+    assert after["rejected_heavy"] - before["rejected_heavy"] == 2
+    assert after["in_flight"] == 0
+
+
+def test_cache_hits_take_no_tokens(alice) -> None:
+    res = alice.post("/api/entries", json={"date": "2026-02-01", "weight_kg": 70})
+    assert res.status_code == 201
+    before = admission_control.metrics()
+    # one miss takes a token; the repeats are served from the response cache
+    assert [alice.get("/api/stats").status_code for _ in range(6)] == [200] * 6
+    after = admission_control.metrics()
+    assert after["admitted"] - before["admitted"] == 1
+    assert after["rejected_rate"] == before["rejected_rate"]
+
+
+def test_global_concurrency_cap(alice) -> None:
+    before = admission_control.metrics()["rejected_concurrency"]
+    admission_control._in_flight = admission_control.max_concurrent  # all slots busy
+    try:
+        res = alice.get("/api/stats")
+        assert res.status_code == 429
+        assert res.headers["Retry-After"] == "1"
+    finally:
+        admission_control._in_flight = 0
+    assert admission_control.metrics()["rejected_concurrency"] == before + 1
+    assert alice.get("/api/stats").status_code == 404
+
+
+def test_admission_control_can_be_disabled(alice) -> None:
+    admission_control.enabled = False
+    try:
+        assert all(alice.get("/api/stats").status_code == 404 for _ in range(6))
+    finally:
+        admission_control.enabled = True
@@ -3,47 +3,9 @@ from __future__ import annotations
 from datetime import date, timedelta
 
 import pytest
+from sqlalchemy import event
 
-from physiolog import create_app
 from physiolog.extensions import db
-from physiolog.models import User
-
-
-class TestConfig:
-    TESTING = True
-    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-    AUTO_CREATE_DB = False
-    DEBUG = False
-    SECRET_KEY = "test-secret-key"
-
-
-@pytest.fixture
-def app():
-    app = create_app(TestConfig)
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
-
-
-@pytest.fixture
-def client(app):
-    myclient = app.test_client()
-    with app.app_context():
-        user = User(email="test@example.com")
-        user.set_password("testpassword")
-        db.session.add(user)
-        db.session.commit()
-
-    login_res = myclient.post(
-        "/login",
-        data={"email": "test@example.com", "password": "testpassword"},
-        follow_redirects=False,
-    )
-    assert login_res.status_code in (302, 303)
-    return myclient
 
 
 def test_entries_lifecycle_contract(client) -> None:
@@ -162,3 +124,133 @@ def test_entries_window_filtering_rejects_non_positive_days(
     body = res.get_json()
     assert body["success"] is False
     assert body["error"] == "days must be a positive integer"
+
+
+def test_entries_bulk_upserts_and_reports_per_row_status(client) -> None:
+    assert client.post(
+        "/api/entries", json={"date": "2026-01-02", "weight_kg": 70.0}
+    ).status_code == 201
+
+    items = [
+        {"date": f"2026-01-{day:02d}", "weight_kg": 70.0 + day / 10, "steps": 8000}
+        for day in range(1, 31)
+    ]
+    items.append({"date": "2026/01/31"})
+    items.append({"date": "2026-01-05", "weight_kg": 99.0})
+
+    res = client.post("/api/entries/bulk", json={"entries": items})
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["success"] is True
+    assert body["summary"] == {"created": 29, "updated": 1, "errors": 2}
+    assert body["results"][1] == {"index": 1, "date": "2026-01-02", "status": "updated"}
+    assert body["results"][30]["status"] == "error"
+    assert body["results"][31]["error"] == "Duplicate date in request"
+
+    entry = client.get("/api/entries?date=2026-01-02").get_json()["entry"]
+    assert entry["weight_kg"] == 70.2
+    assert entry["steps_count"] == 8000
+    assert len(client.get("/api/entries").get_json()["entries"]) == 30
+
+
+def test_entries_bulk_rejects_empty_payload(client) -> None:
+    res = client.post("/api/entries/bulk", json={"entries": []})
+    assert res.status_code == 400
+    assert res.get_json()["success"] is False
+
+
+def test_entries_post_duplicate_date_returns_conflict(client) -> None:
+    payload = {"date": "2026-02-22", "weight_kg": 72.0}
+    assert client.post("/api/entries", json=payload).status_code == 201
+
+    res = client.post("/api/entries", json=payload)
+    assert res.status_code == 409
+    assert res.get_json() == {"success": False, "error": "Date already exists"}
+
+    res = client.put("/api/entries", json={"date": "2026-02-23", "weight_kg": 71.0})
+    assert res.status_code == 404
+
+
+def test_entries_prefer_minimal_and_merge_duplicates(client) -> None:
+    res = client.post(
+        "/api/entries",
+        json={"date": "2026-02-24", "weight_kg": 72.0},
+        headers={"Prefer": "return=minimal"},
+    )
+    assert res.status_code == 201
+    assert res.headers["Preference-Applied"] == "return=minimal"
+    body = res.get_json()
+    assert body["success"] is True
+    assert body["date"] == "2026-02-24"
+    assert "entry" not in body
+
+    writes: list[str] = []
+    entry_writes = ("INSERT INTO health_entries", "UPDATE health_entries")
+
+    def record(conn, cursor, statement, *args) -> None:
+        if statement.startswith(entry_writes):
+            writes.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        res = client.post(
+            "/api/entries",
+            json={"date": "2026-02-24", "weight_kg": 73.5},
+            headers={"Prefer": "resolution=merge-duplicates, return=minimal"},
+        )
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    assert res.status_code == 200  # updated
+    assert res.get_json()["id"] == body["id"]
+    assert len(writes) == 1 and "ON CONFLICT" in writes[0]  # one upsert
+
+    entry = client.get("/api/entries?date=2026-02-24").get_json()["entry"]
+    assert entry["weight_kg"] == 73.5
+
+    res = client.post(
+        "/api/entries",
+        json={"date": "2026-02-25", "weight_kg": 73.0},
+        headers={"Prefer": "resolution=merge-duplicates"},
+    )
+    assert res.status_code == 201  # created
+    assert res.get_json()["entry"]["weight_kg"] == 73.0
+    assert res.get_json()["entry"]["id"] != body["id"]
+
+
+def test_entries_delete_leaves_tombstone_for_changes_feed(client) -> None:
+    for day, weight in (
+        ("2026-03-01", 72.0),
+        ("2026-03-02", 72.2),
+        ("2026-03-03", 72.4),
+    ):
+        res = client.post("/api/entries", json={"date": day, "weight_kg": weight})
+        assert res.status_code == 201
+
+    res = client.get("/api/entries/changes")
+    assert res.status_code == 200
+    snapshot = res.get_json()
+    assert snapshot["full"] is True
+    dates = [e["date"] for e in snapshot["entries"]]
+    assert dates == ["2026-03-03", "2026-03-02", "2026-03-01"]
+    assert snapshot["deleted"] == []
+    token = snapshot["token"]
+
+    res = client.delete("/api/entries?date=2026-03-02")
+    assert res.status_code == 200
+    assert client.delete("/api/entries?date=2026-03-02").status_code == 404
+    res = client.put("/api/entries", json={"date": "2026-03-03", "weight_kg": 72.6})
+    assert res.status_code == 200
+
+    delta = client.get(f"/api/entries/changes?since={token}").get_json()
+    assert delta["full"] is False
+    assert delta["deleted"] == ["2026-03-02"]
+    # the token overlap may re-send rows written just before it was issued
+    changed = {e["date"]: e for e in delta["entries"]}
+    assert "2026-03-02" not in changed
+    assert changed["2026-03-03"]["weight_kg"] == 72.6
+
+
+def test_entries_changes_rejects_malformed_token(client) -> None:
+    res = client.get("/api/entries/changes?since=not-a-token")
+    assert res.status_code == 400
+    assert res.get_json() == {"success": False, "error": "Invalid since token"}
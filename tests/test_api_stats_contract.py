@@ -4,48 +4,6 @@ from datetime import date
 
 import pytest
 
-from physiolog import create_app
-from physiolog.extensions import db
-from physiolog.models import User
-
-
-class TestConfig:
-    TESTING = True
-    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-    AUTO_CREATE_DB = False
-    DEBUG = False
-    SECRET_KEY = "test-secret-key"
-
-
-# Fixtures are eusable setup/teardown helpers 
-@pytest.fixture
-def app():
-    app = create_app(TestConfig)
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
-
-
-@pytest.fixture
-def client(app):
-    myclient = app.test_client()
-    with app.app_context():
-        user = User(email='test@example.com')
-        user.set_password('testpassword')
-        db.session.add(user)
-        db.session.commit()
-
-    login_res = myclient.post(
-        "/login", 
-        data={"email": "test@example.com", "password": "testpassword"},
-        follow_redirects=False,
-    )
-    assert login_res.status_code in (302,303)  # Redirect to overview after login
-    return myclient
-
 
 def test_stats_success_contract_shape(client) -> None:
     payload = {
@@ -96,3 +54,20 @@ def test_stats_no_data_returns_contract_error(client) -> None:
     body = res.get_json()
     assert body["success"] is False
     assert body["error"] == "No data available"
+
+
+def test_stats_optional_dispersion_and_quantiles(client) -> None:
+    for day, weight in ((1, 70.0), (2, 72.0), (3, 74.0)):
+        payload = {"date": f"2026-02-0{day}", "weight_kg": weight}
+        assert client.post("/api/entries", json=payload).status_code == 201
+
+    res = client.get("/api/stats?dispersion=1&quantiles=0.5")
+    assert res.status_code == 200
+    stats = res.get_json()["stats"]
+    assert stats["min_weight"] == 70.0
+    assert stats["max_weight"] == 74.0
+    assert stats["p50_weight"] == 72.0
+    assert "std_weight" in stats
+
+    res = client.get("/api/stats?quantiles=1.5")
+    assert res.status_code == 400
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import threading
+
+from physiolog.background import RecomputeQueue, _DurableStore, recompute_queue
+
+
+def test_committed_entry_writes_run_handlers_off_request(create_user, login) -> None:
+    seen: list[int] = []
+    recompute_queue.register("test", seen.append)
+    try:
+        user_id = create_user("test@example.com").id
+        client = login("test@example.com")
+
+        assert (
+            client.post("/api/entries", json={"date": "2026-03-01"}).status_code == 201
+        )
+        items = [{"date": f"2026-03-{day:02d}"} for day in range(2, 10)]
+        assert (
+            client.post("/api/entries/bulk", json={"entries": items}).status_code == 200
+        )
+
+        assert recompute_queue.join(timeout=5)
+        assert seen and set(seen) == {user_id}
+    finally:
+        recompute_queue.unregister("test")
+
+
+def test_queue_coalesces_writes_for_same_user(app) -> None:
+    queue = RecomputeQueue()
+    queue.init_app(app)
+    started = threading.Event()
+    release = threading.Event()
+    calls: list[int] = []
+
+    def slow_handler(user_id: int) -> None:
+        calls.append(user_id)
+        started.set()
+        release.wait(timeout=5)
+
+    queue.register("slow", slow_handler)
+    queue.enqueue(1)
+    assert started.wait(timeout=5)
+    for _ in range(10):
+        queue.enqueue(1)  # arrive while the first run is in progress
+    release.set()
+
+    assert queue.join(timeout=5)
+    assert calls == [1, 1]
+    metrics = queue.metrics()
+    assert metrics["coalesced"] == 9
+    assert metrics["depth"] == 0
+    assert metrics["processed"] == 2
+
+
+def test_durable_queue_recovers_pending_work(app, tmp_path) -> None:
+    path = str(tmp_path / "queue.db")
+    app.config["BACKGROUND_QUEUE_DURABLE_PATH"] = path
+    _DurableStore(path).add(7, 0.0)  # left behind by a worker that died
+
+    recovered: list[int] = []
+    queue = RecomputeQueue()
+    queue.register("recover", recovered.append)
+    queue.init_app(app)
+
+    assert queue.join(timeout=5)
+    assert recovered == [7]
+    assert queue._durable.pending() == []
+
+
+def test_metrics_endpoint_requires_admin(create_user, login) -> None:
+    create_user("user@example.com")
+    client = login("user@example.com")
+
+    assert client.get("/api/metrics").status_code == 403
+
+
+def test_metrics_endpoint_reports_queue_state(create_user, login) -> None:
+    create_user("admin@example.com", is_admin=True)
+    client = login("admin@example.com")
+
+    body = client.get("/api/metrics").get_json()
+    assert body["success"] is True
+    assert "depth" in body["background_queue"]
+    assert "last_lag_s" in body["background_queue"]
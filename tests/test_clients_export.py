@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import csv
+import io
+import zipfile
+from datetime import date, timedelta
+
+import pytest
+
+from physiolog import export
+from physiolog.admission import admission_control
+from physiolog.extensions import db
+from physiolog.models import AdminClientAssignment, HealthEntry
+
+from conftest import TestConfig
+
+
+@pytest.fixture
+def app_config():
+    class Config(TestConfig):
+        EXPORT_YIELD_PER = 7
+
+    return Config
+
+
+@pytest.fixture
+def admin_client(create_user, login):
+    admin = create_user("admin@example.com", is_admin=True)
+    for i in range(3):
+        client_user = create_user(f"client{i}@example.com")
+        db.session.add(
+            AdminClientAssignment(admin_user_id=admin.id, client_user_id=client_user.id)
+        )
+        for day in range(20 * i):  # client0 has no entries
+            db.session.add(
+                HealthEntry(
+                    user_id=client_user.id,
+                    date=date(2025, 1, 1) + timedelta(days=day),
+                    weight_kg=70 + day / 10,
+                    observations="felt good, slept late" if day == 0 else None,
+                )
+            )
+    other = create_user("other@example.com")
+    db.session.add(HealthEntry(user_id=other.id, date=date(2025, 1, 1), weight_kg=50))
+    db.session.commit()
+    return login("admin@example.com")
+
+
+def _read_archive(data: bytes) -> dict[str, list[dict[str, str]]]:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        return {
+            name: list(csv.DictReader(io.TextIOWrapper(archive.open(name), "utf-8")))
+            for name in archive.namelist()
+        }
+
+
+def test_export_streams_one_csv_per_assigned_client(admin_client) -> None:
+    with admin_client.get("/api/admin/export") as res:
+        assert res.status_code == 200
+        assert res.is_streamed
+        assert res.mimetype == "application/zip"
+        assert res.headers["Content-Disposition"].startswith("attachment;")
+        files = _read_archive(res.get_data())
+
+    ids = [int(name.split("-")[0]) for name in files]
+    assert ids == sorted(ids)
+    by_email = {name.split("-", 1)[1]: rows for name, rows in files.items()}
+    assert set(by_email) == {f"client{i}_example.com.csv" for i in range(3)}
+    assert by_email["client0_example.com.csv"] == []
+    client2 = by_email["client2_example.com.csv"]
+    assert len(client2) == 40
+    assert client2[0]["date"] == "2025-01-01"
+    assert client2[0]["observations"] == "felt good, slept late"
+    assert client2[0]["is_outlier"] == "0"
+    assert float(client2[-1]["weight_kg"]) == pytest.approx(73.9)
+    assert client2[-1]["body_fat_percent"] == ""
+
+
+def test_export_is_sent_in_chunks(admin_client, monkeypatch) -> None:
+    monkeypatch.setattr(export, "EXPORT_CHUNK_BYTES", 256)
+    with admin_client.get("/api/admin/export") as res:
+        chunks = list(res.response)
+    assert len([c for c in chunks if c]) > 2
+    files = _read_archive(b"".join(chunks))
+    assert sum(len(rows) for rows in files.values()) == 60
+
+
+def test_export_holds_an_admission_slot_while_streaming(admin_client) -> None:
+    with admin_client.get("/api/admin/export") as res:
+        assert res.status_code == 200
+        assert admission_control.metrics()["in_flight"] == 1
+        assert b"".join(res.response)
+    assert admission_control.metrics()["in_flight"] == 0
+
+
+def test_export_requires_admin(create_user, login) -> None:
+    create_user("user@example.com")
+    assert login("user@example.com").get("/api/admin/export").status_code == 403
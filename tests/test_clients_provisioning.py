@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import pytest
+
+from physiolog.extensions import db
+from physiolog.models import AdminClientAssignment, User
+from physiolog.scope import assignment_cache
+
+from conftest import TestConfig
+
+
+@pytest.fixture
+def app_config():
+    class Config(TestConfig):
+        PROVISION_MAX_ROWS = 10
+
+    return Config
+
+
+def test_csv_roster_creates_and_assigns_clients(create_user, login) -> None:
+    admin = create_user("coach@example.com", is_admin=True)
+    create_user("taken@example.com")
+    admin_client = login("coach@example.com")
+    assert assignment_cache.client_ids(admin.id) == frozenset()
+
+    roster = (
+        "Email,Name,Password\n"
+        "Ana@Example.com,Ana Lopez,secret-1\n"
+        "ben@example.com,,secret-2\n"
+        "taken@example.com,Taken,secret-3\n"
+        "ana@example.com,Ana Again,secret-4\n"
+        "not-an-email,Nope,secret-5\n"
+        "cleo@example.com,Cleo,\n"
+    )
+    res = admin_client.post(
+        "/api/admin/clients/bulk", data=roster, content_type="text/csv"
+    )
+    assert res.status_code == 200
+    payload = res.get_json()
+    assert payload["summary"] == {"created": 2, "conflicts": 2, "errors": 2}
+    statuses = [(r["index"], r["status"]) for r in payload["results"]]
+    assert statuses == [
+        (0, "created"),
+        (1, "created"),
+        (2, "conflict"),
+        (3, "conflict"),
+        (4, "error"),
+        (5, "error"),
+    ]
+    assert payload["results"][2]["error"] == "Email already registered"
+    assert payload["results"][3]["error"] == "Duplicate email in request"
+
+    ana = db.session.scalar(db.select(User).where(User.email == "ana@example.com"))
+    assert ana.name == "Ana Lopez" and ana.check_password("secret-1")
+    assert ana.id == payload["results"][0]["user_id"]
+    assigned = set(
+        db.session.scalars(
+            db.select(AdminClientAssignment.client_user_id).where(
+                AdminClientAssignment.admin_user_id == admin.id
+            )
+        )
+    )
+    assert assigned == {
+        r["user_id"] for r in payload["results"] if r["status"] == "created"
+    }
+    # the cached client ids were invalidated, new clients are selectable at once
+    assert assignment_cache.client_ids(admin.id) == frozenset(assigned)
+    assert "Ana Lopez" in admin_client.get("/clients?q=lopez").get_data(as_text=True)
+
+    # the new account can sign in
+    ben = login("ben@example.com", "secret-2")
+    assert ben.get("/api/user-settings").status_code == 200
+
+
+def test_json_roster_and_limits(create_user, login) -> None:
+    create_user("coach@example.com", is_admin=True)
+    admin_client = login("coach@example.com")
+    users = [{"email": f"c{i}@example.com", "password": "pw"} for i in range(3)]
+    res = admin_client.post("/api/admin/clients/bulk", json={"users": users})
+    assert res.status_code == 200
+    assert res.get_json()["summary"] == {"created": 3, "conflicts": 0, "errors": 0}
+
+    res = admin_client.post("/api/admin/clients/bulk", json={"users": users * 4})
+    assert res.status_code == 400
+    res = admin_client.post("/api/admin/clients/bulk", json={"users": []})
+    assert res.status_code == 400
+    res = admin_client.post(
+        "/api/admin/clients/bulk", data="name\nx\n", content_type="text/csv"
+    )
+    assert res.status_code == 400
+
+
+def test_bulk_provisioning_requires_admin(create_user, login) -> None:
+    create_user("user@example.com")
+    res = login("user@example.com").post(
+        "/api/admin/clients/bulk",
+        json={"users": [{"email": "x@example.com", "password": "pw"}]},
+    )
+    assert res.status_code == 403
+    assert (
+        db.session.scalar(db.select(User).where(User.email == "x@example.com")) is None
+    )
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from physiolog.extensions import db
+from physiolog.models import AdminClientAssignment, HealthEntry, User
+
+from conftest import TestConfig
+
+
+@pytest.fixture
+def app_config():
+    class Config(TestConfig):
+        RESPONSE_CACHE_ENABLED = False
+
+    return Config
+
+
+def _add_entries(user: User, start: date, weights: list[float | None], **extra) -> None:
+    for offset, weight in enumerate(weights):
+        db.session.add(
+            HealthEntry(
+                user_id=user.id,
+                date=start + timedelta(days=offset),
+                weight_kg=weight,
+                **extra,
+            )
+        )
+
+
+@pytest.fixture
+def admin_client(create_user, login):
+    admin = create_user("admin@example.com", is_admin=True)
+    alice = create_user("alice@example.com", name="Alice")
+    bob = create_user("bob@example.com", name="Bob")
+    carol = create_user("carol@example.com", name="Carol")  # no entries
+    other = create_user("other@example.com", name="Other")  # not assigned
+    for client_user in (alice, bob, carol):
+        db.session.add(
+            AdminClientAssignment(admin_user_id=admin.id, client_user_id=client_user.id)
+        )
+    # Alice: 10 daily entries ending 2026-03-10, body fat 20%
+    _add_entries(
+        alice,
+        date(2026, 3, 1),
+        [80.0, 79.8, 79.6, 79.4, 79.2, 79.0, 78.8, 78.6, 78.4, 78.2],
+        body_fat_percent=20.0,
+        steps_count=5000,
+    )
+    # Bob: 3 entries, no 7-day baseline
+    _add_entries(bob, date(2026, 2, 1), [90.0, None, 91.0], calories_kcal=2500)
+    _add_entries(other, date(2026, 3, 1), [60.0])
+    db.session.commit()
+
+    return login("admin@example.com")
+
+
+def test_cohort_stats_requires_admin(create_user, login) -> None:
+    create_user("user@example.com")
+    myclient = login("user@example.com")
+    assert myclient.get("/api/admin/cohort-stats").status_code == 403
+
+
+def test_cohort_stats_cover_every_assigned_client(admin_client) -> None:
+    res = admin_client.get("/api/admin/cohort-stats")
+    assert res.status_code == 200
+    clients = {c["email"]: c for c in res.get_json()["clients"]}
+    assert set(clients) == {"alice@example.com", "bob@example.com", "carol@example.com"}
+
+    alice = clients["alice@example.com"]
+    assert alice["stats"]["avg_weight"] == pytest.approx(79.1)
+    assert alice["stats"]["avg_steps"] == 5000
+    assert alice["stats"]["total_entries"] == 10
+    assert alice["latest"]["weight_kg"] == pytest.approx(78.2)
+    assert alice["latest"]["fat_mass_kg"] == pytest.approx(15.64)
+    # baseline: latest value on or before 2026-03-03
+    assert alice["change_7d"]["weight_kg_since"] == "2026-03-03"
+    assert alice["change_7d"]["weight_kg"] == pytest.approx(-1.4)
+    assert alice["change_7d"]["fat_mass_kg"] == pytest.approx(-0.28)
+
+    bob = clients["bob@example.com"]
+    assert bob["stats"]["avg_weight"] == pytest.approx(90.5)
+    assert bob["stats"]["avg_calories"] == 2500
+    assert bob["latest"]["weight_kg"] == 91.0
+    assert bob["latest"]["fat_mass_kg"] is None
+    assert bob["change_7d"]["weight_kg"] is None
+
+    carol = clients["carol@example.com"]
+    assert carol["stats"] is None and carol["latest"] is None
+
+
+def test_cohort_window_ends_at_each_clients_latest_entry(admin_client) -> None:
+    clients = {
+        c["email"]: c
+        for c in admin_client.get("/api/admin/cohort-stats?window=2d").get_json()[
+            "clients"
+        ]
+    }
+    assert clients["alice@example.com"]["start_date"] == "2026-03-09"
+    assert clients["alice@example.com"]["stats"]["avg_weight"] == pytest.approx(78.3)
+    assert clients["bob@example.com"]["start_date"] == "2026-02-02"
+    assert clients["bob@example.com"]["stats"]["avg_weight"] == 91.0
+
+
+def test_cohort_detailed_stats_match_grouped_averages(app, admin_client) -> None:
+    plain = admin_client.get("/api/admin/cohort-stats?days=5").get_json()["clients"]
+    detailed = admin_client.get(
+        "/api/admin/cohort-stats?days=5&dispersion=1&quantiles=0.5"
+    ).get_json()["clients"]
+    for summary, full in zip(plain, detailed):
+        assert summary["email"] == full["email"]
+        assert summary["start_date"] == full["start_date"]
+        if summary["stats"] is None:
+            assert full["stats"] is None
+            continue
+        for key, value in summary["stats"].items():
+            assert full["stats"][key] == pytest.approx(value)
+    alice = next(c for c in detailed if c["email"] == "alice@example.com")
+    assert alice["stats"]["p50_weight"] == pytest.approx(78.6)
+    assert alice["stats"]["min_weight"] == pytest.approx(78.2)
+
+    app.config["COHORT_STATS_WORKERS"] = 0  # inline
+    inline = admin_client.get(
+        "/api/admin/cohort-stats?days=5&dispersion=1&quantiles=0.5"
+    ).get_json()["clients"]
+    assert inline == detailed
+
+
+def test_cohort_statement_count_does_not_grow_with_clients(
+    admin_client, create_user
+) -> None:
+    statements: list[str] = []
+
+    def count(conn, cursor, statement, *args) -> None:
+        statements.append(statement)
+
+    engine = db.engine
+    admin_client.get("/api/admin/cohort-stats")  # warm the scope caches
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        assert admin_client.get("/api/admin/cohort-stats").status_code == 200
+        baseline = len(statements)
+
+        admin = db.session.scalar(
+            db.select(User).where(User.email == "admin@example.com")
+        )
+        for i in range(5):
+            extra = create_user(f"extra{i}@example.com")
+            _add_entries(extra, date(2026, 1, 1), [70.0 + i, 71.0 + i])
+            db.session.add(
+                AdminClientAssignment(admin_user_id=admin.id, client_user_id=extra.id)
+            )
+        db.session.commit()
+        admin_client.get("/api/admin/cohort-stats")  # reload the assignments
+
+        statements.clear()
+        res = admin_client.get("/api/admin/cohort-stats")
+        assert len(res.get_json()["clients"]) == 8
+        assert len(statements) == baseline
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
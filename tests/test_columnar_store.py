@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from physiolog.background import recompute_queue
+from physiolog.columnar_store import columnar_store
+from physiolog.extensions import db
+from physiolog.models import User
+
+from conftest import TestConfig
+
+
+@pytest.fixture
+def app_config(tmp_path):
+    class Config(TestConfig):
+        RESPONSE_CACHE_ENABLED = False
+        COLUMNAR_STORE_ENABLED = True
+        COLUMNAR_STORE_PATH = str(tmp_path / "columnar")
+
+    return Config
+
+
+def _seed(client) -> None:
+    items = [
+        {
+            "date": f"2026-02-{day:02d}",
+            "weight_kg": 70 + day / 10,
+            "steps_count": 1000 * day,
+        }
+        for day in range(1, 21)
+    ]
+    items.append({"date": "2026-02-25", "weight_kg": 71.0, "sleep_total": "07:30"})
+    assert client.post("/api/entries/bulk", json={"entries": items}).status_code == 200
+    assert recompute_queue.join(timeout=5)
+
+
+def test_refresh_writes_memory_mapped_columns(client) -> None:
+    _seed(client)
+    user_id = db.session.scalar(db.select(User.id))
+    snapshot = columnar_store.load(user_id, ["weight_kg", "steps_count"])
+    assert snapshot is not None
+    assert isinstance(snapshot.columns["weight_kg"], np.memmap)
+    assert len(snapshot) == 21
+    assert snapshot.first_date.isoformat() == "2026-02-01"
+    assert snapshot.last_date.isoformat() == "2026-02-25"
+    assert np.isnan(snapshot.columns["steps_count"][-1])
+
+    week = snapshot.last_days(7)
+    assert week.first_date.isoformat() == "2026-02-19"
+    assert len(week) == 3
+    assert columnar_store.load(user_id, ["no_such_column"]) is None
+
+
+@pytest.mark.parametrize(
+    "query", ["", "?window=7d", "?days=30&dispersion=1&quantiles=0.5"]
+)
+def test_stats_from_store_match_sql(client, query) -> None:
+    _seed(client)
+    reads = columnar_store.metrics()["reads"]
+    from_store = client.get(f"/api/stats{query}").get_json()
+    assert columnar_store.metrics()["reads"] == reads + 1
+
+    columnar_store.enabled = False
+    try:
+        from_sql = client.get(f"/api/stats{query}").get_json()
+    finally:
+        columnar_store.enabled = True
+    assert from_store == from_sql
+
+
+def test_store_is_bypassed_until_refreshed_after_a_write(client) -> None:
+    _seed(client)
+    user_id = db.session.scalar(db.select(User.id))
+    recompute_queue.enabled = False  # hold back the refresh
+    try:
+        res = client.put("/api/entries", json={"date": "2026-02-25", "weight_kg": 90.0})
+        assert res.status_code == 200
+        assert columnar_store.load(user_id, ["weight_kg"]) is None
+        stats = client.get("/api/stats?window=7d").get_json()["stats"]
+        assert stats["avg_weight"] == pytest.approx((71.9 + 72.0 + 90.0) / 3, abs=0.01)
+    finally:
+        recompute_queue.enabled = True
+
+    columnar_store.refresh(user_id)
+    snapshot = columnar_store.load(user_id, ["weight_kg"])
+    assert snapshot is not None and snapshot.columns["weight_kg"][-1] == 90.0
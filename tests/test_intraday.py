@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from physiolog.services.intraday import (
+    build_sample_series,
+    choose_bucket_s,
+    parse_series_payload,
+)
+
+
+def epoch(text: str) -> int:
+    return int(datetime.fromisoformat(text).replace(tzinfo=timezone.utc).timestamp())
+
+
+def test_build_sample_series_sorts_and_keeps_last_duplicate() -> None:
+    mid, ts, values = build_sample_series("heart_rate", [120, 60, 120], [70, 60, 72])
+    assert mid == 1
+    assert ts.tolist() == [60, 120]
+    assert values.tolist() == [60.0, 72.0]
+
+
+@pytest.mark.parametrize(
+    "series",
+    [
+        [{"metric": "blood_sugar", "ts": [1], "values": [1]}],
+        [{"metric": "steps", "ts": [1, 2], "values": [1]}],
+        [{"metric": "steps", "ts": [1.5], "values": [1]}],
+        [{"metric": "sleep_stage", "ts": [1], "values": [7]}],
+        [],
+    ],
+)
+def test_parse_series_payload_rejects_invalid_series(series) -> None:
+    with pytest.raises(ValueError):
+        parse_series_payload(series)
+
+
+def test_choose_bucket_respects_ladder_and_point_limit() -> None:
+    assert choose_bucket_s(86_400, 500) == 300
+    assert choose_bucket_s(86_400, 500, requested=600) == 900
+    assert choose_bucket_s(30 * 86_400, 500) == 3 * 3_600
+
+    # multi-year ranges widen to whole days instead of exceeding the cap
+    five_years = 5 * 365 * 86_400
+    bucket = choose_bucket_s(five_years, 500)
+    assert bucket == 4 * 86_400
+    assert -(-five_years // bucket) <= 500
+    assert choose_bucket_s(501 * 86_400, 500) == 2 * 86_400
+    assert choose_bucket_s(86_400, 500, requested=7 * 86_400) == 7 * 86_400
+
+
+def test_intraday_ingest_updates_daily_steps_and_sleep(client) -> None:
+    day = epoch("2026-01-02T00:00:00")
+    steps_ts = list(range(day + 8 * 3600, day + 9 * 3600, 60))  # 60 minutes
+    # 23:00 Jan 1 -> 07:00 Jan 2, awake for the first 30 minutes
+    night = epoch("2026-01-01T23:00:00")
+    sleep_ts = list(range(night, night + 8 * 3600, 60))
+    sleep_values = [0] * 30 + [2] * (len(sleep_ts) - 30)
+    payload = {
+        "series": [
+            {"metric": "steps", "ts": steps_ts, "values": [100] * len(steps_ts)},
+            {"metric": "sleep_stage", "ts": sleep_ts, "values": sleep_values},
+            {
+                "metric": "heart_rate",
+                "ts": steps_ts,
+                "values": [60 + i % 5 for i in range(60)],
+            },
+        ]
+    }
+    res = client.post("/api/intraday", json=payload)
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["samples"] == 60 + 480 + 60
+    assert body["days_updated"] == {
+        "steps_count": ["2026-01-02"],
+        "sleep_hours": ["2026-01-02"],
+    }
+
+    entry = client.get("/api/entries?date=2026-01-02").get_json()["entry"]
+    assert entry["steps_count"] == 6000
+    assert entry["sleep_hours"] == "07:30"
+
+    # re-sending overwrites instead of double counting
+    payload["series"][0]["values"] = [50] * len(steps_ts)
+    assert client.post("/api/intraday", json=payload).status_code == 200
+    entry = client.get("/api/entries?date=2026-01-02").get_json()["entry"]
+    assert entry["steps_count"] == 3000
+
+
+def test_intraday_ingest_keeps_manual_fields(client) -> None:
+    assert (
+        client.post(
+            "/api/entries",
+            json={"date": "2026-01-05", "weight_kg": 72.0, "steps_count": 10},
+        ).status_code
+        == 201
+    )
+    ts = epoch("2026-01-05T12:00:00")
+    res = client.post(
+        "/api/intraday",
+        json={"series": [{"metric": "steps", "ts": [ts], "values": [4321]}]},
+    )
+    assert res.status_code == 200
+    entry = client.get("/api/entries?date=2026-01-05").get_json()["entry"]
+    assert entry["steps_count"] == 4321
+    assert entry["weight_kg"] == 72.0
+
+
+def test_intraday_range_read_returns_buckets(client) -> None:
+    day = epoch("2026-01-03T00:00:00")
+    ts = list(range(day, day + 86_400, 60))
+    values = np.where(np.arange(len(ts)) % 2, 70, 50).tolist()
+    client.post(
+        "/api/intraday",
+        json={"series": [{"metric": "heart_rate", "ts": ts, "values": values}]},
+    )
+
+    res = client.get(
+        "/api/intraday?metric=heart_rate&start=2026-01-03&end=2026-01-03&bucket=3600"
+    )
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["bucket_s"] == 3600
+    points = body["points"]
+    assert len(points["ts"]) == 24
+    assert points["ts"][0] == day
+    assert points["count"][0] == 60
+    assert points["min"][0] == 50 and points["max"][0] == 70
+    assert points["avg"][0] == pytest.approx(60)
+
+    # default range: the day before the latest sample, never raw minutes
+    body = client.get("/api/intraday?metric=heart_rate").get_json()
+    assert body["bucket_s"] >= 300
+    assert sum(body["points"]["count"]) == 1440
+
+
+def test_intraday_rejects_bad_requests(client) -> None:
+    assert client.get("/api/intraday?metric=nope").status_code == 400
+    assert client.get("/api/intraday?metric=steps&start=yesterday").status_code == 400
+    res = client.post("/api/intraday", json={"series": "x"})
+    assert res.status_code == 400
+    assert res.get_json()["success"] is False
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import pytest
+
+from physiolog.services.meals import parse_meal_item
+
+
+def test_parse_meal_item_derives_calories_from_macros() -> None:
+    item = parse_meal_item(
+        {
+            "date": "2026-02-01",
+            "name": " Greek  yogurt ",
+            "protein_g": 10,
+            "carbs_g": 4,
+            "fat_g": 5,
+        }
+    )
+    assert item.name == "Greek yogurt"
+    assert item.calories_kcal == 10 * 4 + 4 * 4 + 5 * 9
+    with pytest.raises(ValueError):
+        parse_meal_item({"date": "2026-02-01", "name": "x", "fat_g": -1})
+    with pytest.raises(ValueError):
+        parse_meal_item({"date": "2026-02-01"})
+
+
+def test_meal_items_roll_up_into_daily_entry(client) -> None:
+    assert (
+        client.post(
+            "/api/entries",
+            json={"date": "2026-02-01", "weight_kg": 72.0, "calories_kcal": 9999},
+        ).status_code
+        == 201
+    )
+
+    items = [
+        {
+            "date": "2026-02-01",
+            "meal": "Breakfast",
+            "name": "Oats",
+            "calories_kcal": 380.4,
+            "protein_g": 13.2,
+            "carbs_g": 60.4,
+            "fat_g": 7.1,
+        },
+        {
+            "date": "2026-02-01",
+            "meal": "lunch",
+            "name": "Chicken",
+            "calories_kcal": 330,
+            "protein_g": 62,
+            "fat_g": 7.2,
+        },
+        {"date": "2026-02-02", "name": "Apple", "carbs_g": 25},
+        {"date": "2026-02-02", "calories_kcal": 100},
+    ]
+    res = client.post("/api/meals/items", json={"items": items})
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["summary"] == {"created": 3, "errors": 1}
+
+    entry = client.get("/api/entries?date=2026-02-01").get_json()["entry"]
+    assert entry["calories_kcal"] == 710
+    assert entry["protein_g"] == 75
+    assert entry["carbs_g"] == 60
+    assert entry["fat_g"] == 14
+    assert entry["weight_kg"] == 72.0
+
+    entry = client.get("/api/entries?date=2026-02-02").get_json()["entry"]
+    assert entry["calories_kcal"] == 100
+    assert entry["carbs_g"] == 25
+
+    listed = client.get("/api/meals/items?date=2026-02-01").get_json()["items"]
+    assert [item["name"] for item in listed] == ["Oats", "Chicken"]
+    assert listed[0]["meal"] == "breakfast"
+
+    # deletes subtract; the last item of a day clears the rollup
+    assert client.delete(f"/api/meals/items/{listed[0]['id']}").status_code == 200
+    entry = client.get("/api/entries?date=2026-02-01").get_json()["entry"]
+    assert entry["calories_kcal"] == 330
+    assert entry["carbs_g"] == 0
+    assert client.delete(f"/api/meals/items/{listed[1]['id']}").status_code == 200
+    assert client.delete(f"/api/meals/items/{listed[1]['id']}").status_code == 404
+    entry = client.get("/api/entries?date=2026-02-01").get_json()["entry"]
+    assert entry["calories_kcal"] is None
+
+
+def test_meal_items_rejects_bad_requests(client) -> None:
+    assert client.post("/api/meals/items", json={"items": []}).status_code == 400
+    assert client.get("/api/meals/items?date=02-01-2026").status_code == 400
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from physiolog.entry_writes import refresh_user_outlier_flags
+from physiolog.extensions import db
+from physiolog.models import HealthEntry, User
+from physiolog.services import RollingMedianMAD, flag_outliers_batch, mask_outliers
+from physiolog.services.outliers import OUTLIER_BITS
+
+
+def test_rolling_median_mad_matches_numpy() -> None:
+    rng = random.Random(3)
+    detector = RollingMedianMAD(window=7)
+    history: list[float] = []
+    for _ in range(60):
+        value = round(rng.uniform(60, 90), 1)
+        detector.push(value)
+        history.append(value)
+        window = np.array(history[-7:])
+        median = np.median(window)
+        assert detector.median() == pytest.approx(median)
+        assert detector.mad() == pytest.approx(np.median(np.abs(window - median)))
+
+
+def test_batch_flags_match_streaming_detector() -> None:
+    rng = random.Random(11)
+    values = [rng.gauss(80.0, 0.4) for _ in range(120)]
+    values[40] = 86.0  # spike
+    values[90] = 74.0  # drop
+    values[10] = float("nan")  # missing day
+
+    detector = RollingMedianMAD(window=15)
+    streaming = [
+        False if np.isnan(v) else detector.check_and_push(v, min_scale=0.5)
+        for v in values
+    ]
+    batch = flag_outliers_batch(np.array(values), window=15, min_scale=0.5)
+
+    assert batch.tolist() == streaming
+    assert batch[40] and batch[90]
+    assert not batch[10]
+
+
+def test_spike_is_flagged_at_write_time_and_excluded_on_request(client) -> None:
+    start = date(2026, 1, 1)
+    weights = [80.0, 80.2, 79.9, 80.1, 80.0, 79.8, 80.1]
+    for i, weight in enumerate(weights):
+        payload = {
+            "date": (start + timedelta(days=i)).isoformat(),
+            "weight_kg": weight,
+            "body_fat_percent": 20.0,
+        }
+        res = client.post("/api/entries", json=payload)
+        assert res.status_code == 201
+        assert res.get_json()["entry"]["is_outlier"] is False
+
+    spike_date = (start + timedelta(days=len(weights))).isoformat()
+    res = client.post(
+        "/api/entries",
+        json={"date": spike_date, "weight_kg": 86.0, "body_fat_percent": 20.0},
+    )
+    assert res.status_code == 201
+    assert res.get_json()["entry"]["is_outlier"] is True
+
+    res = client.get(f"/api/entries?date={spike_date}&exclude_outliers=1")
+    assert res.get_json()["entry"]["fat_mass_change"] is None
+
+    all_stats = client.get("/api/stats").get_json()["stats"]
+    clean_stats = client.get("/api/stats?exclude_outliers=1").get_json()["stats"]
+    assert all_stats["avg_weight"] > clean_stats["avg_weight"]
+    assert clean_stats["avg_weight"] == pytest.approx(80.01, abs=0.01)
+    assert clean_stats["total_entries"] == all_stats["total_entries"]
+
+
+def _entry(client, day: date) -> dict:
+    return client.get(f"/api/entries?date={day.isoformat()}").get_json()["entry"]
+
+
+def test_writes_refresh_the_flags_of_later_entries(client) -> None:
+    start = date(2026, 1, 1)
+    for i in range(6):
+        day = (start + timedelta(days=i)).isoformat()
+        assert (
+            client.post(
+                "/api/entries", json={"date": day, "weight_kg": 80.0}
+            ).status_code
+            == 201
+        )
+    spike = start + timedelta(days=6)
+    client.post("/api/entries", json={"date": spike.isoformat(), "weight_kg": 86.0})
+    assert _entry(client, spike)["outlier_metrics"] == ["weight_kg"]
+
+    # with four readings before it, the spike no longer has enough history
+    for i in range(2):
+        res = client.delete(
+            f"/api/entries?date={(start + timedelta(days=i)).isoformat()}"
+        )
+        assert res.status_code == 200
+    assert _entry(client, spike)["is_outlier"] is False
+
+    # a backfilled day restores it; out-of-order writes and edits leave the
+    # same flags as a full recompute
+    client.post("/api/entries", json={"date": start.isoformat(), "weight_kg": 80.1})
+    assert _entry(client, spike)["is_outlier"] is True
+    rng = random.Random(3)
+    for _ in range(40):
+        day = (start + timedelta(days=rng.randrange(30))).isoformat()
+        payload = {
+            "date": day,
+            "weight_kg": round(rng.gauss(80.0, 0.3) + rng.choice([0, 0, 0, 5]), 1),
+            "body_fat_percent": round(
+                rng.gauss(20.0, 0.3) + rng.choice([0, 0, 0, 4]), 1
+            ),
+        }
+        res = client.post("/api/entries", json=payload)
+        if res.status_code == 409:
+            res = client.put("/api/entries", json=payload)
+        assert res.status_code in (200, 201)
+
+    user = db.session.scalar(db.select(User).where(User.email == "test@example.com"))
+    flags = db.session.scalars(
+        db.select(HealthEntry.outlier_metrics).where(HealthEntry.user_id == user.id)
+    ).all()
+    assert any(flags)
+    n_rows, n_changed = refresh_user_outlier_flags(
+        user.id, window=15, threshold=3.5, min_history=5
+    )
+    assert n_rows == len(flags) and n_changed == 0
+
+
+def test_mask_outliers_masks_each_metric_separately() -> None:
+    columns = {
+        "weight_kg": np.array([80.0, 80.2, 80.1]),
+        "body_fat_percent": np.array([20.0, 28.0, 20.1]),
+        "steps_count": np.array([1.0, 2.0, 3.0]),
+    }
+    masked = mask_outliers(columns, [0, OUTLIER_BITS["body_fat_percent"], 3])
+
+    np.testing.assert_array_equal(masked["weight_kg"], [80.0, 80.2, np.nan])
+    np.testing.assert_array_equal(masked["body_fat_percent"], [20.0, np.nan, np.nan])
+    np.testing.assert_array_equal(masked["steps_count"], columns["steps_count"])
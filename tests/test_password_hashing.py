@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from physiolog import passwords
+from physiolog.extensions import db
+from physiolog.models import User
+from physiolog.passwords import PasswordHashBusy, password_hasher
+
+from conftest import TestConfig
+
+
+@pytest.fixture
+def app_config():
+    class Config(TestConfig):
+        PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+        PASSWORD_HASH_WORKERS = 1
+        PASSWORD_HASH_MAX_PENDING = 0
+        PASSWORD_HASH_WAIT_S = 0.05
+
+    return Config
+
+
+def _user_hash(email: str) -> str:
+    db.session.expire_all()
+    return db.session.scalar(db.select(User.password_hash).where(User.email == email))
+
+
+def test_configured_method_is_used(app) -> None:
+    user = User(email="a@example.com")
+    user.set_password("pw")
+    assert user.password_hash.startswith("pbkdf2:sha256:1000$")
+    assert user.check_password("pw") and not user.check_password("nope")
+    assert not password_hasher.needs_rehash(user.password_hash)
+
+
+def test_outdated_hash_is_upgraded_on_login(app) -> None:
+    db.session.add(
+        User(
+            email="old@example.com",
+            password_hash=generate_password_hash("pw", "scrypt"),
+        )
+    )
+    db.session.commit()
+    rehashed = password_hasher.metrics()["rehashed"]
+
+    myclient = app.test_client()
+    res = myclient.post(
+        "/login", data={"email": "old@example.com", "password": "wrong"}
+    )
+    assert res.status_code == 200
+    assert _user_hash("old@example.com").startswith("scrypt:")  # not verified
+
+    res = myclient.post("/login", data={"email": "old@example.com", "password": "pw"})
+    assert res.status_code in (302, 303)
+    assert _user_hash("old@example.com").startswith("pbkdf2:sha256:1000$")
+    assert password_hasher.metrics()["rehashed"] == rehashed + 1
+
+
+def test_saturated_pool_turns_requests_away(app) -> None:
+    user = User(email="busy@example.com")
+    user.set_password("pw")
+    db.session.add(user)
+    db.session.commit()
+    original_hash = user.password_hash
+    myclient = app.test_client()
+
+    rejected = password_hasher.metrics()["rejected"]
+    slots = password_hasher._slots
+    assert slots.acquire(blocking=False)  # the only slot is taken
+    try:
+        with pytest.raises(PasswordHashBusy):
+            password_hasher.hash("pw")
+        res = myclient.post(
+            "/login", data={"email": "busy@example.com", "password": "pw"}
+        )
+        assert res.status_code == 503
+        assert res.headers["Retry-After"] == "1"
+    finally:
+        slots.release()
+
+    res = myclient.post("/login", data={"email": "busy@example.com", "password": "pw"})
+    assert res.status_code in (302, 303)
+
+    assert slots.acquire(blocking=False)
+    try:
+        res = myclient.put(
+            "/api/user-settings",
+            json={"name": "Busy", "password": "new", "password_confirm": "new"},
+        )
+        assert res.status_code == 503
+        assert res.headers["Retry-After"] == "1"
+    finally:
+        slots.release()
+    assert password_hasher.metrics()["rejected"] == rejected + 3
+    assert _user_hash("busy@example.com") == original_hash
+
+
+def test_login_is_served_during_a_bulk_hash(app, monkeypatch) -> None:
+    user = User(email="coach@example.com")
+    user.set_password("pw")
+    db.session.add(user)
+    db.session.commit()
+
+    started = threading.Event()
+    real_hash = passwords.generate_password_hash
+
+    def slow_hash(password: str, method: str) -> str:
+        started.set()
+        time.sleep(0.05)
+        return real_hash(password, method)
+
+    monkeypatch.setattr(passwords, "generate_password_hash", slow_hash)
+    bulk = threading.Thread(target=password_hasher.hash_many, args=(["pw"] * 20,))
+    bulk.start()
+    try:
+        assert started.wait(5)
+        # the only worker thread is busy with the roster, yet the login gets a slot
+        res = app.test_client().post(
+            "/login", data={"email": "coach@example.com", "password": "pw"}
+        )
+        assert res.status_code in (302, 303)
+        assert bulk.is_alive()
+    finally:
+        bulk.join()
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import pytest
+
+from physiolog import create_app
+from physiolog.cache import SQLiteBackend
+from physiolog.extensions import db
+from physiolog.models import User
+from physiolog.principals import Principal, PrincipalCache, principal_cache
+
+from conftest import TestConfig
+
+
+@pytest.fixture
+def hold_app_context():
+    # Flask-Login keeps the loaded user on ``g``, which would hide the user
+    # loader otherwise.
+    return False
+
+
+def test_user_loader_serves_cached_principal(app, client) -> None:
+    before = principal_cache.metrics()
+    assert client.get("/api/user-settings").status_code == 200
+    assert client.get("/api/stats").status_code == 404  # no entries yet
+    after = principal_cache.metrics()
+    assert after["misses"] - before["misses"] <= 1
+    assert after["hits"] - before["hits"] >= 1
+
+    with app.app_context():
+        principal = principal_cache.load(db.session.scalar(db.select(User.id)))
+        assert isinstance(principal, Principal)
+        assert principal.email == "test@example.com" and principal.is_active
+
+
+def test_account_changes_invalidate_the_principal(app, client) -> None:
+    res = client.put(
+        "/api/user-settings",
+        json={
+            "name": "Renamed",
+            "password": "newpassword",
+            "password_confirm": "newpassword",
+        },
+    )
+    assert res.status_code == 200
+    assert client.get("/api/user-settings").get_json()["settings"]["name"] == "Renamed"
+    assert "Renamed" in client.get("/user").get_data(as_text=True)
+
+    # flag changes made outside the request (e.g. by an admin) apply at once
+    assert client.get("/api/metrics").status_code == 403
+    with app.app_context():
+        user = db.session.scalar(db.select(User))
+        user.is_admin = True
+        db.session.commit()
+    assert client.get("/api/metrics").status_code == 200
+
+    with app.app_context():
+        user = db.session.scalar(db.select(User))
+        user.is_active_user = False
+        db.session.commit()
+    assert client.get("/api/user-settings").status_code in (302, 401)  # logged out
+
+
+def test_invalidation_reaches_every_worker_sharing_the_backend(
+    app, create_user, tmp_path
+) -> None:
+    path = str(tmp_path / "cache.sqlite")
+    worker_a, worker_b = PrincipalCache(), PrincipalCache()
+    for worker in (worker_a, worker_b):
+        worker.enabled = True
+        worker.backend = SQLiteBackend(path)
+
+    user_id = create_user("test@example.com").id
+    with app.app_context():
+        assert worker_a.load(user_id).is_admin is False
+        db.session.execute(db.update(User).values(is_admin=True))
+        db.session.commit()
+        assert worker_a.load(user_id).is_admin is False  # still cached
+
+        worker_b.invalidate([user_id])  # the commit was handled by worker b
+        assert worker_a.load(user_id).is_admin is True
+
+
+def test_principal_cache_is_off_with_a_per_process_backend(create_user) -> None:
+    class MultiWorkerConfig(TestConfig):
+        CACHE_SINGLE_PROCESS = False
+
+    app = create_app(MultiWorkerConfig)
+    assert not principal_cache.enabled
+    with app.app_context():
+        db.create_all()
+        user = create_user("a@example.com")
+        assert isinstance(principal_cache.load(user.id), User)
+        db.drop_all()
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from physiolog import config, create_app, routes_web
+from physiolog.cache import (
+    MISSING,
+    MemoryBackend,
+    SingleFlight,
+    SQLiteBackend,
+    make_backend,
+    object_cache,
+    response_cache,
+)
+
+from conftest import TestConfig
+
+
+def test_memory_backend_evicts_lru_and_expires() -> None:
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", 1, ttl_s=60)
+    backend.set("b", 2, ttl_s=60)
+    assert backend.get("a") == 1  # "b" is now least recently used
+    backend.set("c", 3, ttl_s=60)
+    assert backend.get("b") is MISSING
+    assert backend.evictions == 1
+
+    backend.set("d", 4, ttl_s=0.01)
+    time.sleep(0.02)
+    assert backend.get("d") is MISSING
+
+
+def test_default_backend_is_the_in_memory_lru() -> None:
+    assert config.BaseConfig.CACHE_BACKEND == "memory"
+    assert isinstance(make_backend({}), MemoryBackend)
+    assert config.DevConfig.CACHE_SINGLE_PROCESS  # flask run
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite")
+    worker_a = SQLiteBackend(path, max_entries=2)
+    worker_b = SQLiteBackend(path, max_entries=2)
+
+    worker_a.set("a", {"body": b"x"}, ttl_s=60)
+    assert worker_b.get("a") == {"body": b"x"}
+    worker_b.bump_version("user:1")
+    assert worker_a.version("user:1") == 1
+
+    worker_a.set("b", 2, ttl_s=60)
+    assert worker_b.get("a") is not MISSING  # "b" is now least recently read
+    worker_b.set("c", 3, ttl_s=60)
+    assert worker_a.get("b") is MISSING
+    assert len(worker_a) == 2
+    assert worker_b.evictions == 1
+
+    worker_a.set("d", 4, ttl_s=-1)
+    assert worker_b.get("d") is MISSING
+
+
+def test_docs_tree_is_cached_until_a_file_changes(app, tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(routes_web, "DOCS_DIR", tmp_path)
+    page = tmp_path / "intro.md"
+    page.write_text("# Welcome\n\nHello", encoding="utf-8")
+
+    tree = routes_web.build_docs_tree()
+    assert tree["general"][0]["title"] == "Welcome"
+    monkeypatch.setattr(routes_web, "_scan_docs_tree", lambda: pytest.fail("rescanned"))
+    assert routes_web.build_docs_tree() == tree
+
+    monkeypatch.undo()
+    monkeypatch.setattr(routes_web, "DOCS_DIR", tmp_path)
+    page.write_text("# Renamed\n\nHello again", encoding="utf-8")
+    assert routes_web.build_docs_tree()["general"][0]["title"] == "Renamed"
+    assert routes_web._render_docs_markdown_blocks("a\n---\nb") == [
+        "<p>a</p>\n",
+        "<p>b</p>\n",
+    ]
+    assert len(object_cache.backend) >= 3
+
+
+def test_entries_and_stats_are_cached_until_a_write(create_user, login) -> None:
+    create_user("test@example.com")
+    client = login("test@example.com")
+    res = client.post("/api/entries", json={"date": "2026-03-01", "weight_kg": 70})
+    assert res.status_code == 201
+
+    before = response_cache.metrics()
+    first = client.get("/api/stats?window=7d")
+    second = client.get("/api/stats?window=7d")
+    assert first.get_json() == second.get_json()
+    after = response_cache.metrics()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+    # query args are normalized; writes through Core and the ORM both invalidate
+    client.get("/api/entries?window=7d&exclude_outliers=0")
+    assert client.get("/api/entries?exclude_outliers=0&window=7d ").status_code == 200
+    assert response_cache.metrics()["hits"] - after["hits"] == 1
+
+    res = client.put("/api/entries", json={"date": "2026-03-01", "weight_kg": 72})
+
+    assert res.status_code == 200
+    assert client.get("/api/stats?window=7d").get_json()["stats"]["avg_weight"] == 72.0
+
+    res = client.put(
+        "/api/user-profile", json={"age": 40, "height_cm": 180, "weight_kg": 80}
+    )
+
+    assert res.status_code == 200
+    assert client.get("/api/user-profile").get_json()["profile"]["age"] == 40
+    client.put("/api/user-profile", json={"age": 41, "height_cm": 180, "weight_kg": 80})
+    assert client.get("/api/user-profile").get_json()["profile"]["age"] == 41
+
+
+def test_keys_are_per_user_and_versioned(app) -> None:
+    assert response_cache.key("entries", 1, "window=7d") != response_cache.key(
+        "entries", 2, "window=7d"
+    )
+    before = response_cache.key("entries", 1, "window=7d")
+    response_cache.invalidate_users({1})
+    assert response_cache.key("entries", 1, "window=7d") != before
+    assert response_cache.key("entries", 2, "window=7d").endswith("|v0|window=7d")
+
+
+def test_metrics_exposes_cache_counters(create_user, login) -> None:
+    create_user("admin@example.com", is_admin=True)
+    client = login("admin@example.com")
+    body = client.get("/api/metrics").get_json()
+    assert body["response_cache"]["backend"] == "MemoryBackend"
+    assert {"hits", "misses", "size", "invalidations"} <= body["response_cache"].keys()
+
+
+def test_response_cache_needs_a_backend_shared_by_workers(tmp_path) -> None:
+    class MultiWorkerConfig(TestConfig):
+        CACHE_SINGLE_PROCESS = False  # e.g. gunicorn -w 2
+
+    create_app(MultiWorkerConfig)
+    assert not response_cache.enabled  # per-process memory would serve stale bodies
+
+    class SharedConfig(MultiWorkerConfig):
+        CACHE_BACKEND = "sqlite"
+        CACHE_SQLITE_PATH = str(tmp_path / "cache.sqlite")
+
+    create_app(SharedConfig)
+    assert response_cache.enabled
+    assert isinstance(response_cache.backend, SQLiteBackend)
+
+
+def test_single_flight_shares_one_computation() -> None:
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("k", compute)))
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: results.append(flights.do("k", compute)))
+        for _ in range(3)
+    ]
+    for thread in followers:
+        thread.start()
+    while flights.coalesced < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results) == [("result", False)] + [("result", True)] * 3
+    # the key is free again once the flight lands
+    assert flights.do("k", lambda: "again") == ("again", False)
+
+
+def test_single_flight_propagates_errors_to_waiters() -> None:
+    flights = SingleFlight()
+
+    def boom():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        flights.do("k", boom)
+    assert flights.do("k", lambda: 1) == (1, False)
@@ -13,9 +13,19 @@ Usage:
 
 from __future__ import annotations
 
+import bisect
+import random
 from dataclasses import dataclass
+from functools import reduce
 
-from physiolog.services import compute_stats
+import numpy as np
+import pandas as pd
+
+from physiolog.services import (
+    StatsAccumulator,
+    compute_stats,
+    compute_stats_columnar,
+)
 
 
 @dataclass
@@ -79,3 +89,165 @@ def test_compute_stats_all_none() -> None:
     assert stats["avg_steps"] is None
     assert stats["avg_sleep"] is None
     assert stats["total_entries"] == 2
+
+
+def test_compute_stats_dispersion_and_quantiles() -> None:
+    entries = [FakeEntry(weight_kg=w) for w in (70.0, 71.0, 72.0, 73.0, 74.0)]
+
+    stats = compute_stats(  # type: ignore[arg-type]
+        entries, dispersion=True, quantiles=(0.5,)
+    )
+
+    assert stats["avg_weight"] == 72.0
+    assert stats["var_weight"] == 2.0  # population variance, as in the UI
+    assert stats["std_weight"] == 1.41
+    assert stats["min_weight"] == 70.0
+    assert stats["max_weight"] == 74.0
+    assert stats["p50_weight"] == 72.0
+    assert stats["std_steps"] is None
+    assert stats["p50_steps"] is None
+
+
+def test_compute_stats_quantiles_bounded_on_large_stream() -> None:
+    rng = random.Random(7)
+    values = [rng.gauss(80.0, 5.0) for _ in range(20_000)]
+    entries = (FakeEntry(weight_kg=v) for v in values)
+
+    stats = compute_stats(  # type: ignore[arg-type]
+        entries, dispersion=True, quantiles=(0.1, 0.5, 0.9)
+    )
+
+    ordered = sorted(values)
+    assert stats["total_entries"] == 20_000
+    assert abs(stats["p50_weight"] - ordered[10_000]) < 0.2
+    assert abs(stats["p10_weight"] - ordered[2_000]) < 0.2
+    assert abs(stats["p90_weight"] - ordered[18_000]) < 0.2
+    assert abs(stats["std_weight"] - 5.0) < 0.2
+
+
+def test_stats_accumulator_merge_matches_single_pass() -> None:
+    entries = [
+        FakeEntry(
+            weight_kg=70.0 + i * 0.1,
+            calories_kcal=2000 + (i % 7) * 50,
+            steps_count=None if i % 3 else 9000 + i,
+        )
+        for i in range(90)
+    ]
+    expected = compute_stats(  # type: ignore[arg-type]
+        entries, dispersion=True, quantiles=(0.5,)
+    )
+
+    parts = []
+    for start in range(0, 90, 30):
+        acc = StatsAccumulator(track_quantiles=True)
+        for entry in entries[start : start + 30]:
+            acc.update(entry)  # type: ignore[arg-type]
+        parts.append(StatsAccumulator.from_dict(acc.to_dict()))
+
+    merged = reduce(StatsAccumulator.merge, parts)
+    assert merged.finalize(dispersion=True, quantiles=(0.5,)) == expected
+
+
+def test_stats_accumulator_merge_of_compressed_digests_stays_within_rank_error() -> (
+    None
+):
+
+    rng = random.Random(3)
+    values = [rng.gauss(80.0, 5.0) for _ in range(20_000)]
+    parts = []
+    for start in range(0, 20_000, 2_500):  # 2,500 values per part: compressed
+        acc = StatsAccumulator(track_quantiles=True)
+        acc.update_batch({"weight_kg": values[start : start + 2_500]})
+        assert acc.metrics["avg_weight"].digest.means  # type: ignore[union-attr]
+        parts.append(StatsAccumulator.from_dict(acc.to_dict()))
+    quantiles = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+    stats = reduce(StatsAccumulator.merge, parts).finalize(
+        dispersion=True, quantiles=quantiles
+    )
+
+    ordered = sorted(values)
+    assert stats["total_entries"] == 20_000
+    assert stats["min_weight"] == round(ordered[0], 2)
+    # rank error bound: each estimate lies within 0.5% of the sorted sample
+    # from its target rank (default compression of 100)
+    for q in quantiles:
+        estimate = stats[f"p{q * 100:g}_weight"]
+        rank = bisect.bisect_left(ordered, estimate) / len(ordered)
+        assert abs(rank - q) <= 0.005, (q, rank)
+
+
+def test_stats_accumulator_update_batch_skips_missing() -> None:
+    acc = StatsAccumulator()
+    acc.update_batch(
+        {"weight_kg": [70.0, None, 72.0], "sleep_hours": [7.0, 8.0, float("nan")]}
+    )
+    stats = acc.finalize()
+
+    assert stats["total_entries"] == 3
+    assert stats["avg_weight"] == 71.0
+    assert stats["avg_sleep"] == 7.5
+    assert stats["avg_steps"] is None
+
+
+def test_compute_stats_columnar_matches_object_path() -> None:
+    entries = [
+        FakeEntry(weight_kg=70.0, calories_kcal=2000, sleep_hours=7.0),
+        FakeEntry(weight_kg=72.5, steps_count=8000, sleep_hours=6.5),
+        FakeEntry(body_fat_percent=18.0, calories_kcal=2300, protein_g=150),
+        FakeEntry(weight_kg=71.0, steps_count=10000),
+    ]
+    expected = compute_stats(  # type: ignore[arg-type]
+        entries, dispersion=True, quantiles=(0.25, 0.5)
+    )
+
+    columns = {
+        name: np.array([getattr(e, name) for e in entries], dtype=float)
+        for name in (
+            "weight_kg",
+            "body_fat_percent",
+            "calories_kcal",
+            "protein_g",
+            "steps_count",
+            "sleep_hours",
+        )
+    }
+    frame = pd.DataFrame(columns)
+
+    for source in (columns, frame):
+        result = compute_stats_columnar(source, dispersion=True, quantiles=(0.25, 0.5))
+        assert result == expected
+
+
+def test_compute_stats_columnar_quantiles_are_exact_on_large_input() -> None:
+    rng = random.Random(11)
+    weights = [None if i % 10 == 0 else rng.gauss(80.0, 5.0) for i in range(5_000)]
+    entries = [FakeEntry(weight_kg=w) for w in weights]
+    quantiles = (0.01, 0.1, 0.5, 0.9, 0.99)
+
+    expected = compute_stats(  # type: ignore[arg-type]
+        entries, dispersion=True, quantiles=quantiles
+    )
+    result = compute_stats_columnar(
+        {"weight_kg": np.array(weights, dtype=float)},
+        dispersion=True,
+        quantiles=quantiles,
+    )
+    present = sorted(w for w in weights if w is not None)
+    for q in quantiles:
+        key = f"p{q * 100:g}_weight"
+        exact = float(np.quantile(present, q, method="hazen"))
+        assert result[key] == round(exact, 2)
+        # the streaming path estimates the same quantile within the t-digest
+        # rank error
+        rank = bisect.bisect_left(present, expected[key]) / len(present)
+        assert abs(rank - q) <= 0.005, (q, rank)
+    assert result["avg_weight"] == expected["avg_weight"]
+
+
+def test_compute_stats_columnar_missing_columns_are_none() -> None:
+    stats = compute_stats_columnar({"weight_kg": [70.0, None]})
+
+    assert stats["avg_weight"] == 70.0
+    assert stats["avg_steps"] is None
+    assert stats["total_entries"] == 2
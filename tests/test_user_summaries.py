@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from datetime import date
+
+from physiolog.extensions import db
+from physiolog.models import AdminClientAssignment, HealthEntry, UserSummary
+
+
+def _summary(user_id: int) -> UserSummary:
+    db.session.expire_all()
+    return db.session.get(UserSummary, user_id)
+
+
+def test_summary_follows_orm_and_api_writes(create_user, login) -> None:
+    user_id = create_user("test@example.com").id
+    assert _summary(user_id).entry_count == 0
+
+    db.session.add(HealthEntry(user_id=user_id, date=date(2026, 3, 5), weight_kg=70))
+    db.session.commit()
+    summary = _summary(user_id)
+    assert (summary.entry_count, summary.first_entry_date) == (1, date(2026, 3, 5))
+    assert summary.last_write_at is not None
+
+    client = login("test@example.com")
+    items = [{"date": f"2026-03-{day:02d}", "weight_kg": 71} for day in (1, 5, 9)]
+    assert client.post("/api/entries/bulk", json={"entries": items}).status_code == 200
+    summary = _summary(user_id)
+    assert summary.entry_count == 3
+    assert summary.first_entry_date == date(2026, 3, 1)
+    assert summary.last_entry_date == date(2026, 3, 9)
+
+    assert client.delete("/api/entries?date=2026-03-09").status_code == 200
+    assert _summary(user_id).last_entry_date == date(2026, 3, 5)
+    body = client.get("/api/stats?window=7d").get_json()
+    assert body["end_date"] == "2026-03-05"
+
+
+def test_windows_fall_back_to_entries_without_a_summary_row(create_user, login) -> None:
+    user_id = create_user("test@example.com").id
+    for day in (1, 10, 12):
+        db.session.add(
+            HealthEntry(user_id=user_id, date=date(2026, 3, day), weight_kg=70 + day)
+        )
+    db.session.commit()
+    # rows written before the table existed and not backfilled yet
+    db.session.execute(db.delete(UserSummary).where(UserSummary.user_id == user_id))
+    db.session.commit()
+    assert _summary(user_id) is None
+
+    client = login("test@example.com")
+    entries = client.get("/api/entries?window=7d").get_json()["entries"]
+    assert [e["date"] for e in entries] == ["2026-03-12", "2026-03-10"]
+    res = client.get("/api/stats?days=7")
+    assert res.status_code == 200
+    assert res.get_json()["end_date"] == "2026-03-12"
+    assert res.get_json()["stats"]["avg_weight"] == 81.0
+
+
+def test_rolled_back_writes_leave_summary_alone(create_user) -> None:
+    user_id = create_user("test@example.com").id
+    db.session.add(HealthEntry(user_id=user_id, date=date(2026, 3, 5)))
+    db.session.flush()
+    db.session.rollback()
+    assert _summary(user_id).entry_count == 0
+
+
+def test_clients_page_reads_summary_counts(create_user, login) -> None:
+    admin_id = create_user("admin@example.com", is_admin=True).id
+    client_id = create_user("client@example.com").id
+    db.session.add(
+        AdminClientAssignment(admin_user_id=admin_id, client_user_id=client_id)
+    )
+    db.session.add_all(
+        HealthEntry(user_id=client_id, date=date(2026, 2, day)) for day in (1, 2, 3)
+    )
+    db.session.commit()
+
+    client = login("admin@example.com")
+    page = client.get("/clients").get_data(as_text=True)
+    assert "client@example.com" in page
+    assert "2026-02-03" in page
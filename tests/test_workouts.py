@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from physiolog.services.workouts import estimate_1rm_kg, parse_set_item, week_start
+
+
+def test_set_helpers() -> None:
+    assert estimate_1rm_kg(1, 100.0) == 100.0
+    assert estimate_1rm_kg(5, 90.0) == pytest.approx(105.0)
+    assert estimate_1rm_kg(20, 50.0) is None
+    assert week_start(date(2026, 2, 1)) == date(2026, 1, 26)  # Sunday -> Monday
+
+    parsed = parse_set_item(
+        {"date": "2026-02-01", "exercise": "  Bench   Press ", "reps": 5, "load_kg": 80}
+    )
+    assert parsed.exercise == "bench press"
+    assert parsed.volume_kg == 400.0
+    with pytest.raises(ValueError):
+        parse_set_item({"date": "2026-02-01", "exercise": "squat", "reps": 0})
+
+
+def test_sets_update_daily_volume_and_weekly_rollups(client) -> None:
+    assert (
+        client.post(
+            "/api/entries",
+            json={"date": "2026-02-02", "training_volume_kg": 999, "weight_kg": 80},
+        ).status_code
+        == 201
+    )
+
+    sets = [
+        {"date": "2026-02-02", "exercise": "Bench Press", "reps": 5, "load_kg": 80},
+        {"date": "2026-02-02", "exercise": "bench press", "reps": 3, "load_kg": 90},
+        {"date": "2026-02-04", "exercise": "Squat", "reps": 5, "load_kg": 100.5},
+        {"date": "2026-02-04", "exercise": "Squat", "reps": -1, "load_kg": 100},
+    ]
+    res = client.post("/api/workouts/sets", json={"sets": sets})
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["summary"] == {"created": 3, "errors": 1}
+    assert body["results"][3]["status"] == "error"
+    set_ids = [r["id"] for r in body["results"][:3]]
+
+    entry = client.get("/api/entries?date=2026-02-02").get_json()["entry"]
+    assert entry["training_volume_kg"] == 670  # set totals replace the manual value
+    assert entry["weight_kg"] == 80
+    entry = client.get("/api/entries?date=2026-02-04").get_json()["entry"]
+    assert entry["training_volume_kg"] == 502
+
+    # second batch in the same week accumulates
+    client.post(
+        "/api/workouts/sets",
+        json={
+            "sets": [
+                {
+                    "date": "2026-02-05",
+                    "exercise": "bench press",
+                    "reps": 1,
+                    "load_kg": 100,
+                }
+            ]
+        },
+    )
+    weeks = client.get("/api/workouts/progression?exercise=Bench Press").get_json()[
+        "exercises"
+    ]
+    assert weeks == {
+        "bench press": [
+            {
+                "week_start": "2026-02-02",
+                "volume_kg": 770.0,
+                "sets": 3,
+                "best_e1rm_kg": 100.0,
+            }
+        ]
+    }
+
+    # deleting the set holding the best e1RM rescans that week only
+    bench_best_id = client.post(
+        "/api/workouts/sets",
+        json={
+            "sets": [
+                {
+                    "date": "2026-02-06",
+                    "exercise": "bench press",
+                    "reps": 1,
+                    "load_kg": 110,
+                }
+            ]
+        },
+    ).get_json()["results"][0]["id"]
+    assert client.delete(f"/api/workouts/sets/{bench_best_id}").status_code == 200
+    assert client.delete(f"/api/workouts/sets/{bench_best_id}").status_code == 404
+    week = client.get("/api/workouts/progression").get_json()["exercises"][
+        "bench press"
+    ][0]
+    assert week["best_e1rm_kg"] == 100.0
+    assert week["sets"] == 3
+
+    assert client.delete(f"/api/workouts/sets/{set_ids[2]}").status_code == 200
+    entry = client.get("/api/entries?date=2026-02-04").get_json()["entry"]
+    assert entry["training_volume_kg"] is None
+    assert (
+        "squat" not in client.get("/api/workouts/progression").get_json()["exercises"]
+    )
+
+
+def test_sets_rejects_empty_payload(client) -> None:
+    res = client.post("/api/workouts/sets", json={"sets": []})
+    assert res.status_code == 400
+    assert res.get_json()["success"] is False